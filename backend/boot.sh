@@ -12,6 +12,34 @@ while true; do
     sleep 5
 done
 
+# Make every gunicorn worker process record its metrics into files within one directory,
+# which gets emptied so that no metrics of an earlier container run are included.
+export PROMETHEUS_MULTIPROC_DIR="${PROMETHEUS_MULTIPROC_DIR:-/tmp/prometheus-multiproc}"
+rm -rf "$PROMETHEUS_MULTIPROC_DIR"
+mkdir -p "$PROMETHEUS_MULTIPROC_DIR"
+
+# Run the given command in the background, restarting it whenever it exits.
+keep_running_in_background() {
+    (
+        while true; do
+            "$@"
+            echo "'$*' exited with status $?, restarting it in 5 secs..."
+            sleep 5
+        done
+    ) &
+}
+
+# Send the email messages that the gunicorn workers don't manage to send themselves
+# (i.e. the ones that are to be retried, and the ones they have dropped).
+if [[ "${MAIL_WORKER_ENABLED:-true}" == "true" ]]; then
+    keep_running_in_background flask mail-worker
+fi
+
+# Delete the accounts, which have too many resources to be deleted within a request.
+if [[ "${ACCOUNT_DELETION_WORKER_ENABLED:-true}" == "true" ]]; then
+    keep_running_in_background flask account-deletion-worker
+fi
+
 exec gunicorn \
     -b :5000 \
     --access-logfile - \
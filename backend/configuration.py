@@ -61,10 +61,21 @@ class Config:
         f"/{os.environ.get('MYSQL_DATABASE')}"
     )
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # (MySQL closes every connection that has been idle for `wait_timeout` seconds,
+    # so connections are recycled well before that
+    # and are tested whenever they are checked out of the pool.)
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        "pool_size": int(os.environ.get("DB_POOL_SIZE", 10)),
+        "max_overflow": int(os.environ.get("DB_POOL_MAX_OVERFLOW", 10)),
+        "pool_timeout": float(os.environ.get("DB_POOL_TIMEOUT_SECONDS", 30)),
+        "pool_recycle": int(os.environ.get("DB_POOL_RECYCLE_SECONDS", 1800)),
+        "pool_pre_ping": os.environ.get("DB_POOL_PRE_PING", "true") == "true",
+    }
+    DB_POOL_WARM_UP_CONNECTIONS = int(os.environ.get("DB_POOL_WARM_UP_CONNECTIONS", 0))
 
     MAIL_SERVER = os.environ.get("MAIL_SERVER")
     MAIL_PORT = os.environ.get("MAIL_PORT")
-    MAIL_USE_TLS = True
+    MAIL_USE_TLS = os.environ.get("MAIL_USE_TLS", "true") == "true"
     MAIL_USERNAME = os.environ.get("MAIL_USERNAME")
     MAIL_PASSWORD = os.environ.get("MAIL_PASSWORD")
     ADMINS = [
@@ -80,6 +91,122 @@ class Config:
     MINUTES_FOR_TOKEN_VALIDITY = int(os.environ.get("MINUTES_FOR_TOKEN_VALIDITY"))
     MINUTES_FOR_PASSWORD_RESET = int(os.environ.get("MINUTES_FOR_PASSWORD_RESET"))
 
+    VERIFIED_CREDENTIALS_CACHE_ENABLED = (
+        os.environ.get("VERIFIED_CREDENTIALS_CACHE_ENABLED", "true") == "true"
+    )
+    VERIFIED_CREDENTIALS_CACHE_MAX_SIZE = int(
+        os.environ.get("VERIFIED_CREDENTIALS_CACHE_MAX_SIZE", 10000)
+    )
+    VERIFIED_CREDENTIALS_CACHE_TTL_SECONDS = int(
+        os.environ.get("VERIFIED_CREDENTIALS_CACHE_TTL_SECONDS", 300)
+    )
+
+    MAX_ITEMS_PER_BATCH = int(os.environ.get("MAX_ITEMS_PER_BATCH", 10000))
+
+    STATELESS_TOKEN_AUTH_ENABLED = (
+        os.environ.get("STATELESS_TOKEN_AUTH_ENABLED", "false") == "true"
+    )
+    TOKEN_VERSIONS_CACHE_ENABLED = True
+    TOKEN_VERSIONS_CACHE_MAX_SIZE = int(
+        os.environ.get("TOKEN_VERSIONS_CACHE_MAX_SIZE", 10000)
+    )
+    # (With the default, in-process backend, a revoked access token keeps being
+    # accepted by the processes other than the revoking one
+    # until their cached `token_version` expires,
+    # so the TTL is short unless `TOKEN_VERSIONS_CACHE_BACKEND` is shared between
+    # processes.)
+    TOKEN_VERSIONS_CACHE_TTL_SECONDS = int(
+        os.environ.get("TOKEN_VERSIONS_CACHE_TTL_SECONDS", 5)
+    )
+    TOKEN_VERSIONS_CACHE_BACKEND = os.environ.get("TOKEN_VERSIONS_CACHE_BACKEND")
+
+    OUTBOX_BATCH_SIZE = int(os.environ.get("OUTBOX_BATCH_SIZE", 100))
+    OUTBOX_POLL_INTERVAL_SECONDS = float(
+        os.environ.get("OUTBOX_POLL_INTERVAL_SECONDS", 5)
+    )
+    OUTBOX_MAX_ATTEMPTS = int(os.environ.get("OUTBOX_MAX_ATTEMPTS", 8))
+    OUTBOX_RETRY_BACKOFF_SECONDS = float(
+        os.environ.get("OUTBOX_RETRY_BACKOFF_SECONDS", 30)
+    )
+    OUTBOX_DISPATCH_ENABLED = (
+        os.environ.get("OUTBOX_DISPATCH_ENABLED", "true") == "true"
+    )
+    OUTBOX_DISPATCH_THREADS = int(os.environ.get("OUTBOX_DISPATCH_THREADS", 2))
+    OUTBOX_DISPATCH_QUEUE_SIZE = int(os.environ.get("OUTBOX_DISPATCH_QUEUE_SIZE", 1000))
+    OUTBOX_DISPATCH_IDLE_SECONDS = float(
+        os.environ.get("OUTBOX_DISPATCH_IDLE_SECONDS", 30)
+    )
+
+    ACCOUNT_DELETION_SYNC_MAX_EXAMPLES = int(
+        os.environ.get("ACCOUNT_DELETION_SYNC_MAX_EXAMPLES", 1000)
+    )
+    ACCOUNT_DELETION_CHUNK_SIZE = int(
+        os.environ.get("ACCOUNT_DELETION_CHUNK_SIZE", 1000)
+    )
+    ACCOUNT_DELETION_POLL_INTERVAL_SECONDS = float(
+        os.environ.get("ACCOUNT_DELETION_POLL_INTERVAL_SECONDS", 5)
+    )
+    ACCOUNT_DELETION_MAX_ATTEMPTS = int(
+        os.environ.get("ACCOUNT_DELETION_MAX_ATTEMPTS", 5)
+    )
+    ACCOUNT_DELETION_RETRY_BACKOFF_SECONDS = float(
+        os.environ.get("ACCOUNT_DELETION_RETRY_BACKOFF_SECONDS", 60)
+    )
+    ACCOUNT_DELETION_RUNNING_TIMEOUT_SECONDS = float(
+        os.environ.get("ACCOUNT_DELETION_RUNNING_TIMEOUT_SECONDS", 600)
+    )
+
+    # (With the default, in-process backend, cached responses could become stale
+    # in processes other than the one that handled a change,
+    # so the response cache must only be enabled
+    # if the backend is being run as a single process
+    # or if `RESPONSE_CACHE_BACKEND` is shared between processes.)
+    RESPONSE_CACHE_ENABLED = os.environ.get("RESPONSE_CACHE_ENABLED", "false") == "true"
+    RESPONSE_CACHE_MAX_SIZE = int(os.environ.get("RESPONSE_CACHE_MAX_SIZE", 10000))
+    RESPONSE_CACHE_TTL_SECONDS = int(os.environ.get("RESPONSE_CACHE_TTL_SECONDS", 300))
+    RESPONSE_CACHE_BACKEND = os.environ.get("RESPONSE_CACHE_BACKEND")
+
+    # (The same caveat applies to the cache of the numbers of results,
+    # which paginated listings report as their `total_items`.)
+    COUNT_CACHE_ENABLED = os.environ.get("COUNT_CACHE_ENABLED", "false") == "true"
+    COUNT_CACHE_MAX_SIZE = int(os.environ.get("COUNT_CACHE_MAX_SIZE", 10000))
+    COUNT_CACHE_TTL_SECONDS = int(os.environ.get("COUNT_CACHE_TTL_SECONDS", 300))
+    COUNT_CACHE_BACKEND = os.environ.get("COUNT_CACHE_BACKEND")
+
+    # (`/metrics` is not protected by any authentication,
+    # so it should not be reachable from outside of the deployment.)
+    METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "false") == "true"
+    # (The `Server-Timing` header reveals how long each phase of a request took,
+    # e.g. bcrypt, so it is only meant for diagnosing performance problems.)
+    SERVER_TIMING_ENABLED = os.environ.get("SERVER_TIMING_ENABLED", "false") == "true"
+    QUERY_COUNTER_ENABLED = os.environ.get("QUERY_COUNTER_ENABLED", "false") == "true"
+    QUERY_COUNTER_REPEAT_THRESHOLD = int(
+        os.environ.get("QUERY_COUNTER_REPEAT_THRESHOLD", 5)
+    )
+    SLOW_QUERY_RECORDER_ENABLED = (
+        os.environ.get("SLOW_QUERY_RECORDER_ENABLED", "false") == "true"
+    )
+    SLOW_QUERY_THRESHOLD_MS = float(os.environ.get("SLOW_QUERY_THRESHOLD_MS", 200))
+    SLOW_QUERY_BUFFER_SIZE = int(os.environ.get("SLOW_QUERY_BUFFER_SIZE", 100))
+    # (Profiling slows down the profiled requests considerably,
+    # so only a small fraction of all requests should be sampled.)
+    PROFILER_ENABLED = os.environ.get("PROFILER_ENABLED", "false") == "true"
+    PROFILER_SAMPLE_RATE = float(os.environ.get("PROFILER_SAMPLE_RATE", 0.0))
+    PROFILER_DIRECTORY = os.environ.get(
+        "PROFILER_DIRECTORY",
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), "profiles"),
+    )
+
+    # The users, whose email addresses are listed here (separated by commas),
+    # may access the `/api/admin/...` endpoints.
+    ADMINISTRATOR_EMAIL_ADDRESSES = [
+        email_address.strip()
+        for email_address in os.environ.get("ADMINISTRATOR_EMAIL_ADDRESSES", "").split(
+            ","
+        )
+        if email_address.strip()
+    ]
+
     SERVER_NAME = None
 
 
@@ -94,8 +221,23 @@ class ProductionConfig(Config):
 class TestingConfig(Config):
     TESTING = True
     SECRET_KEY = "testing-secret-key"
+    ADMINS = ["vocab-treasury-testing@example.com"]
+    OUTBOX_DISPATCH_ENABLED = False
+    # Make every test exercise the invalidation of cached responses and counts.
+    RESPONSE_CACHE_ENABLED = True
+    COUNT_CACHE_ENABLED = True
+    # (The instrumentation is turned on only by the tests that exercise it,
+    # by means of `TestBase.configuration_overrides`.)
+    METRICS_ENABLED = False
+    SERVER_TIMING_ENABLED = False
+    QUERY_COUNTER_ENABLED = False
+    SLOW_QUERY_RECORDER_ENABLED = False
+    PROFILER_ENABLED = False
 
     SQLALCHEMY_DATABASE_URI = "sqlite://"
+    # (An in-memory SQLite database is served by a `StaticPool`,
+    # which accepts none of the pool options above.)
+    SQLALCHEMY_ENGINE_OPTIONS = {}
 
 
 name_2_configuration = {
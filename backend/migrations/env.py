@@ -73,6 +73,12 @@ def run_migrations_online():
     connectable = current_app.extensions['migrate'].db.engine
 
     with connectable.connect() as connection:
+        if connection.dialect.name == 'sqlite':
+            # Prevent "batch" migrations, which drop and re-create tables,
+            # from cascading the deletion of the dropped tables' rows.
+            # (This pragma has no effect within a transaction.)
+            connection.exec_driver_sql('PRAGMA foreign_keys=OFF')
+
         context.configure(
             connection=connection,
             target_metadata=target_metadata,
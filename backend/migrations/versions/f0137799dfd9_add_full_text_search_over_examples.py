@@ -0,0 +1,77 @@
+"""add full-text search over examples
+
+Revision ID: f0137799dfd9
+Revises: d932ed5025ca
+Create Date: 2026-10-17 09:12:40.418302
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f0137799dfd9'
+down_revision = 'd932ed5025ca'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    dialect_name = op.get_bind().dialect.name
+
+    if dialect_name == 'mysql':
+        op.create_index(
+            'ix_example_full_text',
+            'example',
+            ['new_word', 'content', 'content_translation'],
+            mysql_prefix='FULLTEXT',
+        )
+
+    elif dialect_name == 'sqlite':
+        # (This revision owns the FTS5 table and its triggers;
+        # what follows is a frozen copy of the DDL that `src/search.py` builds,
+        # and later revisions, which re-create the `example` table,
+        # copy the triggers from the database instead of repeating it.)
+        op.execute(
+            "CREATE VIRTUAL TABLE example_fts USING fts5("
+            " new_word, content, content_translation,"
+            " content='example', content_rowid='id'"
+            ")"
+        )
+        op.execute(
+            "CREATE TRIGGER example_fts_after_insert AFTER INSERT ON example BEGIN"
+            " INSERT INTO example_fts (rowid, new_word, content, content_translation)"
+            " VALUES (new.id, new.new_word, new.content, new.content_translation);"
+            " END"
+        )
+        op.execute(
+            "CREATE TRIGGER example_fts_after_delete AFTER DELETE ON example BEGIN"
+            " INSERT INTO example_fts"
+            " (example_fts, rowid, new_word, content, content_translation)"
+            " VALUES ('delete', old.id, old.new_word, old.content, old.content_translation);"
+            " END"
+        )
+        op.execute(
+            "CREATE TRIGGER example_fts_after_update AFTER UPDATE ON example BEGIN"
+            " INSERT INTO example_fts"
+            " (example_fts, rowid, new_word, content, content_translation)"
+            " VALUES ('delete', old.id, old.new_word, old.content, old.content_translation);"
+            " INSERT INTO example_fts (rowid, new_word, content, content_translation)"
+            " VALUES (new.id, new.new_word, new.content, new.content_translation);"
+            " END"
+        )
+        # Index the rows that already exist.
+        op.execute("INSERT INTO example_fts (example_fts) VALUES ('rebuild')")
+
+
+def downgrade():
+    dialect_name = op.get_bind().dialect.name
+
+    if dialect_name == 'mysql':
+        op.drop_index('ix_example_full_text', table_name='example')
+
+    elif dialect_name == 'sqlite':
+        op.execute("DROP TRIGGER IF EXISTS example_fts_after_update")
+        op.execute("DROP TRIGGER IF EXISTS example_fts_after_delete")
+        op.execute("DROP TRIGGER IF EXISTS example_fts_after_insert")
+        op.execute("DROP TABLE IF EXISTS example_fts")
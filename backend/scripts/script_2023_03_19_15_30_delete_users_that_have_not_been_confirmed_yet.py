@@ -7,10 +7,22 @@ and only then to go on to execute this script.
 
 ###############################################################################
 
+This script deletes the users,
+who have not confirmed their email address
+within DAYS_FOR_EMAIL_ADDRESS_CONFIRMATION days of registering,
+together with all of their resources.
+(A dry run only reports how many rows would be deleted.)
+
+###############################################################################
+
 The following steps describe how to use this script:
 
 - launch a terminal instance
 
+- (optionally) decide how many users are to be deleted per transaction
+  by adding `--batch-size=<number>` to the commands below
+  (the default value is 500)
+
 - execute this script by issuing
   ```
   # Dry run:
@@ -38,8 +50,8 @@ The following steps describe how to use this script:
 import argparse
 import logging
 
-from src import create_app, db
-from src.models import User, Example
+from src import create_app
+from src.purging import count_expired_registrations, purge_expired_registrations
 
 
 logger = logging.getLogger(__name__)
@@ -63,35 +75,32 @@ if __name__ == "__main__":
         default=True,
         type=bool,
     )
+    arg_parser.add_argument(
+        "--batch-size",
+        default=500,
+        type=int,
+    )
 
     args = arg_parser.parse_args()
     logger.debug("args.dry_run = %s", args.dry_run)
+    logger.debug("args.batch_size = %s", args.batch_size)
 
     app = create_app(
         name_of_configuration="production",
     )
 
     with app.app_context():
-        users = User.query.filter(
-            (User.is_confirmed == None) | (User.is_confirmed == False)
-        )
-
-        for u in users:
-            logger.info("processing %s", repr(u))
-
-            examples = Example.query.filter_by(user_id=u.id)
-
-            n_examples = examples.count()
-            logger.info("- has %s Example resources", n_examples)
-
-            if n_examples > 0:
-                logger.info("- ...")
-                for e in examples:
-                    logger.info("- processing %s", repr(e))
-
-                    if args.dry_run is False:
-                        db.session.delete(e)
-
-            if args.dry_run is False:
-                db.session.delete(u)
-                db.session.commit()
+        days_for_email_address_confirmation = app.config[
+            "DAYS_FOR_EMAIL_ADDRESS_CONFIRMATION"
+        ]
+
+        if args.dry_run is not False:
+            report = count_expired_registrations(days_for_email_address_confirmation)
+            logger.info("[dry run] would delete %s", report)
+        else:
+            report = purge_expired_registrations(
+                days_for_email_address_confirmation,
+                args.batch_size,
+                on_batch=lambda batch: logger.info("deleted %s", batch),
+            )
+            logger.info("deleted in total %s", report)
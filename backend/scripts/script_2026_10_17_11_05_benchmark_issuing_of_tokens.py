@@ -0,0 +1,111 @@
+"""
+This script measures how many requests per second
+the backend application is able to serve for `POST /api/tokens`
+- once with the cache of verified Basic Auth credentials enabled,
+  and once with that cache disabled.
+
+The script uses the 'testing' configuration
+(i.e. an in-memory SQLite database and no real email),
+so it may be executed without access to any external services.
+
+#######################################################################################
+
+The following steps describe how to use this script:
+
+- launch a terminal instance
+
+- execute this script by issuing
+  ```
+  (venv) backend $ PYTHONPATH=. \
+    DAYS_FOR_EMAIL_ADDRESS_CONFIRMATION=42 \
+    MINUTES_FOR_TOKEN_VALIDITY=42 \
+    MINUTES_FOR_PASSWORD_RESET=42 \
+    python \
+    scripts/script_2026_10_17_11_05_benchmark_issuing_of_tokens.py \
+    --n-requests=50
+  ```
+"""
+
+import argparse
+import base64
+import logging
+import time
+
+from src import db, flsk_bcrpt, create_app
+from src.models import User
+
+
+logger = logging.getLogger(__name__)
+
+logger.setLevel(logging.DEBUG)
+
+handler_1 = logging.StreamHandler()
+handler_1.setFormatter(
+    logging.Formatter("%(asctime)s - %(levelname)s - %(name)s - %(message)s"),
+)
+
+logger.addHandler(handler_1)
+
+
+def measure_requests_per_second(client, authorization, n_requests):
+    start = time.perf_counter()
+    for _ in range(n_requests):
+        rv = client.post("/api/tokens", headers={"Authorization": authorization})
+        assert rv.status_code == 200, rv.get_data(as_text=True)
+    duration = time.perf_counter() - start
+
+    return n_requests / duration
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(
+        prog=__name__,
+    )
+    arg_parser.add_argument(
+        "--n-requests",
+        default=50,
+        type=int,
+    )
+
+    args = arg_parser.parse_args()
+    logger.debug("args.n_requests = %s", args.n_requests)
+
+    app = create_app(
+        name_of_configuration="testing",
+    )
+
+    with app.app_context():
+        db.create_all()
+
+        email = "john.doe@protonmail.com"
+        password = "123"
+        u = User(
+            username="jd",
+            email=email,
+            password_hash=flsk_bcrpt.generate_password_hash(password).decode("utf-8"),
+            is_confirmed=True,
+        )
+        db.session.add(u)
+        db.session.commit()
+
+        basic_auth_credentials = f"{email}:{password}"
+        b_a_c = base64.b64encode(basic_auth_credentials.encode("utf-8")).decode("utf-8")
+        authorization = "Basic " + b_a_c
+
+        client = app.test_client()
+
+        for cache_enabled in (False, True):
+            app.config["VERIFIED_CREDENTIALS_CACHE_ENABLED"] = cache_enabled
+
+            requests_per_second = measure_requests_per_second(
+                client,
+                authorization,
+                args.n_requests,
+            )
+            logger.info(
+                "cache %s: %.1f requests/sec for POST /api/tokens",
+                "enabled" if cache_enabled else "disabled",
+                requests_per_second,
+            )
+
+        db.drop_all()
@@ -0,0 +1,158 @@
+"""
+This script compares the payload size and the latency
+of the responses to `GET /api/examples` for pages of 100 `Example` resources
+- once with every field of the resources,
+  and once with only the `new_word` field (i.e. via `fields=new_word`).
+
+The script uses the 'testing' configuration
+(i.e. an in-memory SQLite database and no real email),
+so it may be executed without access to any external services;
+the cache of responses is disabled,
+so that every request is served from the database.
+
+#######################################################################################
+
+The following steps describe how to use this script:
+
+- launch a terminal instance
+
+- execute this script by issuing
+  ```
+  (venv) backend $ PYTHONPATH=. \
+    DAYS_FOR_EMAIL_ADDRESS_CONFIRMATION=42 \
+    MINUTES_FOR_TOKEN_VALIDITY=42 \
+    MINUTES_FOR_PASSWORD_RESET=42 \
+    python \
+    scripts/script_2026_10_17_23_45_benchmark_sparse_fieldsets.py \
+    --n-examples=1000 \
+    --content-length=2000 \
+    --n-requests=50
+  ```
+"""
+
+import argparse
+import base64
+import datetime
+import logging
+import statistics
+import time
+
+from src import db, flsk_bcrpt, create_app
+from src.models import User, Example
+
+
+logger = logging.getLogger(__name__)
+
+logger.setLevel(logging.DEBUG)
+
+handler_1 = logging.StreamHandler()
+handler_1.setFormatter(
+    logging.Formatter("%(asctime)s - %(levelname)s - %(name)s - %(message)s"),
+)
+
+logger.addHandler(handler_1)
+
+
+def measure_latencies(client, authorization, url, n_requests):
+    latencies = []
+    payload_size = None
+    for _ in range(n_requests):
+        start = time.perf_counter()
+        rv = client.get(url, headers={"Authorization": authorization})
+        latencies.append(time.perf_counter() - start)
+
+        assert rv.status_code == 200, rv.get_data(as_text=True)
+        payload_size = len(rv.get_data())
+
+    return payload_size, latencies
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(
+        prog=__name__,
+    )
+    arg_parser.add_argument(
+        "--n-examples",
+        default=1000,
+        type=int,
+    )
+    arg_parser.add_argument(
+        "--content-length",
+        default=2000,
+        type=int,
+    )
+    arg_parser.add_argument(
+        "--n-requests",
+        default=50,
+        type=int,
+    )
+
+    args = arg_parser.parse_args()
+    logger.debug("args.n_examples = %s", args.n_examples)
+    logger.debug("args.content_length = %s", args.content_length)
+    logger.debug("args.n_requests = %s", args.n_requests)
+
+    app = create_app(
+        name_of_configuration="testing",
+    )
+    app.config["RESPONSE_CACHE_ENABLED"] = False
+
+    with app.app_context():
+        db.create_all()
+
+        email = "john.doe@protonmail.com"
+        password = "123"
+        u = User(
+            username="jd",
+            email=email,
+            password_hash=flsk_bcrpt.generate_password_hash(password).decode("utf-8"),
+            is_confirmed=True,
+        )
+        db.session.add(u)
+        db.session.commit()
+
+        now = datetime.datetime.utcnow()
+        db.session.execute(
+            Example.__table__.insert(),
+            [
+                {
+                    "created": now,
+                    "updated": now,
+                    "user_id": u.id,
+                    "source_language": "Finnish",
+                    "new_word": f"sana-{x}",
+                    "content": "x" * args.content_length,
+                    "content_translation": "y" * args.content_length,
+                }
+                for x in range(args.n_examples)
+            ],
+        )
+        db.session.commit()
+
+        client = app.test_client()
+
+        basic_auth_credentials = f"{email}:{password}"
+        b_a_c = base64.b64encode(basic_auth_credentials.encode("utf-8")).decode("utf-8")
+        rv = client.post("/api/tokens", headers={"Authorization": "Basic " + b_a_c})
+        authorization = "Bearer " + rv.json["token"]
+
+        for url in (
+            "/api/examples?per_page=100",
+            "/api/examples?per_page=100&fields=new_word",
+        ):
+            payload_size, latencies = measure_latencies(
+                client,
+                authorization,
+                url,
+                args.n_requests,
+            )
+            logger.info(
+                "%s: %d bytes per response,"
+                " %.2f ms median latency, %.2f ms mean latency",
+                url,
+                payload_size,
+                statistics.median(latencies) * 1000,
+                statistics.mean(latencies) * 1000,
+            )
+
+        db.drop_all()
@@ -0,0 +1,212 @@
+"""
+This script measures the latency of the list endpoints
+(i.e. `GET /api/examples` and `GET /api/users`) for pages of 100 resources
+- once with Flask's default JSON provider (i.e. the standard library's `json`),
+  and once with the application's `FastJSONProvider` (i.e. `orjson`, if installed).
+
+In addition, it measures how long it takes
+to turn a page of 100 `Example`s into dicts
+- once by way of hydrated `Example` instances,
+  and once straight from `Row`s of individual columns.
+
+The script uses the 'testing' configuration
+(i.e. an in-memory SQLite database and no real email),
+so it may be executed without access to any external services;
+the cache of responses is disabled,
+so that every request is served from the database.
+
+#######################################################################################
+
+The following steps describe how to use this script:
+
+- launch a terminal instance
+
+- execute this script by issuing
+  ```
+  (venv) backend $ PYTHONPATH=. \
+    DAYS_FOR_EMAIL_ADDRESS_CONFIRMATION=42 \
+    MINUTES_FOR_TOKEN_VALIDITY=42 \
+    MINUTES_FOR_PASSWORD_RESET=42 \
+    python \
+    scripts/script_2026_10_18_00_10_benchmark_list_endpoints.py \
+    --n-examples=1000 \
+    --n-users=1000 \
+    --n-requests=50
+  ```
+"""
+
+import argparse
+import base64
+import datetime
+import logging
+import statistics
+import time
+
+from flask.json.provider import DefaultJSONProvider
+
+from src import db, flsk_bcrpt, create_app
+from src.json_provider import FastJSONProvider, orjson
+from src.models import User, Example, PaginatedAPIMixin
+
+
+logger = logging.getLogger(__name__)
+
+logger.setLevel(logging.DEBUG)
+
+handler_1 = logging.StreamHandler()
+handler_1.setFormatter(
+    logging.Formatter("%(asctime)s - %(levelname)s - %(name)s - %(message)s"),
+)
+
+logger.addHandler(handler_1)
+
+
+URLS = (
+    "/api/examples?per_page=100",
+    "/api/examples?per_page=100&include_total=false",
+    "/api/examples?per_page=100&after=",
+    "/api/examples?per_page=100&q=sana",
+    "/api/users?per_page=100",
+)
+
+
+def measure_latencies(client, authorization, url, n_requests):
+    latencies = []
+    for _ in range(n_requests):
+        start = time.perf_counter()
+        rv = client.get(url, headers={"Authorization": authorization})
+        latencies.append(time.perf_counter() - start)
+
+        assert rv.status_code == 200, rv.get_data(as_text=True)
+
+    return latencies
+
+
+def measure_serialization(query, n_repetitions):
+    durations = []
+    for _ in range(n_repetitions):
+        db.session.expunge_all()
+        start = time.perf_counter()
+        PaginatedAPIMixin.to_dicts(query.limit(100).all())
+        durations.append(time.perf_counter() - start)
+
+    return durations
+
+
+def populate_db(n_examples, n_users):
+    password = "123"
+    password_hash = flsk_bcrpt.generate_password_hash(password).decode("utf-8")
+    now = datetime.datetime.utcnow()
+
+    db.session.execute(
+        User.__table__.insert(),
+        [
+            {
+                "username": f"user-{x}",
+                "email": f"user-{x}@protonmail.com",
+                "password_hash": password_hash,
+                "is_confirmed": True,
+                "created": now,
+            }
+            for x in range(n_users)
+        ],
+    )
+    u = User.query.filter_by(username="user-0").one()
+    db.session.execute(
+        Example.__table__.insert(),
+        [
+            {
+                "created": now,
+                "updated": now,
+                "user_id": u.id,
+                "source_language": "Finnish",
+                "new_word": f"sana-{x}",
+                "content": f"Tämä on esimerkkilause numero {x}.",
+                "content_translation": f"This is example sentence number {x}.",
+            }
+            for x in range(n_examples)
+        ],
+    )
+    db.session.commit()
+
+    return u.email, password
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(
+        prog=__name__,
+    )
+    arg_parser.add_argument(
+        "--n-examples",
+        default=1000,
+        type=int,
+    )
+    arg_parser.add_argument(
+        "--n-users",
+        default=1000,
+        type=int,
+    )
+    arg_parser.add_argument(
+        "--n-requests",
+        default=50,
+        type=int,
+    )
+
+    args = arg_parser.parse_args()
+    logger.debug("args.n_examples = %s", args.n_examples)
+    logger.debug("args.n_users = %s", args.n_users)
+    logger.debug("args.n_requests = %s", args.n_requests)
+    logger.debug("orjson is %s", "installed" if orjson is not None else "missing")
+
+    app = create_app(
+        name_of_configuration="testing",
+    )
+    app.config["RESPONSE_CACHE_ENABLED"] = False
+
+    with app.app_context():
+        db.create_all()
+
+        email, password = populate_db(args.n_examples, args.n_users)
+
+        client = app.test_client()
+
+        basic_auth_credentials = f"{email}:{password}"
+        b_a_c = base64.b64encode(basic_auth_credentials.encode("utf-8")).decode("utf-8")
+        rv = client.post("/api/tokens", headers={"Authorization": "Basic " + b_a_c})
+        authorization = "Bearer " + rv.json["token"]
+
+        for url in URLS:
+            for provider_class in (DefaultJSONProvider, FastJSONProvider):
+                app.json = provider_class(app)
+
+                latencies = measure_latencies(
+                    client,
+                    authorization,
+                    url,
+                    args.n_requests,
+                )
+                logger.info(
+                    "%s with %s: %.2f ms median latency, %.2f ms mean latency",
+                    url,
+                    provider_class.__name__,
+                    statistics.median(latencies) * 1000,
+                    statistics.mean(latencies) * 1000,
+                )
+
+        for description, query in (
+            ("Example instances", Example.query.order_by(Example.id.desc())),
+            (
+                "Rows",
+                Example.query.order_by(Example.id.desc()).with_entities(
+                    *[getattr(Example, field) for field in Example.FIELDS]
+                ),
+            ),
+        ):
+            durations = measure_serialization(query, args.n_requests)
+            logger.info(
+                "100 dicts from %s: %.2f ms median duration",
+                description,
+                statistics.median(durations) * 1000,
+            )
+
+        db.drop_all()
@@ -1,18 +1,28 @@
 import datetime
 import os
+import sqlite3
 import sys
 
 from flask import Flask
-from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
 from flask_mail import Mail
 from flask_bcrypt import Bcrypt
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
 
 
 from configuration import name_2_configuration
+from src.caching import Cache, ResponseCache, CountCache
+from src.db_pool import SQLAlchemy, warm_up_pool
+from src.instrumentation import RequestMetrics
+from src.server_timing import ServerTiming
+from src.slow_queries import SlowQueryRecorder
+from src.profiling import RequestProfiler
+from src.json_provider import FastJSONProvider
 
 
 # Create Flask extentions, each in an uninitialized state.
+# (Its engines keep track of how long requests wait for a database connection.)
 db = SQLAlchemy()
 migrate = Migrate()
 mail = Mail()
@@ -20,10 +30,64 @@ mail = Mail()
 # the following variable is not called simply `bcrypt`
 # (because if it were, it would be effectively overriding the `bcrypt` module).
 flsk_bcrpt = Bcrypt()
+# Remember which credentials were verified recently,
+# so that HTTP Basic Auth doesn't have to run bcrypt on every request.
+verified_credentials_cache = Cache("VERIFIED_CREDENTIALS_CACHE")
+# Remember each user's current `token_version`,
+# so that Bearer-Token Auth doesn't have to load the user from the database.
+token_versions_cache = Cache("TOKEN_VERSIONS_CACHE")
+# Remember the responses to each user's requests for their own resources.
+response_cache = ResponseCache("RESPONSE_CACHE")
+# Remember the total numbers of results, which paginated listings report.
+count_cache = CountCache("COUNT_CACHE")
+# Record Prometheus metrics of the handled requests.
+request_metrics = RequestMetrics()
+# Break the time it takes to handle each request down into phases.
+server_timing = ServerTiming()
+# Record the SQL statements that take long to execute (together with their plans).
+slow_query_recorder = SlowQueryRecorder()
+# Run the request-handling functions under a profiler (on demand or at random).
+request_profiler = RequestProfiler()
+
+
+@event.listens_for(Engine, "connect")
+def enable_foreign_keys_on_sqlite(dbapi_connection, connection_record):
+    """
+    Make SQLite enforce foreign keys (including `ON DELETE CASCADE`),
+    which it doesn't do by default.
+    """
+    if isinstance(dbapi_connection, sqlite3.Connection):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
 
 
 # Import the models so that they get registered with SQLAlchemy.
-from src.models import User, Example, EmailAddressChange  # noqa
+from src.models import (  # noqa
+    User,
+    Example,
+    EmailAddressChange,
+    OutboxEmail,
+    AccountDeletion,
+)
+
+# Import the module that attaches full-text search capabilities to the `example` table.
+from src import search  # noqa
+
+# Import the module that sends the email messages waiting in the outbox,
+# and create the Flask extension that does so from within each process.
+from src.outbox import OutboxDispatcher, mail_worker_command  # noqa
+
+outbox_dispatcher = OutboxDispatcher()
+
+# Import the module that counts the SQL statements issued while handling each request,
+# and create the Flask extension that does so.
+from src.query_counter import QueryCounter  # noqa
+
+query_counter = QueryCounter()
+
+# Import the module that deletes accounts with many resources in the background.
+from src.account_deletion import account_deletion_worker_command  # noqa
 
 
 def create_app(name_of_configuration=None):
@@ -45,17 +109,41 @@ def create_app(name_of_configuration=None):
 
     app = Flask(__name__)
     app.config.from_object(name_2_configuration[name_of_configuration])
+    # Serialize (and parse) JSON by means of `orjson`, if that package is installed.
+    app.json = FastJSONProvider(app)
 
     # Initialize the Flask extensions.
     db.init_app(app)
-    migrate.init_app(app, db)
+    migrate.init_app(app, db, include_object=search.include_object)
     mail.init_app(app)
     flsk_bcrpt.init_app(app)
+    verified_credentials_cache.init_app(app)
+    token_versions_cache.init_app(app)
+    response_cache.init_app(app)
+    count_cache.init_app(app)
+    outbox_dispatcher.init_app(app)
+    request_metrics.init_app(app)
+    server_timing.init_app(app)
+    query_counter.init_app(app)
+    slow_query_recorder.init_app(app)
+
+    if app.config["DB_POOL_WARM_UP_CONNECTIONS"] > 0:
+        # (Under gunicorn, each worker process runs this
+        # - unless gunicorn is told to `--preload` the application,
+        # in which case the workers would share the opened connections.)
+        with app.app_context():
+            warm_up_pool(db.engine, app.config["DB_POOL_WARM_UP_CONNECTIONS"])
 
     # Register `Blueprint`(s) with the application instance.
     # (By themselves, `Blueprint`s are "inactive".)
     from src.api import api_bp
 
     app.register_blueprint(api_bp, url_prefix="/api")
+    # (This extension wraps the request-handling functions of the blueprint.)
+    request_profiler.init_app(app)
+
+    # Register the command-line interface's custom commands.
+    app.cli.add_command(mail_worker_command)
+    app.cli.add_command(account_deletion_worker_command)
 
     return app
@@ -0,0 +1,230 @@
+import datetime
+import secrets
+import string
+import time
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+import sqlalchemy as sa
+
+from src import db, count_cache
+from src.constants import CONFIRMED_USERS
+from src.models import User, Example, EmailAddressChange, AccountDeletion
+
+
+def schedule_account_deletion(user):
+    """
+    Create an `AccountDeletion` job for `user`,
+    and lock `user` out of their account until the job has deleted it.
+
+    (The caller is responsible for committing the current database session.)
+    """
+    # Replace the password hash with a well-formed bcrypt hash,
+    # which no password matches;
+    # that also revokes all access tokens that have been issued to `user`.
+    alphabet = "./" + string.ascii_letters + string.digits
+    user.password_hash = "$2b$12$" + "".join(
+        secrets.choice(alphabet) for _ in range(53)
+    )
+
+    account_deletion = AccountDeletion(user_id=user.id)
+    db.session.add(account_deletion)
+    return account_deletion
+
+
+def run_account_deletion(account_deletion, chunk_size):
+    """
+    Delete the `Example`s and `EmailAddressChange`s of the `User`,
+    whom `account_deletion` is about,
+    in chunks of (at most) `chunk_size` rows, each within its own short transaction
+    (so that no lock is held for long);
+    then delete the `User` and mark `account_deletion` as completed.
+    """
+    for model, counter in (
+        (Example, "n_examples_deleted"),
+        (EmailAddressChange, "n_email_address_changes_deleted"),
+    ):
+        while True:
+            ids = [
+                id_
+                for (id_,) in db.session.query(model.id)
+                .filter(model.user_id == account_deletion.user_id)
+                .order_by(model.id)
+                .limit(chunk_size)
+            ]
+            if not ids:
+                break
+
+            n_deleted = db.session.execute(
+                sa.delete(model).where(model.id.in_(ids)),
+                execution_options={"synchronize_session": False},
+            ).rowcount
+            if model is Example:
+                db.session.execute(
+                    sa.update(User)
+                    .where(User.id == account_deletion.user_id)
+                    .values(example_count=User.example_count - n_deleted),
+                    execution_options={"synchronize_session": False},
+                )
+            setattr(
+                account_deletion,
+                counter,
+                getattr(account_deletion, counter) + n_deleted,
+            )
+            # (Every chunk bumps `updated`,
+            # which shows that the worker running the job is still alive.)
+            account_deletion.updated = datetime.datetime.utcnow()
+            db.session.commit()
+
+    user = User.query.get(account_deletion.user_id)
+    if user is not None:
+        db.session.delete(user)
+    account_deletion.status = AccountDeletion.COMPLETED
+    db.session.commit()
+    count_cache.invalidate(CONFIRMED_USERS)
+
+
+def run_next_account_deletion(chunk_size):
+    """
+    Claim the oldest pending `AccountDeletion` job and run it.
+
+    Return the job, or `None` if there was no pending job.
+    """
+    _reclaim_stalled_account_deletions()
+
+    while True:
+        account_deletion = (
+            AccountDeletion.query.filter(
+                AccountDeletion.status == AccountDeletion.PENDING,
+                sa.or_(
+                    AccountDeletion.next_attempt_at.is_(None),
+                    AccountDeletion.next_attempt_at <= datetime.datetime.utcnow(),
+                ),
+            )
+            .order_by(AccountDeletion.created)
+            .first()
+        )
+        if account_deletion is None:
+            db.session.commit()
+            return None
+
+        # Claim the job
+        # (unless a concurrently-running worker has already claimed it).
+        n_claimed = db.session.execute(
+            sa.update(AccountDeletion)
+            .where(
+                AccountDeletion.id == account_deletion.id,
+                AccountDeletion.status == AccountDeletion.PENDING,
+            )
+            .values(
+                status=AccountDeletion.RUNNING,
+                updated=datetime.datetime.utcnow(),
+            ),
+            execution_options={"synchronize_session": False},
+        ).rowcount
+        db.session.commit()
+        if n_claimed == 1:
+            break
+
+    try:
+        run_account_deletion(account_deletion, chunk_size)
+    except Exception as e:
+        db.session.rollback()
+        _schedule_retry(account_deletion, e)
+        db.session.commit()
+
+    return account_deletion
+
+
+def _reclaim_stalled_account_deletions():
+    """
+    Treat every running `AccountDeletion` job,
+    which hasn't made any progress for `ACCOUNT_DELETION_RUNNING_TIMEOUT_SECONDS`,
+    as a failed attempt
+    (because the worker running it has most likely crashed or been killed),
+    so that the job is put back into the queue (or marked as failed).
+    """
+    timeout_in_seconds = current_app.config["ACCOUNT_DELETION_RUNNING_TIMEOUT_SECONDS"]
+    stalled_since = datetime.datetime.utcnow() - datetime.timedelta(
+        seconds=timeout_in_seconds
+    )
+
+    # (Locking the rows prevents concurrently-running workers
+    # from reclaiming the same job twice.)
+    for account_deletion in AccountDeletion.query.filter(
+        AccountDeletion.status == AccountDeletion.RUNNING,
+        AccountDeletion.updated < stalled_since,
+    ).with_for_update():
+        _schedule_retry(
+            account_deletion,
+            TimeoutError(f"made no progress for {timeout_in_seconds} seconds"),
+        )
+    db.session.commit()
+
+
+def _schedule_retry(account_deletion, error):
+    """
+    Put `account_deletion` back into the queue with an exponentially-growing delay
+    (since deleting in chunks is idempotent, a retry resumes where the job left off),
+    or mark it as failed once `ACCOUNT_DELETION_MAX_ATTEMPTS` attempts have failed.
+    """
+    account_deletion.attempts += 1
+    account_deletion.error = repr(error)
+
+    if account_deletion.attempts >= current_app.config["ACCOUNT_DELETION_MAX_ATTEMPTS"]:
+        account_deletion.status = AccountDeletion.FAILED
+        current_app.logger.error(
+            "giving up on running %r after %s attempts: %r",
+            account_deletion,
+            account_deletion.attempts,
+            error,
+        )
+        return
+
+    delay_in_seconds = current_app.config[
+        "ACCOUNT_DELETION_RETRY_BACKOFF_SECONDS"
+    ] * 2 ** (account_deletion.attempts - 1)
+    account_deletion.status = AccountDeletion.PENDING
+    account_deletion.next_attempt_at = datetime.datetime.utcnow() + datetime.timedelta(
+        seconds=delay_in_seconds
+    )
+    current_app.logger.warning(
+        "failed to run %r (attempt #%s), will retry in %s seconds: %r",
+        account_deletion,
+        account_deletion.attempts,
+        delay_in_seconds,
+        error,
+    )
+
+
+@click.command("account-deletion-worker")
+@click.option(
+    "--chunk-size",
+    type=int,
+    default=None,
+    help="How many rows to delete per transaction.",
+)
+@click.option(
+    "--once",
+    is_flag=True,
+    help="Exit as soon as there are no pending account deletions.",
+)
+@with_appcontext
+def account_deletion_worker_command(chunk_size, once):
+    """Run the pending account deletions."""
+    if chunk_size is None:
+        chunk_size = current_app.config["ACCOUNT_DELETION_CHUNK_SIZE"]
+    poll_interval_in_seconds = current_app.config[
+        "ACCOUNT_DELETION_POLL_INTERVAL_SECONDS"
+    ]
+
+    while True:
+        account_deletion = run_next_account_deletion(chunk_size)
+        if account_deletion is not None:
+            click.echo(f"{account_deletion!r}: {account_deletion.status}")
+            continue
+
+        if once:
+            return
+        time.sleep(poll_interval_in_seconds)
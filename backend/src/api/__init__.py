@@ -14,4 +14,4 @@ A: Without it,
    would register the `api_bp` blueprint with the application instance,
    but that blueprint will not be associated with any request-handling functions at all!
 '''
-from src.api import users, tokens, examples  # noqa
+from src.api import users, tokens, examples, admin  # noqa
@@ -0,0 +1,56 @@
+import os
+
+from flask import current_app, jsonify, send_from_directory
+
+from src import slow_query_recorder
+from src.auth import token_auth, administrator_required
+from src.api import api_bp
+
+
+@api_bp.route("/admin/slow-queries", methods=["GET"])
+@token_auth.login_required
+@administrator_required
+def get_slow_queries():
+    """
+    Return the slow SQL statements, which have been recorded
+    by the process that handles this request (the most recent one first).
+    """
+    records = slow_query_recorder.records()
+    return jsonify({"items": records, "_meta": {"total_items": len(records)}})
+
+
+@api_bp.route("/admin/slow-queries", methods=["DELETE"])
+@token_auth.login_required
+@administrator_required
+def delete_slow_queries():
+    slow_query_recorder.clear()
+    return "", 204
+
+
+@api_bp.route("/admin/profiles", methods=["GET"])
+@token_auth.login_required
+@administrator_required
+def get_profiles():
+    """
+    Return the names of the profiles, which have been written to `PROFILER_DIRECTORY`
+    (the most recently modified one first).
+    """
+    directory = current_app.config["PROFILER_DIRECTORY"]
+    if os.path.isdir(directory):
+        entries = [e for e in os.scandir(directory) if e.name.endswith(".prof")]
+    else:
+        entries = []
+    entries.sort(key=lambda e: e.stat().st_mtime, reverse=True)
+
+    items = [{"filename": e.name, "size": e.stat().st_size} for e in entries]
+    return jsonify({"items": items, "_meta": {"total_items": len(items)}})
+
+
+@api_bp.route("/admin/profiles/<filename>", methods=["GET"])
+@token_auth.login_required
+@administrator_required
+def get_profile(filename):
+    # (`send_from_directory` refuses to serve files from outside of the directory.)
+    return send_from_directory(
+        current_app.config["PROFILER_DIRECTORY"], filename, as_attachment=True
+    )
@@ -1,9 +1,38 @@
-from flask import request, jsonify, url_for, current_app
+import csv
+import datetime
+import hashlib
+import io
 
-from src import db
-from src.models import Example
-from src.auth import token_auth
+from flask import (
+    request,
+    jsonify,
+    url_for,
+    current_app,
+    stream_with_context,
+    make_response,
+)
+import sqlalchemy as sa
+
+from src import db, response_cache, count_cache
+from src.models import Example, User
+from src.auth import token_auth, token_auth_error
 from src.api import api_bp
+from src.search import apply_full_text_search
+
+
+# The maximal number of rows, which are inserted by a single INSERT statement.
+MAX_ROWS_PER_INSERT = 100
+# The fields of an `Example` resource, which a client can set.
+EXAMPLE_FIELDS = ("source_language", "new_word", "content", "content_translation")
+# The maximal number of values, which are placed within a single `IN (...)` clause.
+MAX_PARAMETERS_PER_IN_CLAUSE = 500
+# The number of rows, which an export fetches from the database at a time
+# (and which it sends to the client as a single chunk).
+ROWS_PER_EXPORT_CHUNK = 1000
+# The number of rows, which an import inserts (and commits) at a time.
+ROWS_PER_IMPORT_CHUNK = 1000
+# The maximal number of errors, which are reported in the response to an import.
+MAX_REPORTED_IMPORT_ERRORS = 100
 
 
 @api_bp.route("/examples", methods=["POST"])
@@ -22,27 +51,23 @@ def create_example():
         r.status_code = 400
         return r
 
+    message = _validate_example_data(request.json)
+    if message is not None:
+        r = jsonify(
+            {
+                "error": "Bad Request",
+                "message": message,
+            }
+        )
+        r.status_code = 400
+        return r
+
     source_language = request.json.get("source_language")
     new_word = request.json.get("new_word")
     content = request.json.get("content")
     content_translation = request.json.get("content_translation")
 
-    for field, value in (
-        ("new_word", new_word),
-        ("content", content),
-    ):
-        if value is None or value == "":
-            r = jsonify(
-                {
-                    "error": "Bad Request",
-                    "message": (
-                        f"Your request body did not specify a value for '{field}'"
-                    ),
-                }
-            )
-            r.status_code = 400
-            return r
-
+    _adjust_example_count(token_auth.current_user().id, 1)
     e = Example(
         user_id=token_auth.current_user().id,
         source_language=source_language,
@@ -52,6 +77,7 @@ def create_example():
     )
     db.session.add(e)
     db.session.commit()
+    _invalidate_caches(e.user_id)
 
     e_dict = e.to_dict()
     r = jsonify(e_dict)
@@ -60,21 +86,110 @@ def create_example():
     return r
 
 
+def _validate_example_data(example_data):
+    """
+    Return a message explaining why `example_data` cannot be used
+    to create an `Example` resource,
+    or `None` if it can be used for that purpose.
+    """
+    if not isinstance(example_data, dict):
+        return "Your request body did not specify a JSON object"
+
+    for field in ("new_word", "content"):
+        value = example_data.get(field)
+        if value is None or value == "":
+            return f"Your request body did not specify a value for '{field}'"
+
+    return _validate_example_values(example_data)
+
+
+def _validate_example_values(example_data):
+    """
+    Return a message explaining why one of the values within `example_data`
+    cannot be stored in an `Example` resource,
+    or `None` if each of those values can be stored (or is absent).
+    """
+    for field in EXAMPLE_FIELDS:
+        value = example_data.get(field)
+        if value is None:
+            continue
+
+        if not isinstance(value, str) or (
+            value == "" and field in ("new_word", "content")
+        ):
+            return f"The value for '{field}' must be a non-empty string"
+
+        max_length = Example.__table__.c[field].type.length
+        if max_length is not None and len(value) > max_length:
+            return (
+                f"The value for '{field}' must not be longer"
+                f" than {max_length} characters"
+            )
+
+    return None
+
+
 @api_bp.route("/examples", methods=["GET"])
 @token_auth.login_required
 def get_examples():
+    return response_cache.get_or_build(token_auth.current_user().id, _get_examples)
+
+
+def _get_examples():
     """
     If the client wants to specify:
     - how many resources it wants at a time,
       it can incorporate `per_page` into its request;
     - which page of the paginated query results it wants,
-      it can incorporate `page` into its request.
+      it can incorporate `page` into its request;
+    - a full-text search across
+      the `new_word`, `content` and `content_translation` fields,
+      it can incorporate `q` into its request
+      (in which case the results are ordered by relevance
+      instead of from newest to oldest);
+    - to page through the results by means of cursors
+      (which costs the same for every page, no matter how deep),
+      it can incorporate `after` into its request -
+      initially set to an empty value,
+      and subsequently set to the cursor within the `next` link of each response;
+    - to skip computing the total number of results,
+      it can set `include_total` to `false` in its request;
+    - only some of the fields of each resource,
+      it can incorporate `fields` (a comma-separated list of field names)
+      into its request
+      (in which case only the corresponding columns are loaded from the database,
+      and the `id` field is always included).
+
+    (The results are fetched as `Row`s of individual columns
+    rather than as `Example` instances, which are costlier to create.)
+
+    Each response carries an `ETag`,
+    which is derived from the number of the user's `Example`s
+    and from the most recent time at which any of them was updated;
+    if the client sends that `ETag` back within an `If-None-Match` header,
+    and none of the user's `Example`s has been created/edited/deleted since,
+    the response is a `304 Not Modified`, for which no query for a page is issued.
 
     Importantly, this function enforces that
     the "page size" (= the value of `per_page`) never be larger than 100,
     with the reason for this restriction being
     that we do not want to task the server too much.
     """
+    user_id = token_auth.current_user().id
+    example_count, max_updated = (
+        db.session.query(
+            User.example_count,
+            db.session.query(sa.func.max(Example.updated))
+            .filter(Example.user_id == user_id)
+            .scalar_subquery(),
+        )
+        .filter(User.id == user_id)
+        .one()
+    )
+    etag = _compute_etag_of_examples(user_id, example_count, max_updated)
+    if request.if_none_match.contains(etag):
+        return _not_modified(etag)
+
     examples_query = Example.query.filter_by(user_id=token_auth.current_user().id)
     query_param_kwargs = {}
     new_word = request.args.get("new_word")
@@ -96,26 +211,395 @@ def get_examples():
         )
         query_param_kwargs["content_translation"] = content_translation
 
-    examples_query = examples_query.order_by(Example.id.desc())
+    fields = None
+    if "fields" in request.args:
+        requested_fields = {
+            field.strip()
+            for field in request.args["fields"].split(",")
+            if field.strip()
+        }
+        unknown_fields = requested_fields.difference(Example.FIELDS)
+        if unknown_fields:
+            r = jsonify(
+                {
+                    "error": "Bad Request",
+                    "message": (
+                        "The 'fields' query parameter may only specify"
+                        f" any of {', '.join(Example.FIELDS)}"
+                        f" (but it specifies {', '.join(sorted(unknown_fields))})"
+                    ),
+                }
+            )
+            r.status_code = 400
+            return r
+
+        fields = tuple(
+            field
+            for field in Example.FIELDS
+            if field == "id" or field in requested_fields
+        )
+
+    after = request.args.get("after")
+    q = request.args.get("q")
+    if q and q.split():
+        if after is not None:
+            r = jsonify(
+                {
+                    "error": "Bad Request",
+                    "message": (
+                        "Your request may not combine"
+                        " the 'q' query parameter with the 'after' query parameter."
+                    ),
+                }
+            )
+            r.status_code = 400
+            return r
+
+        examples_query = apply_full_text_search(
+            examples_query,
+            db.engine.dialect.name,
+            q,
+        )
+        query_param_kwargs["q"] = q
+    else:
+        examples_query = examples_query.order_by(Example.id.desc())
+
+    examples_query = examples_query.with_entities(
+        *[getattr(Example, field) for field in (fields or Example.FIELDS)]
+    )
 
     per_page = min(
         100,
         request.args.get("per_page", default=10, type=int),
     )
-    page = request.args.get("page", default=1, type=int)
-    examples_collection = Example.to_collection_dict(
-        examples_query,
-        per_page,
-        page,
-        "api_blueprint.get_examples",
-        **query_param_kwargs,
+    include_total = request.args.get("include_total", default="true") != "false"
+    total_items = None
+    if include_total:
+        if query_param_kwargs:
+            # (The number of results depends only on the filters,
+            # so it is counted once for all pages of the results.)
+            total_items = count_cache.get_or_count(
+                user_id,
+                repr(sorted(query_param_kwargs.items())),
+                examples_query.order_by(None).count,
+            )
+        else:
+            total_items = example_count
+
+    if after is not None:
+        try:
+            examples_collection = Example.to_cursor_collection_dict(
+                examples_query,
+                Example.id,
+                True,
+                per_page,
+                after,
+                "api_blueprint.get_examples",
+                include_total=include_total,
+                total_items=total_items,
+                fields=fields,
+                **query_param_kwargs,
+            )
+        except ValueError:
+            r = jsonify(
+                {
+                    "error": "Bad Request",
+                    "message": "The provided value for 'after' is not a valid cursor.",
+                }
+            )
+            r.status_code = 400
+            return r
+    else:
+        page = request.args.get("page", default=1, type=int)
+        examples_collection = Example.to_collection_dict(
+            examples_query,
+            per_page,
+            page,
+            "api_blueprint.get_examples",
+            include_total=include_total,
+            total_items=total_items,
+            fields=fields,
+            **query_param_kwargs,
+        )
+
+    r = make_response(examples_collection)
+    r.set_etag(etag)
+    return r
+
+
+@api_bp.route("/examples/export", methods=["GET"])
+@token_auth.login_required
+def export_examples():
+    """
+    Export all of the authenticated `User`'s `Example` resources
+    (from oldest to newest)
+    in the format specified by the `format` query parameter,
+    which must be either `ndjson` (the default) or `csv`.
+
+    The response is streamed to the client
+    while the rows are being fetched from the database through a server-side cursor,
+    so the memory consumption of this function doesn't depend on
+    how many `Example` resources are being exported.
+    """
+    export_format = request.args.get("format", default="ndjson")
+    if export_format not in ("ndjson", "csv"):
+        r = jsonify(
+            {
+                "error": "Bad Request",
+                "message": "The 'format' query parameter must be 'ndjson' or 'csv'.",
+            }
+        )
+        r.status_code = 400
+        return r
+
+    columns = (
+        Example.id,
+        Example.source_language,
+        Example.new_word,
+        Example.content,
+        Example.content_translation,
+    )
+    rows = (
+        db.session.query(*columns)
+        .filter(Example.user_id == token_auth.current_user().id)
+        .order_by(Example.id)
+        .execution_options(stream_results=True)
+        .yield_per(ROWS_PER_EXPORT_CHUNK)
     )
-    return examples_collection
+
+    if export_format == "ndjson":
+        mimetype = "application/x-ndjson"
+        chunks = _generate_ndjson_chunks(rows)
+    else:
+        mimetype = "text/csv"
+        chunks = _generate_csv_chunks(rows, [column.key for column in columns])
+
+    r = current_app.response_class(stream_with_context(chunks), mimetype=mimetype)
+    r.headers[
+        "Content-Disposition"
+    ] = f'attachment; filename="vocab-treasury-examples.{export_format}"'
+    return r
+
+
+def _generate_ndjson_chunks(rows):
+    lines = []
+    for row in rows:
+        lines.append(current_app.json.dumps(row._asdict()) + "\n")
+        if len(lines) == ROWS_PER_EXPORT_CHUNK:
+            yield "".join(lines)
+            lines = []
+    if lines:
+        yield "".join(lines)
+
+
+def _generate_csv_chunks(rows, field_names):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    writer.writerow(field_names)
+    n_buffered_rows = 0
+    for row in rows:
+        writer.writerow(row)
+        n_buffered_rows += 1
+        if n_buffered_rows == ROWS_PER_EXPORT_CHUNK:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            n_buffered_rows = 0
+    yield buffer.getvalue()
+
+
+@api_bp.route("/examples/import", methods=["POST"])
+@token_auth.login_required
+def import_examples():
+    """
+    Create `Example` resources for the authenticated `User`
+    from the request body,
+    which must be either NDJSON (with a "Content-Type" of "application/x-ndjson")
+    or CSV with a header row (with a "Content-Type" of "text/csv").
+    Each line of NDJSON (or each record of CSV) is validated
+    in the same way as the request body of `create_example`.
+
+    The request body is parsed incrementally (instead of being loaded into memory),
+    and the valid rows are inserted and committed in chunks of fixed size.
+    Invalid rows are skipped and reported by their line number
+    in the response, which summarizes the progress of the import.
+    """
+    content_type = request.mimetype
+    if content_type not in ("application/x-ndjson", "text/csv"):
+        r = jsonify(
+            {
+                "error": "Bad Request",
+                "message": (
+                    'Your request must set the "Content-Type" header'
+                    ' to either "application/x-ndjson" or "text/csv".'
+                ),
+            }
+        )
+        r.status_code = 400
+        return r
+
+    if content_type == "application/x-ndjson":
+        parsed_lines = _parse_ndjson_lines(request.stream)
+    else:
+        text_stream = io.TextIOWrapper(request.stream, encoding="utf-8-sig", newline="")
+        parsed_lines = _parse_csv_records(text_stream)
+
+    user_id = token_auth.current_user().id
+    default_source_language = Example.__table__.c.source_language.default.arg
+
+    n_lines = 0
+    n_imported = 0
+    n_failed = 0
+    errors = []
+
+    def report_error(line_number, message):
+        nonlocal n_failed
+        n_failed += 1
+        if len(errors) < MAX_REPORTED_IMPORT_ERRORS:
+            errors.append({"line": line_number, "message": message})
+
+    rows = []
+    try:
+        for line_number, example_data, message in parsed_lines:
+            n_lines = line_number
+            if message is None:
+                message = _validate_example_data(example_data)
+            if message is not None:
+                report_error(line_number, message)
+                continue
+
+            source_language = example_data.get("source_language")
+            rows.append(
+                {
+                    "user_id": user_id,
+                    "source_language": (
+                        source_language if source_language else default_source_language
+                    ),
+                    "new_word": example_data.get("new_word"),
+                    "content": example_data.get("content"),
+                    "content_translation": (
+                        example_data.get("content_translation") or None
+                    ),
+                }
+            )
+            if len(rows) == ROWS_PER_IMPORT_CHUNK:
+                n_imported += _insert_imported_rows(rows)
+                rows = []
+                current_app.logger.info(
+                    "importing examples for user %s: %s lines processed",
+                    user_id,
+                    n_lines,
+                )
+    except UnicodeDecodeError:
+        report_error(n_lines + 1, "The remainder of your request body is not UTF-8")
+    except _ImportAborted as e:
+        report_error(e.line_number, e.message)
+
+    if rows:
+        n_imported += _insert_imported_rows(rows)
+
+    return {
+        "n_lines": n_lines,
+        "n_imported": n_imported,
+        "n_failed": n_failed,
+        "errors": errors,
+    }
+
+
+class _ImportAborted(Exception):
+    def __init__(self, line_number, message):
+        super().__init__(message)
+        self.line_number = line_number
+        self.message = message
+
+
+def _parse_ndjson_lines(byte_stream):
+    """
+    Yield a `(line_number, example_data, message)` triple for each non-blank line,
+    where `example_data` is the parsed JSON value
+    and `message` is `None` unless the line could not be parsed.
+
+    (Each line is decoded on its own,
+    so that a line that is not UTF-8 affects neither the preceding nor the following ones.)
+    """
+    for line_number, raw_line in enumerate(byte_stream, start=1):
+        try:
+            line = raw_line.decode("utf-8-sig" if line_number == 1 else "utf-8")
+        except UnicodeDecodeError:
+            yield line_number, None, "This line is not valid UTF-8"
+            continue
+        if not line.strip():
+            continue
+        try:
+            example_data = current_app.json.loads(line)
+        except ValueError:
+            yield line_number, None, "This line is not valid JSON"
+            continue
+        yield line_number, example_data, None
+
+
+def _parse_csv_records(text_stream):
+    """
+    Yield a `(line_number, example_data, message)` triple
+    for each non-blank CSV record (other than the header row),
+    where `line_number` is the line on which the record starts,
+    `example_data` is a dict mapping the header row to the record,
+    and `message` is `None` unless the record could not be parsed.
+    """
+    reader = csv.reader(text_stream)
+    try:
+        field_names = next(reader, [])
+    except csv.Error as e:
+        raise _ImportAborted(1, f"This line is not valid CSV: {e}")
+    for field in ("new_word", "content"):
+        if field not in field_names:
+            raise _ImportAborted(
+                1,
+                f"The header row did not specify a column for '{field}'",
+            )
+
+    while True:
+        line_number = reader.line_num + 1
+        try:
+            record = next(reader)
+        except StopIteration:
+            return
+        except csv.Error as e:
+            raise _ImportAborted(line_number, f"This line is not valid CSV: {e}")
+        if not record:
+            continue
+        if len(record) != len(field_names):
+            yield line_number, None, (
+                f"This record has {len(record)} fields"
+                f" instead of {len(field_names)}"
+            )
+            continue
+        yield line_number, dict(zip(field_names, record)), None
+
+
+def _insert_imported_rows(rows):
+    created = datetime.datetime.utcnow()
+    for row in rows:
+        row["created"] = created
+        row["updated"] = created
+    _adjust_example_count(rows[0]["user_id"], len(rows))
+    db.session.execute(Example.__table__.insert(), rows)
+    db.session.commit()
+    _invalidate_caches(rows[0]["user_id"])
+    return len(rows)
 
 
 @api_bp.route("/examples/<int:example_id>", methods=["GET"])
 @token_auth.login_required
 def get_example(example_id):
+    return response_cache.get_or_build(
+        token_auth.current_user().id,
+        lambda: _get_example(example_id),
+    )
+
+
+def _get_example(example_id):
     example = Example.query.get(example_id)
     if example is None or example.user_id != token_auth.current_user().id:
         r = jsonify(
@@ -129,12 +613,32 @@ def get_example(example_id):
         )
         r.status_code = 404
         return r
-    return example.to_dict()
+
+    etag = _compute_etag_of_example(example)
+    if request.if_none_match.contains(etag):
+        return _not_modified(etag)
+
+    r = make_response(example.to_dict())
+    r.set_etag(etag)
+    return r
 
 
 @api_bp.route("/examples/<int:example_id>", methods=["PUT"])
 @token_auth.login_required
 def edit_example(example_id):
+    """
+    If the client wants to make sure
+    that it doesn't overwrite any changes, which it hasn't seen,
+    it can send the `ETag` of the `Example` resource within an `If-Match` header;
+    if the `Example` resource has changed since that `ETag` was issued,
+    the response is a `412 Precondition Failed`.
+
+    The edit is applied by means of a single `UPDATE` statement,
+    which matches the `Example` only if it belongs to the current user
+    (and only if its version matches the `If-Match` header, if any);
+    only if that statement doesn't match,
+    the `Example` is looked up in order to tell a 404 from a 412.
+    """
     if request.headers["Content-Type"] != "application/json":
         r = jsonify(
             {
@@ -148,45 +652,102 @@ def edit_example(example_id):
         r.status_code = 400
         return r
 
-    example = Example.query.get(example_id)
-    if example is None or example.user_id != token_auth.current_user().id:
+    if not isinstance(request.json, dict):
+        message = "Your request body did not specify a JSON object"
+    else:
+        message = _validate_example_values(request.json)
+    if message is not None:
         r = jsonify(
             {
-                "error": "Not Found",
-                "message": (
-                    "Your User doesn't have an Example resource with an ID of "
-                    + str(example_id)
-                ),
+                "error": "Bad Request",
+                "message": message,
             }
         )
-        r.status_code = 404
+        r.status_code = 400
         return r
 
-    source_language = request.json.get("source_language")
-    new_word = request.json.get("new_word")
-    content = request.json.get("content")
-    content_translation = request.json.get("content_translation")
+    user_id = token_auth.current_user().id
+    criteria = [Example.id == example_id, Example.user_id == user_id]
+    if request.if_match and not request.if_match.star_tag:
+        criteria.append(
+            Example.version.in_(
+                _parse_versions_from_etags(example_id, request.if_match)
+            )
+        )
 
-    if source_language is not None:
-        example.source_language = source_language
-    if new_word is not None:
-        example.new_word = new_word
-    if content is not None:
-        example.content = content
-    if content_translation is not None:
-        example.content_translation = content_translation
+    values = {
+        field: request.json.get(field)
+        for field in EXAMPLE_FIELDS
+        if request.json.get(field) is not None
+    }
+    if values:
+        n_updated = db.session.execute(
+            sa.update(Example)
+            .where(*criteria)
+            .values(version=Example.version + 1, **values),
+            execution_options={"synchronize_session": False},
+        ).rowcount
+        db.session.commit()
+        if n_updated == 1:
+            _invalidate_caches(user_id)
+            example = Example.query.get(example_id)
+    else:
+        example = Example.query.filter(*criteria).one_or_none()
+        n_updated = 1 if example is not None else 0
 
-    db.session.add(example)
-    db.session.commit()
+    if n_updated == 0:
+        if (
+            db.session.query(Example.id)
+            .filter(Example.id == example_id, Example.user_id == user_id)
+            .first()
+            is None
+        ):
+            r = jsonify(
+                {
+                    "error": "Not Found",
+                    "message": (
+                        "Your User doesn't have an Example resource with an ID of "
+                        + str(example_id)
+                    ),
+                }
+            )
+            r.status_code = 404
+            return r
 
-    return example.to_dict()
+        r = jsonify(
+            {
+                "error": "Precondition Failed",
+                "message": (
+                    'Your request\'s "If-Match" header does not match'
+                    " the current ETag of the Example resource with an ID of "
+                    + str(example_id)
+                ),
+            }
+        )
+        r.status_code = 412
+        return r
+
+    r = make_response(example.to_dict())
+    r.set_etag(_compute_etag_of_example(example))
+    return r
 
 
 @api_bp.route("/examples/<int:example_id>", methods=["DELETE"])
 @token_auth.login_required
 def delete_example(example_id):
-    example = Example.query.get(example_id)
-    if example is None or example.user_id != token_auth.current_user().id:
+    user_id = token_auth.current_user().id
+    n_deleted = db.session.execute(
+        sa.delete(Example).where(
+            Example.id == example_id,
+            Example.user_id == user_id,
+        ),
+        # (Remove the `Example` from the session, in case it has been loaded,
+        # without querying the database.)
+        execution_options={"synchronize_session": "evaluate"},
+    ).rowcount
+    _adjust_example_count(user_id, -n_deleted)
+    db.session.commit()
+    if n_deleted == 0:
         r = jsonify(
             {
                 "error": "Not Found",
@@ -199,7 +760,433 @@ def delete_example(example_id):
         r.status_code = 404
         return r
 
-    db.session.delete(example)
-    db.session.commit()
+    _invalidate_caches(user_id)
 
     return "", 204
+
+
+@api_bp.route("/examples:batch", methods=["POST"])
+@token_auth.login_required
+def create_examples():
+    """
+    Create several `Example` resources at once.
+
+    The request body must be a JSON array,
+    each element of which is validated in the same way as by `create_example`.
+    All valid elements are inserted within a single transaction
+    (by means of multi-row INSERT statements);
+    the response contains one result per element, in the order of the elements.
+    """
+    r = _check_batch_request()
+    if r is not None:
+        return r
+
+    user_id = token_auth.current_user().id
+    default_source_language = Example.__table__.c.source_language.default.arg
+    created = datetime.datetime.utcnow()
+
+    results = [None] * len(request.json)
+    indices_of_rows = []
+    rows = []
+    for index, example_data in enumerate(request.json):
+        message = _validate_example_data(example_data)
+        if message is not None:
+            results[index] = {
+                "status": 400,
+                "error": "Bad Request",
+                "message": message,
+            }
+            continue
+
+        source_language = example_data.get("source_language")
+        indices_of_rows.append(index)
+        rows.append(
+            {
+                "created": created,
+                "updated": created,
+                "user_id": user_id,
+                "source_language": (
+                    source_language
+                    if source_language is not None
+                    else default_source_language
+                ),
+                "new_word": example_data.get("new_word"),
+                "content": example_data.get("content"),
+                "content_translation": example_data.get("content_translation"),
+            }
+        )
+
+    _adjust_example_count(user_id, len(rows))
+    example_ids = _insert_examples(user_id, rows)
+    db.session.commit()
+    _invalidate_caches(user_id)
+
+    for index, example_id, row in zip(indices_of_rows, example_ids, rows):
+        results[index] = {
+            "status": 201,
+            "example": {
+                "id": example_id,
+                "source_language": row["source_language"],
+                "new_word": row["new_word"],
+                "content": row["content"],
+                "content_translation": row["content_translation"],
+            },
+        }
+
+    return {"results": results}
+
+
+@api_bp.route("/examples:batch", methods=["PATCH"])
+@token_auth.login_required
+def edit_examples():
+    """
+    Edit several `Example` resources at once.
+
+    The request body must be a JSON array,
+    each element of which must specify the `id` of an `Example` resource
+    as well as the values to be changed (in the same way as for `edit_example`).
+    All edits are applied within a single transaction;
+    the response contains one result per element, in the order of the elements.
+    """
+    r = _check_batch_request()
+    if r is not None:
+        return r
+
+    user_id = token_auth.current_user().id
+
+    results = [None] * len(request.json)
+    for index, example_data in enumerate(request.json):
+        if (
+            not isinstance(example_data, dict)
+            or type(example_data.get("id")) is not int
+        ):
+            results[index] = {
+                "status": 400,
+                "error": "Bad Request",
+                "message": "Your request body did not specify a value for 'id'",
+            }
+            continue
+
+        message = _validate_example_values(example_data)
+        if message is not None:
+            results[index] = {
+                "status": 400,
+                "error": "Bad Request",
+                "message": message,
+            }
+
+    ids_of_own_examples = _select_ids_of_own_examples(
+        user_id,
+        [
+            example_data["id"]
+            for index, example_data in enumerate(request.json)
+            if results[index] is None
+        ],
+    )
+
+    # Group the edits by the set of fields that they change,
+    # so that each group can be applied by means of a single `executemany()`.
+    fields_2_parameter_sets = {}
+    for index, example_data in enumerate(request.json):
+        if results[index] is not None:
+            continue
+
+        if example_data["id"] not in ids_of_own_examples:
+            results[index] = _not_found_result(example_data["id"])
+            continue
+
+        fields = tuple(
+            field for field in EXAMPLE_FIELDS if example_data.get(field) is not None
+        )
+        if fields:
+            parameters = {field: example_data[field] for field in fields}
+            parameters["id_"] = example_data["id"]
+            fields_2_parameter_sets.setdefault(fields, []).append(parameters)
+
+    for fields, parameter_sets in fields_2_parameter_sets.items():
+        statement = (
+            Example.__table__.update()
+            .where(Example.id == sa.bindparam("id_"))
+            .values({field: sa.bindparam(field) for field in fields})
+            .values(version=Example.version + 1)
+        )
+        db.session.execute(statement, parameter_sets)
+    db.session.commit()
+    _invalidate_caches(user_id)
+
+    id_2_example = {
+        e.id: e
+        for e in _select_own_examples(
+            user_id,
+            [
+                example_data["id"]
+                for index, example_data in enumerate(request.json)
+                if results[index] is None
+            ],
+        )
+    }
+    for index, example_data in enumerate(request.json):
+        if results[index] is None:
+            results[index] = {
+                "status": 200,
+                "example": id_2_example[example_data["id"]].to_dict(),
+            }
+
+    return {"results": results}
+
+
+@api_bp.route("/examples:batch", methods=["DELETE"])
+@token_auth.login_required
+def delete_examples():
+    """
+    Delete several `Example` resources at once.
+
+    The request body must be a JSON array of `Example` IDs.
+    All deletions are carried out within a single transaction;
+    the response contains one result per ID, in the order of the IDs.
+    """
+    r = _check_batch_request()
+    if r is not None:
+        return r
+
+    user_id = token_auth.current_user().id
+
+    example_ids = [example_id for example_id in request.json if type(example_id) is int]
+    ids_of_own_examples = _select_ids_of_own_examples(user_id, example_ids)
+
+    n_deleted = 0
+    for chunk in _chunks(sorted(ids_of_own_examples), MAX_PARAMETERS_PER_IN_CLAUSE):
+        n_deleted += db.session.execute(
+            Example.__table__.delete().where(
+                Example.user_id == user_id,
+                Example.id.in_(chunk),
+            )
+        ).rowcount
+    _adjust_example_count(user_id, -n_deleted)
+    db.session.commit()
+    _invalidate_caches(user_id)
+
+    results = []
+    for example_id in request.json:
+        if type(example_id) is not int:
+            results.append(
+                {
+                    "status": 400,
+                    "error": "Bad Request",
+                    "message": "Each element of your request body must be an ID",
+                }
+            )
+        elif example_id in ids_of_own_examples:
+            results.append({"status": 204})
+        else:
+            results.append(_not_found_result(example_id))
+
+    return {"results": results}
+
+
+def _check_batch_request():
+    """
+    Return an error response if the current request is not a valid batch request,
+    or `None` if it is.
+    """
+    if request.headers.get("Content-Type") != "application/json":
+        r = jsonify(
+            {
+                "error": "Bad Request",
+                "message": (
+                    'Your request set the "Content-Type" header'
+                    ' to a value different from "application/json".'
+                ),
+            }
+        )
+        r.status_code = 400
+        return r
+
+    if not isinstance(request.json, list):
+        r = jsonify(
+            {
+                "error": "Bad Request",
+                "message": "Your request body must be a JSON array.",
+            }
+        )
+        r.status_code = 400
+        return r
+
+    max_items_per_batch = current_app.config["MAX_ITEMS_PER_BATCH"]
+    if len(request.json) > max_items_per_batch:
+        r = jsonify(
+            {
+                "error": "Request Entity Too Large",
+                "message": (
+                    "Your request body must not contain"
+                    f" more than {max_items_per_batch} elements."
+                ),
+            }
+        )
+        r.status_code = 413
+        return r
+
+    return None
+
+
+def _not_found_result(example_id):
+    return {
+        "status": 404,
+        "error": "Not Found",
+        "message": (
+            "Your User doesn't have an Example resource with an ID of "
+            + str(example_id)
+        ),
+    }
+
+
+def _compute_etag_of_example(example):
+    return f"{example.id}-{example.version}"
+
+
+def _parse_versions_from_etags(example_id, etags):
+    """
+    Return the versions of the specified `Example`,
+    which are identified by (the strong ones among) `etags`.
+    """
+    versions = []
+    for etag in etags.as_set():
+        id_, _, version = etag.partition("-")
+        if id_ == str(example_id) and version.isdigit():
+            versions.append(int(version))
+    return versions
+
+
+def _compute_etag_of_examples(user_id, example_count, max_updated):
+    """
+    Compute an `ETag` for the response to the current request,
+    which represents (a subset of) the `Example`s of the specified user.
+
+    Every change to those `Example`s changes either their number
+    or the most recent time at which any of them was updated,
+    so it suffices to take both of those into account
+    (the former of which is stored in `User.example_count`,
+    and the latter of which can be looked up in the `ix_example_user_id_updated` index).
+    """
+    # (The query parameters determine
+    # which `Example`s and which links the response contains;
+    # the same value is part of the key under which `response_cache` stores the response,
+    # so that a cached response and its `ETag` always belong together.)
+    return hashlib.sha1(
+        f"{user_id}:{example_count}:{max_updated}:{request.full_path}".encode("utf-8")
+    ).hexdigest()
+
+
+def _adjust_example_count(user_id, delta):
+    """
+    Adjust `User.example_count` by `delta`
+    within the current transaction
+    (i.e. atomically with the creation/deletion of `Example`s, which requires it).
+
+    (When `Example`s are created, this is to be called before inserting them,
+    so that the `User`'s row is locked
+    before any foreign-key check places a shared lock on it;
+    otherwise, concurrent insertions on behalf of the same `User` could deadlock.)
+    """
+    if delta:
+        db.session.execute(
+            sa.update(User)
+            .where(User.id == user_id)
+            .values(example_count=User.example_count + delta),
+            execution_options={"synchronize_session": False},
+        )
+
+
+def _invalidate_caches(user_id):
+    response_cache.invalidate(user_id)
+    count_cache.invalidate(user_id)
+
+
+@api_bp.errorhandler(sa.exc.IntegrityError)
+def _reject_deleted_user(e):
+    """
+    Respond with a 401 (instead of a 500),
+    if inserting an `Example` failed because the authenticated `User` has been deleted
+    - which a process can fail to notice while it authenticates access tokens
+    against a cached `token_version` (see `STATELESS_TOKEN_AUTH_ENABLED`).
+    """
+    db.session.rollback()
+    user = token_auth.current_user()
+    if user is None or User.query.filter_by(id=user.id).count() > 0:
+        raise e
+    return token_auth_error()
+
+
+def _not_modified(etag):
+    r = current_app.response_class(status=304)
+    r.set_etag(etag)
+    return r
+
+
+def _chunks(sequence, size):
+    for i in range(0, len(sequence), size):
+        yield sequence[i : i + size]
+
+
+def _insert_examples(user_id, rows):
+    """
+    Insert `rows`, all of which belong to the `User` with `user_id`,
+    into the `example` table by means of multi-row INSERT statements,
+    and return the IDs that were assigned to the inserted rows (in the same order).
+
+    (This is to be called after `_adjust_example_count`,
+    which locks the `User`'s row until the end of the transaction.)
+    """
+    if not rows:
+        return []
+
+    # The IDs cannot be derived from `lastrowid`,
+    # because the rows, which are inserted by a single statement,
+    # need not be assigned consecutive IDs
+    # (e.g. if `auto_increment_increment` is greater than 1).
+    # Instead, the inserted rows are selected again:
+    # no other transaction can insert `Example`s of the same `User` concurrently,
+    # so they are the `User`'s rows whose IDs exceed the greatest ID before the insertion
+    # (and, within each statement as well as across statements, IDs are increasing).
+    max_id_before = (
+        db.session.query(sa.func.max(Example.id))
+        .filter(Example.user_id == user_id)
+        .scalar()
+    )
+    for chunk in _chunks(rows, MAX_ROWS_PER_INSERT):
+        db.session.execute(Example.__table__.insert().values(chunk))
+
+    query = db.session.query(Example.id).filter(Example.user_id == user_id)
+    if max_id_before is not None:
+        query = query.filter(Example.id > max_id_before)
+    example_ids = [example_id for (example_id,) in query.order_by(Example.id)]
+    if len(example_ids) != len(rows):
+        raise RuntimeError(
+            f"inserted {len(rows)} rows, but found {len(example_ids)} new IDs"
+        )
+    return example_ids
+
+
+def _select_ids_of_own_examples(user_id, example_ids):
+    ids_of_own_examples = set()
+    for chunk in _chunks(sorted(set(example_ids)), MAX_PARAMETERS_PER_IN_CLAUSE):
+        ids_of_own_examples.update(
+            example_id
+            for (example_id,) in db.session.query(Example.id).filter(
+                Example.user_id == user_id,
+                Example.id.in_(chunk),
+            )
+        )
+    return ids_of_own_examples
+
+
+def _select_own_examples(user_id, example_ids):
+    examples = []
+    for chunk in _chunks(sorted(set(example_ids)), MAX_PARAMETERS_PER_IN_CLAUSE):
+        examples.extend(
+            Example.query.filter(
+                Example.user_id == user_id,
+                Example.id.in_(chunk),
+            )
+        )
+    return examples
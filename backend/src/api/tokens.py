@@ -14,10 +14,15 @@ def issue_token():
     expiration_timestamp_for_token = dt.datetime.utcnow() + dt.timedelta(
         minutes=current_app.config["MINUTES_FOR_TOKEN_VALIDITY"]
     )
+    user = basic_auth.current_user()
     token_dict = {
         "exp": expiration_timestamp_for_token,
         "purpose": ACCESS,
-        "user_id": basic_auth.current_user().id,
+        "user_id": user.id,
+        # The next two claims make it possible to authenticate requests
+        # without loading the `User` from the database (see `src/auth.py`).
+        "username": user.username,
+        "token_version": user.token_version,
     }
     token = jwt.encode(
         token_dict,
@@ -1,20 +1,17 @@
-import threading
-
 from flask import request, jsonify, url_for, current_app
-from flask_mail import Message
-
-import sqlalchemy
 
 import datetime as dt
 import jwt
 
 import os
 
-from src import db, flsk_bcrpt, mail
-from src.models import User, EmailAddressChange
+from src import db, flsk_bcrpt, count_cache
+from src.models import User, EmailAddressChange, AccountDeletion
 from src.auth import basic_auth, token_auth, validate_token
 from src.api import api_bp
-from src.constants import EMAIL_ADDRESS_CONFIRMATION, PASSWORD_RESET
+from src.constants import EMAIL_ADDRESS_CONFIRMATION, PASSWORD_RESET, CONFIRMED_USERS
+from src.outbox import enqueue_email
+from src.account_deletion import schedule_account_deletion
 
 
 @api_bp.route("/users", methods=["POST"])
@@ -86,9 +83,12 @@ def create_user():
         is_confirmed=False,
     )
     db.session.add(user)
-    db.session.commit()
+    # Assign an ID to `user` (which is needed for composing the email message),
+    # so that the message can be committed to the outbox together with `user`.
+    db.session.flush()
 
     send_email_requesting_that_email_address_should_be_confirmed(user)
+    db.session.commit()
 
     u_dict = user.to_dict()
     r = jsonify(u_dict)
@@ -175,6 +175,7 @@ def confirm_email_address(token):
             EmailAddressChange.id != most_recent_e_a_c.id
         ).delete()
     db.session.commit()
+    count_cache.invalidate(CONFIRMED_USERS)
 
     r = jsonify(
         {
@@ -195,7 +196,14 @@ def get_users():
     - how many resources it wants at a time,
       it can incorporate `per_page` into its request;
     - which page of the paginated query results it wants,
-      it can incorporate `page` into its request.
+      it can incorporate `page` into its request;
+    - to page through the results by means of cursors
+      (which costs the same for every page, no matter how deep),
+      it can incorporate `after` into its request -
+      initially set to an empty value,
+      and subsequently set to the cursor within the `next` link of each response;
+    - to skip computing the total number of results,
+      it can set `include_total` to `false` in its request.
 
     Importantly, this function enforces that
     the "page size" (= the value of `per_page`) never be larger than 100,
@@ -207,12 +215,54 @@ def get_users():
         request.args.get("per_page", 10, type=int),
         100,
     )
+    include_total = request.args.get("include_total", "true") != "false"
+
+    # (Select only the columns, which `User.to_dict` exports,
+    # so that no `User` instances have to be created.)
+    users_query = User.query.filter_by(is_confirmed=True).with_entities(
+        User.id,
+        User.username,
+    )
+    total_items = None
+    if include_total:
+        total_items = count_cache.get_or_count(
+            CONFIRMED_USERS,
+            "",
+            users_query.order_by(None).count,
+        )
+
+    after = request.args.get("after")
+    if after is not None:
+        try:
+            users_collection = User.to_cursor_collection_dict(
+                users_query,
+                User.id,
+                False,
+                per_page,
+                after,
+                "api_blueprint.get_users",
+                include_total=include_total,
+                total_items=total_items,
+            )
+        except ValueError:
+            r = jsonify(
+                {
+                    "error": "Bad Request",
+                    "message": "The provided value for 'after' is not a valid cursor.",
+                }
+            )
+            r.status_code = 400
+            return r
+        return users_collection
+
     page = request.args.get("page", 1, type=int)
     users_collection = User.to_collection_dict(
-        User.query.filter_by(is_confirmed=True),
+        users_query,
         per_page,
         page,
         "api_blueprint.get_users",
+        include_total=include_total,
+        total_items=total_items,
     )
     return users_collection
 
@@ -233,15 +283,47 @@ def get_user(user_id):
         r.status_code = 404
         return r
 
-    return u.to_dict()
+    etag = _compute_etag_of_user(u)
+    if request.if_none_match.contains(etag):
+        return _not_modified(etag)
+
+    r = jsonify(u.to_dict())
+    r.set_etag(etag)
+    return r
 
 
 @api_bp.route("/user-profile", methods=["GET"])
 @token_auth.login_required
 def get_user_profile():
-    u = User.query.get(token_auth.current_user().id)
-    r = u.to_dict()
-    r["email"] = u.email
+    u = token_auth.current_user()
+    if not isinstance(u, User):
+        # (A `TokenPrincipal` lacks the email address.)
+        u = User.query.get(u.id)
+
+    etag = _compute_etag_of_user(u)
+    if request.if_none_match.contains(etag):
+        return _not_modified(etag)
+
+    user_profile = u.to_dict()
+    user_profile["email"] = u.email
+    r = jsonify(user_profile)
+    r.set_etag(etag)
+    return r
+
+
+def _compute_etag_of_user(user):
+    """
+    Compute an `ETag` for the representations of `user`
+    (i.e. for the User resource and for the user profile)
+    from `User.version`, which changes whenever those representations do,
+    so that a conditional request can be answered without serializing anything.
+    """
+    return f"{user.id}-{user.version}"
+
+
+def _not_modified(etag):
+    r = current_app.response_class(status=304)
+    r.set_etag(etag)
     return r
 
 
@@ -326,12 +408,13 @@ def _initiate_change_of_email_address(user, new_email_address):
         new=new_email_address,
     )
     db.session.add(e_a_c)
-    db.session.commit()
+    db.session.flush()
 
     send_email_requesting_that_change_of_email_address_should_be_confirmed(
         user,
         e_a_c,
     )
+    db.session.commit()
 
     r = jsonify(
         {
@@ -389,27 +472,52 @@ def delete_user(user_id):
         r.status_code = 403
         return r
 
-    u = User.query.get(user_id)
-    db.session.delete(u)
-    try:
+    u = basic_auth.current_user()
+    if u.example_count <= current_app.config["ACCOUNT_DELETION_SYNC_MAX_EXAMPLES"]:
+        # The database deletes the associated resources by means of `ON DELETE CASCADE`.
+        db.session.delete(u)
         db.session.commit()
-    except sqlalchemy.exc.IntegrityError:
-        db.session.rollback()
+        count_cache.invalidate(CONFIRMED_USERS)
+        return "", 204
+
+    # Deleting this many resources would keep the request waiting for too long,
+    # so it is left to the `flask account-deletion-worker` command.
+    account_deletion = schedule_account_deletion(u)
+    db.session.commit()
+
+    r = jsonify(account_deletion.to_dict())
+    r.status_code = 202
+    r.headers["Location"] = url_for(
+        "api_blueprint.get_account_deletion",
+        account_deletion_id=account_deletion.id,
+    )
+    return r
+
+
+@api_bp.route("/account-deletions/<account_deletion_id>", methods=["GET"])
+def get_account_deletion(account_deletion_id):
+    """
+    Return the status of an `AccountDeletion` job.
 
+    This requires no authentication, because the `User` who requested the deletion
+    cannot authenticate anymore (their credentials stop working as the job is created);
+    instead, the job's random 128-bit ID serves as the credential,
+    and the response reveals neither the `User` nor the job's error.
+    """
+    account_deletion = AccountDeletion.query.get(account_deletion_id)
+    if account_deletion is None:
         r = jsonify(
             {
-                "error": "Bad Request",
+                "error": "Not Found",
                 "message": (
-                    "Your User resource cannot be deleted at this time,"
-                    " because there exists at least one resource"
-                    " that is associated with your User resource."
+                    "There doesn't exist an AccountDeletion resource with an ID of "
+                    + account_deletion_id
                 ),
             }
         )
-        r.status_code = 400
+        r.status_code = 404
         return r
-
-    return "", 204
+    return account_deletion.to_dict()
 
 
 @api_bp.route("/request-password-reset", methods=["POST"])
@@ -464,6 +572,7 @@ def request_password_reset():
         return r
 
     send_password_reset_email(user)
+    db.session.commit()
 
     r = jsonify(
         {
@@ -669,19 +778,13 @@ the email address associated with your VocabTreasury account will remain unchang
 
 
 def send_email(sender, recipients, subject, body):
-    msg = Message(subject, sender=sender, recipients=recipients)
-    msg.body = body
-
-    t = threading.Thread(
-        target=send_async_email,
-        args=(current_app._get_current_object(), msg),
-    )
-    t.start()
-
+    """
+    Put an email message into the outbox,
+    from which the `flask mail-worker` command is going to send it.
 
-def send_async_email(app, msg):
-    with app.app_context():
-        mail.send(msg)
+    (The caller is responsible for committing the current database session.)
+    """
+    enqueue_email(sender, recipients, subject, body)
 
 
 @api_bp.route("/reset-password/<token>", methods=["POST"])
@@ -1,10 +1,24 @@
-from flask import jsonify, current_app, g
+import dataclasses
+import functools
+import hashlib
+import hmac
+
+from flask import jsonify, current_app, g, has_app_context
 from flask_httpauth import HTTPBasicAuth, HTTPTokenAuth
+from sqlalchemy import event
+from sqlalchemy.orm import object_session
 import jwt
 
-from src import flsk_bcrpt
+from src import (
+    db,
+    flsk_bcrpt,
+    verified_credentials_cache,
+    token_versions_cache,
+    request_metrics,
+)
 from src.models import User
 from src.constants import EMAIL_ADDRESS_CONFIRMATION, ACCESS, PASSWORD_RESET
+from src.server_timing import timed
 
 
 basic_auth = HTTPBasicAuth()
@@ -12,12 +26,17 @@ basic_auth = HTTPBasicAuth()
 
 @basic_auth.verify_password
 def verify_password(email, password):
-    user = User.query.filter_by(email=email).first()
+    with timed("user"):
+        user = User.query.filter_by(email=email).first()
 
     if user is None:
+        request_metrics.record_auth_attempt(
+            "basic", "unknown_user" if email else "missing"
+        )
         return None
 
     if not user.is_confirmed:
+        request_metrics.record_auth_attempt("basic", "unconfirmed")
         r = jsonify(
             {
                 "error": "Bad Request",
@@ -32,12 +51,104 @@ def verify_password(email, password):
         g.response_for_unconfirmed_email_address = r
         return None
 
-    if flsk_bcrpt.check_password_hash(user.password_hash, password) is False:
+    cache = verified_credentials_cache.backend
+    if cache is not None:
+        credentials_digest = _compute_credentials_digest(
+            email, password, user.password_hash
+        )
+        cached_digest = cache.get(user.id)
+        if cached_digest is not None and hmac.compare_digest(
+            cached_digest, credentials_digest
+        ):
+            request_metrics.record_auth_attempt("basic", "success")
+            return user
+
+    with timed("bcrypt"):
+        is_password_correct = flsk_bcrpt.check_password_hash(
+            user.password_hash, password
+        )
+    if is_password_correct is False:
+        request_metrics.record_auth_attempt("basic", "wrong_password")
         return None
 
+    if cache is not None:
+        cache.set(user.id, credentials_digest)
+
+    request_metrics.record_auth_attempt("basic", "success")
     return user
 
 
+def _compute_credentials_digest(email, password, password_hash):
+    """
+    Compute an HMAC of the provided credentials
+    (which is what gets cached instead of the credentials themselves).
+
+    Since the digest also covers `password_hash`,
+    a cached digest stops matching as soon as the user's password changes.
+    """
+    if isinstance(password_hash, str):
+        password_hash = password_hash.encode("utf-8")
+    message = b"\x00".join(
+        (email.encode("utf-8"), password.encode("utf-8"), password_hash)
+    )
+    return hmac.new(
+        current_app.config["SECRET_KEY"].encode("utf-8"),
+        message,
+        hashlib.sha256,
+    ).hexdigest()
+
+
+@event.listens_for(User.password_hash, "set")
+def revoke_credentials(target, value, oldvalue, initiator):
+    """
+    As soon as a user's password changes,
+    revoke all access tokens that have been issued to the user
+    (and evict the user's cached credentials once that change has been committed).
+    """
+    if target.id is None:
+        return
+
+    target.token_version = (target.token_version or 0) + 1
+
+    _forget_cached_credentials_after_commit(target)
+
+
+@event.listens_for(User, "after_delete")
+def forget_deleted_user(mapper, connection, target):
+    _forget_cached_credentials_after_commit(target)
+
+
+def _forget_cached_credentials_after_commit(user):
+    """
+    Evict the cached credentials of `user` once the current transaction commits.
+
+    (Evicting them any earlier would allow a concurrent request,
+    which still reads the previously committed row,
+    to put the outdated credentials back into the cache.)
+    """
+    session = object_session(user) or db.session()
+    session.info.setdefault("user_ids_to_forget", set()).add(user.id)
+
+
+@event.listens_for(db.session, "after_commit")
+def forget_cached_credentials_of_committed_users(session):
+    user_ids = session.info.pop("user_ids_to_forget", None)
+    if user_ids and has_app_context():
+        for user_id in user_ids:
+            _forget_cached_credentials(user_id)
+
+
+@event.listens_for(db.session, "after_soft_rollback")
+def keep_cached_credentials_of_rolled_back_users(session, previous_transaction):
+    session.info.pop("user_ids_to_forget", None)
+
+
+def _forget_cached_credentials(user_id):
+    for cache in (verified_credentials_cache.backend, token_versions_cache.backend):
+        if cache is not None:
+            cache.delete(user_id)
+
+
 @basic_auth.error_handler
 def basic_auth_error():
     """Return an appropriate error to the client."""
@@ -106,23 +217,42 @@ def basic_auth_error():
 token_auth = HTTPTokenAuth()
 
 
+@dataclasses.dataclass(frozen=True)
+class TokenPrincipal:
+    """
+    A lightweight stand-in for a `User`,
+    which is built solely from the claims within an access token.
+
+    (Request-handling functions that only need to know who the authenticated user is
+    can use an instance of this class as if it were the authenticated `User`.)
+    """
+
+    id: int
+    username: str
+    token_version: int
+
+
 @token_auth.verify_token
 def verify_token(token):
     try:
-        token_payload = jwt.decode(
-            token,
-            current_app.config["SECRET_KEY"],
-            algorithms=["HS256"],
-            options={
-                "require": ["exp"],
-            },
-        )
+        with timed("jwt"):
+            token_payload = jwt.decode(
+                token,
+                current_app.config["SECRET_KEY"],
+                algorithms=["HS256"],
+                options={
+                    "require": ["exp"],
+                },
+            )
     except jwt.ExpiredSignatureError:
+        request_metrics.record_auth_attempt("bearer", "expired")
         return None  # valid token, but expired
     except jwt.DecodeError:
+        request_metrics.record_auth_attempt("bearer", "invalid" if token else "missing")
         return None  # invalid token
 
     if token_payload["purpose"] != ACCESS:
+        request_metrics.record_auth_attempt("bearer", "wrong_purpose")
         r = jsonify(
             {
                 "error": "Bad Request",
@@ -136,13 +266,56 @@ def verify_token(token):
         g.response_for_inadmissible_token_purpose = r
         return None
 
-    user = User.query.get(token_payload["user_id"])
+    if (
+        current_app.config["STATELESS_TOKEN_AUTH_ENABLED"]
+        and "token_version" in token_payload
+    ):
+        with timed("user"):
+            token_version = _get_current_token_version(token_payload["user_id"])
+        if token_version != token_payload["token_version"]:
+            request_metrics.record_auth_attempt("bearer", "revoked")
+            return None  # the user has been deleted, or the token has been revoked
+
+        request_metrics.record_auth_attempt("bearer", "success")
+        return TokenPrincipal(
+            token_payload["user_id"],
+            token_payload["username"],
+            token_payload["token_version"],
+        )
+
+    with timed("user"):
+        user = User.query.get(token_payload["user_id"])
     if user is None:
+        request_metrics.record_auth_attempt("bearer", "revoked")
         return None
 
+    if token_payload.get("token_version", user.token_version) != user.token_version:
+        request_metrics.record_auth_attempt("bearer", "revoked")
+        return None  # the token has been revoked
+
+    request_metrics.record_auth_attempt("bearer", "success")
     return user
 
 
+def _get_current_token_version(user_id):
+    """
+    Return the current `token_version` of the specified user,
+    or `None` if that user doesn't exist.
+    """
+    cache = token_versions_cache.backend
+    if cache is not None:
+        token_version = cache.get(user_id)
+        if token_version is not None:
+            return token_version
+
+    token_version = db.session.query(User.token_version).filter_by(id=user_id).scalar()
+
+    if cache is not None and token_version is not None:
+        cache.set(user_id, token_version)
+
+    return token_version
+
+
 @token_auth.error_handler
 def token_auth_error():
     """Return an appropriate error to the client."""
@@ -159,6 +332,70 @@ def token_auth_error():
     return r
 
 
+def is_administrator(user):
+    """
+    Return whether `user` (either a `User` or a `TokenPrincipal`) is an administrator,
+    i.e. whether their email address is listed in `ADMINISTRATOR_EMAIL_ADDRESSES`.
+    """
+    administrator_email_addresses = current_app.config["ADMINISTRATOR_EMAIL_ADDRESSES"]
+    if not administrator_email_addresses:
+        return False
+
+    email = getattr(user, "email", None)
+    if email is None:
+        # (A `TokenPrincipal` lacks the email address.)
+        email = db.session.query(User.email).filter_by(id=user.id).scalar()
+    return email in administrator_email_addresses
+
+
+def administrator_required(f):
+    """
+    Restrict the decorated request-handling function to administrators.
+
+    (This decorator has to be applied below `@token_auth.login_required`.)
+    """
+
+    @functools.wraps(f)
+    def decorated_function(*args, **kwargs):
+        if not is_administrator(token_auth.current_user()):
+            r = jsonify(
+                {
+                    "error": "Forbidden",
+                    "message": "Your request requires administrator privileges.",
+                }
+            )
+            r.status_code = 403
+            return r
+
+        return f(*args, **kwargs)
+
+    return decorated_function
+
+
+def verify_administrator_token(token):
+    """
+    Return the administrator, to whom the access token `token` has been issued,
+    or `None` if `token` is not a valid (and unrevoked) access token of an administrator.
+
+    (Unlike `verify_token`, this function doesn't count as an authentication attempt,
+    because it is used to authorize actions that go alongside a request,
+    such as profiling it, rather than the request itself.)
+    """
+    reject_token, payload_or_response = validate_token(token)
+    if reject_token or payload_or_response.get("purpose") != ACCESS:
+        return None
+
+    user = User.query.get(payload_or_response["user_id"])
+    if (
+        user is None
+        or payload_or_response.get("token_version", user.token_version)
+        != user.token_version
+        or not is_administrator(user)
+    ):
+        return None
+    return user
+
+
 def validate_token(token):
     """
     `token` is a JSON Web (Signature) Token.
@@ -0,0 +1,220 @@
+import collections
+import threading
+import time
+import uuid
+
+from flask import current_app, make_response, request
+from werkzeug.utils import import_string
+
+
+class CacheBackend:
+    """
+    The interface, which each storage backend of a `Cache` implements.
+
+    Keys are strings, and values are picklable
+    (so that a backend may store them outside of the process,
+    as e.g. a Redis-backed implementation would).
+    A backend may evict any entry at any time.
+    """
+
+    def __init__(self, max_size, ttl_seconds):
+        raise NotImplementedError
+
+    def get(self, key, default=None):
+        raise NotImplementedError
+
+    def set(self, key, value):
+        raise NotImplementedError
+
+    def delete(self, key):
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+
+class LRUCache(CacheBackend):
+    """
+    A thread-safe in-process cache,
+    which holds at most `max_size` entries
+    and lets each entry expire `ttl_seconds` after it was stored.
+
+    When the cache is full, storing a new entry evicts the least recently used one.
+    """
+
+    def __init__(self, max_size, ttl_seconds):
+        self._max_size = max_size
+        self._ttl_seconds = ttl_seconds
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return default
+
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self._ttl_seconds)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_size:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+
+class Cache:
+    """
+    A Flask extension, which equips each application instance with a `CacheBackend`.
+
+    The cache is controlled by the following configuration values,
+    whose names begin with the `config_prefix` that is passed to the constructor:
+    - `<config_prefix>_ENABLED`,
+    - `<config_prefix>_MAX_SIZE`,
+    - `<config_prefix>_TTL_SECONDS`,
+    - `<config_prefix>_BACKEND` (optional),
+      which is the import path of a `CacheBackend` implementation
+      (and which defaults to the in-process `LRUCache`).
+    """
+
+    def __init__(self, config_prefix):
+        self._config_prefix = config_prefix
+        self._extension_name = config_prefix.lower()
+
+    def init_app(self, app):
+        backend_class = app.config.get(f"{self._config_prefix}_BACKEND")
+        if backend_class is None:
+            backend_class = LRUCache
+        elif isinstance(backend_class, str):
+            backend_class = import_string(backend_class)
+
+        app.extensions[self._extension_name] = backend_class(
+            app.config[f"{self._config_prefix}_MAX_SIZE"],
+            app.config[f"{self._config_prefix}_TTL_SECONDS"],
+        )
+
+    @property
+    def backend(self):
+        """
+        Return the current application's cache,
+        or `None` if the current application has the cache disabled.
+        """
+        if not current_app.config[f"{self._config_prefix}_ENABLED"]:
+            return None
+        return current_app.extensions[self._extension_name]
+
+
+class GenerationalCache(Cache):
+    """
+    A `Cache`, whose entries are grouped into scopes (such as one scope per user).
+
+    Each scope's entries are keyed by a "generation",
+    which changes whenever `invalidate` is called for that scope;
+    so, as long as `invalidate` is called after every change to the scope's data,
+    an entry that was computed before the change is never served after it.
+
+    (The generations live in the same `CacheBackend` as the entries,
+    which means that, with the in-process `LRUCache`,
+    the guarantee holds only within a single process.)
+    """
+
+    def invalidate(self, scope):
+        """Stop serving any of the entries, which are cached within `scope`."""
+        backend = self.backend
+        if backend is not None:
+            backend.set(f"generation:{scope}", uuid.uuid4().hex)
+
+    @staticmethod
+    def _get_generation(backend, scope):
+        generation = backend.get(f"generation:{scope}")
+        if generation is None:
+            # (If a generation has been evicted, replacing it with a fresh one
+            # makes sure that no entry cached under an older one is served.)
+            generation = uuid.uuid4().hex
+            backend.set(f"generation:{scope}", generation)
+        return generation
+
+
+class ResponseCache(GenerationalCache):
+    """
+    A `GenerationalCache` of (successful) responses to the requests
+    that each user issues, with one scope per user.
+    """
+
+    def get_or_build(self, user_id, build_response):
+        """
+        Return the cached response to the current request issued by `user_id`,
+        or call `build_response` and cache the response that it returns.
+
+        (A cached response keeps its `ETag`,
+        and is turned into a `304 Not Modified` if the request's `If-None-Match`
+        header matches that `ETag`.)
+        """
+        backend = self.backend
+        if backend is None:
+            return build_response()
+
+        # (The generation is looked up before the response is built,
+        # so that a response, which is built concurrently with a change,
+        # ends up being cached under the generation that preceded the change.)
+        generation = self._get_generation(backend, user_id)
+        key = f"response:{user_id}:{generation}:{request.full_path}"
+
+        cached = backend.get(key)
+        if cached is not None:
+            body, mimetype, etag = cached
+            r = current_app.response_class(body, mimetype=mimetype)
+            if etag is not None:
+                r.set_etag(etag)
+            return r.make_conditional(request)
+
+        r = make_response(build_response())
+        if r.status_code == 200 and not r.is_streamed:
+            etag, _ = r.get_etag()
+            backend.set(key, (r.get_data(), r.mimetype, etag))
+        return r
+
+
+class CountCache(GenerationalCache):
+    """
+    A `GenerationalCache` of the numbers of rows, which match given filters
+    (e.g. the number of a user's `Example`s that match a search,
+    which would otherwise be counted anew for every page of the results).
+    """
+
+    def get_or_count(self, scope, key, count):
+        """
+        Return the number, which is cached for `key` within `scope`,
+        or call `count` and cache the number that it returns.
+        """
+        backend = self.backend
+        if backend is None:
+            return count()
+
+        generation = self._get_generation(backend, scope)
+        cache_key = f"count:{scope}:{generation}:{key}"
+
+        n = backend.get(cache_key)
+        if n is None:
+            n = count()
+            backend.set(cache_key, n)
+        return n
@@ -3,3 +3,6 @@
 EMAIL_ADDRESS_CONFIRMATION = "to confirm email address"
 ACCESS = "to access account's resources"
 PASSWORD_RESET = "to reset account's password"
+
+# The scope within `src.count_cache`, which holds the number of confirmed users.
+CONFIRMED_USERS = "confirmed users"
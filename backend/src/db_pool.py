@@ -0,0 +1,184 @@
+"""
+An instrumented pool of database connections,
+and a function that opens connections ahead of the first requests.
+"""
+
+import collections
+import threading
+import time
+
+from flask import current_app
+import flask_sqlalchemy
+from sqlalchemy import event, exc
+from sqlalchemy.pool import QueuePool
+
+from src.instrumentation import (
+    DB_POOL_CHECKOUT_WAIT,
+    DB_POOL_EXHAUSTED,
+    DB_POOL_INVALIDATIONS,
+    DB_POOL_TIMEOUTS,
+)
+
+
+class SQLAlchemy(flask_sqlalchemy.SQLAlchemy):
+    """
+    A `flask_sqlalchemy.SQLAlchemy` extension,
+    whose engines pool their connections in an `InstrumentedQueuePool`
+    (unless the database driver calls for a different kind of pool,
+    as is the case for SQLite).
+    """
+
+    def apply_driver_hacks(self, app, sa_url, options):
+        sa_url, options = super().apply_driver_hacks(app, sa_url, options)
+        if "poolclass" not in options and not sa_url.drivername.startswith("sqlite"):
+            options["poolclass"] = InstrumentedQueuePool
+        return sa_url, options
+
+
+class InstrumentedQueuePool(QueuePool):
+    """
+    A `QueuePool`, which keeps track of
+    how long each checkout has to wait for a connection
+    (including the time it takes to open a new connection, if one is needed),
+    how many checkouts find every connection checked out
+    (i.e. find the pool exhausted, including its overflow),
+    how many of those time out,
+    and how many connections are opened and invalidated
+    (e.g. because `pool_pre_ping` found them to be stale).
+
+    (The same metrics of all pools in all processes,
+    other than the number of opened connections, are exposed on `/metrics`.)
+    """
+
+    def __init__(self, creator, pool_size=5, max_overflow=10, **kwargs):
+        super().__init__(
+            creator,
+            pool_size=pool_size,
+            max_overflow=max_overflow,
+            **kwargs,
+        )
+        self._max_overflow_for_stats = max_overflow
+        self._stats = stats = _PoolStats()
+        if kwargs.get("_dispatch") is None:
+            # (A pool returned by `recreate` inherits these listeners.)
+            event.listen(self, "connect", lambda *args: stats.increment("connects"))
+            event.listen(
+                self, "invalidate", lambda *args: stats.increment("invalidations")
+            )
+
+    def recreate(self):
+        # (`Engine.dispose` replaces the pool with the one returned by this method,
+        # which is to carry on counting where this one left off.)
+        pool = super().recreate()
+        pool._stats = self._stats
+        return pool
+
+    def connect(self):
+        is_exhausted = (
+            self.checkedin() == 0
+            and self._max_overflow_for_stats > -1
+            and self.overflow() >= self._max_overflow_for_stats
+        )
+        start = time.perf_counter()
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            self._stats.increment("timeouts")
+            raise
+        finally:
+            self._stats.record_checkout(time.perf_counter() - start, is_exhausted)
+
+    def metrics(self):
+        """
+        Return a snapshot of this pool's metrics:
+        its size and how many connections are currently checked in/out,
+        and the counters described in the class docstring.
+        """
+        return {
+            "pool_size": self.size(),
+            "checked_in": self.checkedin(),
+            "checked_out": self.checkedout(),
+            **self._stats.snapshot(),
+        }
+
+
+_PROMETHEUS_COUNTERS = {
+    "exhausted": DB_POOL_EXHAUSTED,
+    "timeouts": DB_POOL_TIMEOUTS,
+    "invalidations": DB_POOL_INVALIDATIONS,
+}
+
+
+class _PoolStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = collections.Counter()
+        self._max_checkout_wait_seconds = 0.0
+
+    def increment(self, name):
+        with self._lock:
+            self._counters[name] += 1
+        prometheus_counter = _PROMETHEUS_COUNTERS.get(name)
+        if prometheus_counter is not None:
+            prometheus_counter.inc()
+
+    def record_checkout(self, seconds, is_exhausted):
+        DB_POOL_CHECKOUT_WAIT.observe(seconds)
+        if is_exhausted:
+            self.increment("exhausted")
+        with self._lock:
+            self._counters["checkouts"] += 1
+            self._counters["checkout_wait_seconds_total"] += seconds
+            self._max_checkout_wait_seconds = max(
+                self._max_checkout_wait_seconds, seconds
+            )
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "checkouts": self._counters["checkouts"],
+                "exhausted": self._counters["exhausted"],
+                "timeouts": self._counters["timeouts"],
+                "connects": self._counters["connects"],
+                "invalidations": self._counters["invalidations"],
+                "checkout_wait_seconds_total": self._counters[
+                    "checkout_wait_seconds_total"
+                ],
+                "checkout_wait_seconds_max": self._max_checkout_wait_seconds,
+            }
+
+
+def warm_up_pool(engine, n_connections):
+    """
+    Open (up to) `n_connections` connections to the database of `engine`
+    and return them to its pool,
+    so that the first requests handled by the current process
+    don't have to wait for connections to be opened.
+
+    Return the number of connections that were opened.
+
+    (A failure to connect is logged instead of raised,
+    because the pool will simply open connections on demand later on.)
+    """
+    if isinstance(engine.pool, QueuePool):
+        # (Connections in excess of the pool's size
+        # would be closed as soon as they were returned to the pool.)
+        n_connections = min(n_connections, engine.pool.size())
+
+    connections = []
+    try:
+        for _ in range(n_connections):
+            connections.append(engine.connect())
+    except exc.SQLAlchemyError:
+        current_app.logger.warning(
+            "failed to warm up the connection pool"
+            " (after opening %d of %d connections)",
+            len(connections),
+            n_connections,
+            exc_info=True,
+        )
+    finally:
+        for connection in connections:
+            connection.close()
+
+    return len(connections)
@@ -0,0 +1,208 @@
+"""
+Prometheus metrics of the requests that the application handles
+(and of the authentication attempts among them)
+as well as of the outbox dispatcher and of the pools of database connections,
+which are exposed on `/metrics` in Prometheus' text format.
+
+When the `PROMETHEUS_MULTIPROC_DIR` environment variable is set
+(as `boot.sh` does before it starts gunicorn),
+every process records its metrics into files within that directory,
+and `/metrics` aggregates the metrics of all processes
+- no matter which worker process happens to handle the scrape.
+"""
+
+import os
+import time
+
+from flask import current_app, g, has_request_context, request
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+_SIZE_BUCKETS = (100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+
+REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "How long it took to handle requests.",
+    ["method", "endpoint"],
+)
+REQUEST_DB_DURATION = Histogram(
+    "http_request_db_duration_seconds",
+    "How long SQL statements took to execute while requests were handled.",
+    ["method", "endpoint"],
+)
+REQUESTS = Counter(
+    "http_requests",
+    "How many requests have been handled.",
+    ["method", "endpoint", "status"],
+)
+REQUEST_SIZE = Histogram(
+    "http_request_size_bytes",
+    "How large the bodies of requests were.",
+    ["method", "endpoint"],
+    buckets=_SIZE_BUCKETS,
+)
+RESPONSE_SIZE = Histogram(
+    "http_response_size_bytes",
+    "How large the bodies of responses were.",
+    ["method", "endpoint"],
+    buckets=_SIZE_BUCKETS,
+)
+AUTH_ATTEMPTS = Counter(
+    "auth_attempts",
+    "How many attempts to authenticate have been made, by outcome.",
+    ["scheme", "outcome"],
+)
+
+# (These are recorded by `src.outbox.OutboxDispatcher`.)
+OUTBOX_DISPATCH_QUEUE_DEPTH = Gauge(
+    "outbox_dispatch_queue_depth",
+    "How many outbox messages are waiting in the queue of the dispatcher.",
+    multiprocess_mode="livesum",
+)
+OUTBOX_DISPATCH_MESSAGES = Counter(
+    "outbox_dispatch_messages",
+    "How many outbox messages the dispatcher has handled, by outcome"
+    " (submitted, dropped because the queue was full, sent or failed).",
+    ["outcome"],
+)
+OUTBOX_SEND_DURATION = Histogram(
+    "outbox_send_duration_seconds",
+    "How long it took the dispatcher to send outbox messages to the mail server.",
+)
+
+# (These are recorded by `src.db_pool.InstrumentedQueuePool`.)
+DB_POOL_CHECKOUT_WAIT = Histogram(
+    "db_pool_checkout_wait_seconds",
+    "How long checkouts waited for a database connection"
+    " (including the time it took to open a new connection).",
+)
+DB_POOL_EXHAUSTED = Counter(
+    "db_pool_exhausted",
+    "How many checkouts found every database connection checked out.",
+)
+DB_POOL_TIMEOUTS = Counter(
+    "db_pool_timeouts",
+    "How many checkouts timed out waiting for a database connection.",
+)
+DB_POOL_INVALIDATIONS = Counter(
+    "db_pool_invalidations",
+    "How many database connections were invalidated (e.g. because they were stale).",
+)
+
+
+class RequestMetrics:
+    """
+    A Flask extension, which records a latency histogram,
+    a histogram of the time spent executing SQL statements,
+    and histograms of the request/response sizes
+    for each endpoint (i.e. for each route of a blueprint),
+    as well as a counter of the responses by status code.
+
+    The extension is controlled by the `METRICS_ENABLED` configuration value.
+    """
+
+    def init_app(self, app):
+        if not app.config["METRICS_ENABLED"]:
+            return
+
+        app.before_request(_start_measuring)
+        app.after_request(_record_response)
+        app.teardown_request(_record_unhandled_exception)
+        app.add_url_rule("/metrics", "metrics", _expose_metrics)
+
+    def record_auth_attempt(self, scheme, outcome):
+        """
+        Count an attempt to authenticate by means of `scheme`,
+        which ended with `outcome` (e.g. "success" or "expired").
+        """
+        AUTH_ATTEMPTS.labels(scheme, outcome).inc()
+
+
+def _start_measuring():
+    g.metrics_start = time.perf_counter()
+    g.db_seconds = 0.0
+
+
+def _record_response(response):
+    _record(response.status_code, response.content_length)
+    return response
+
+
+def _record_unhandled_exception(exception):
+    # (After an unhandled exception,
+    # no `after_request` function is called before Flask responds with a 500.)
+    if exception is not None:
+        _record(500, None)
+
+
+def _record(status_code, response_size):
+    start = g.pop("metrics_start", None)
+    if start is None:
+        return  # (already recorded, or `_start_measuring` was never called)
+
+    method = request.method
+    endpoint = request.endpoint or "none"
+    REQUEST_DURATION.labels(method, endpoint).observe(time.perf_counter() - start)
+    REQUEST_DB_DURATION.labels(method, endpoint).observe(g.db_seconds)
+    REQUESTS.labels(method, endpoint, str(status_code)).inc()
+    REQUEST_SIZE.labels(method, endpoint).observe(request.content_length or 0)
+    if response_size is not None:
+        # (Streamed responses have no known size.)
+        RESPONSE_SIZE.labels(method, endpoint).observe(response_size)
+
+
+def _expose_metrics():
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+
+    return current_app.response_class(
+        generate_latest(registry),
+        headers={"Content-Type": CONTENT_TYPE_LATEST},
+    )
+
+
+# The following event listeners accumulate the time spent executing SQL statements
+# into `g.db_seconds` during every request,
+# for which an extension (this one, `src.server_timing.ServerTiming`
+# or `src.query_counter.QueryCounter`) has set it;
+# they also count the statements in `g.db_statement_counts`, if that is set.
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _start_timing_statement(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context() and "db_seconds" in g:
+        conn.info.setdefault("statement_starts", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _stop_timing_statement(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get("statement_starts")
+    if starts and has_request_context() and "db_seconds" in g:
+        g.db_seconds += time.perf_counter() - starts.pop()
+        statement_counts = g.get("db_statement_counts")
+        if statement_counts is not None:
+            statement_counts[statement] += 1
+
+
+@event.listens_for(Engine, "handle_error")
+def _forget_failed_statement(exception_context):
+    # (No `after_cursor_execute` event follows a statement that fails.)
+    connection = exception_context.connection
+    if connection is not None:
+        starts = connection.info.get("statement_starts")
+        if starts:
+            starts.pop()
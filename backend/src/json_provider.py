@@ -0,0 +1,58 @@
+"""
+A JSON provider, which (de)serializes by means of `orjson` if that package is installed
+and falls back to the standard library's `json` module otherwise.
+"""
+
+from flask.json.provider import DefaultJSONProvider
+
+from src.server_timing import timed
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    A drop-in replacement for Flask's `DefaultJSONProvider`,
+    which produces equivalent JSON documents:
+    keys are sorted (unless `sort_keys` is disabled),
+    and every value, which `orjson` doesn't serialize in the same way as Flask
+    (e.g. dates or dataclasses), is handed over to `DefaultJSONProvider.default`.
+
+    (Unlike the standard library, `orjson` doesn't escape non-ASCII characters.)
+    """
+
+    def dumps(self, obj, **kwargs):
+        if orjson is None or kwargs:
+            # (`orjson` doesn't support the keyword arguments of `json.dumps`.)
+            return super().dumps(obj, **kwargs)
+        return self._dumps_to_bytes(obj).decode("utf-8")
+
+    def loads(self, s, **kwargs):
+        if orjson is None or kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        with timed("json"):
+            if orjson is None:
+                return super().response(*args, **kwargs)
+
+            obj = self._prepare_response_obj(args, kwargs)
+            indent = (self.compact is None and self._app.debug) or self.compact is False
+            body = self._dumps_to_bytes(obj, indent=indent) + b"\n"
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+    def _dumps_to_bytes(self, obj, indent=False):
+        option = (
+            orjson.OPT_PASSTHROUGH_DATETIME
+            | orjson.OPT_PASSTHROUGH_DATACLASS
+            | orjson.OPT_NON_STR_KEYS
+        )
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=self.default, option=option)
@@ -1,44 +1,106 @@
+import base64
 import datetime
+import json
+import uuid
 
 from flask import url_for
+from flask_sqlalchemy import Pagination
+from sqlalchemy import event
+from sqlalchemy.dialects import mysql
+from sqlalchemy.engine import Row
 
 from src import db
+from src.server_timing import timed
+
+
+# The largest number of items, which a single page of a collection may contain.
+MAX_PER_PAGE = 100
 
 
 class PaginatedAPIMixin(object):
     """
     This is a "mixin" class, which implements generic functionality for
     generating a representation for a collection of resources.
+
+    Two ways of paginating a collection are supported:
+
+    - "offset" pagination (see `to_collection_dict`),
+      which lets clients jump to an arbitrary page
+      but gets slower the deeper the requested page is;
+
+    - "cursor" pagination (see `to_cursor_collection_dict`),
+      which only lets clients move forward from one page to the next
+      but costs the same for every page.
     """
 
     @staticmethod
-    def to_collection_dict(query, per_page, page, endpoint, **kwargs):
-        pagination_obj = query.paginate(page=page, per_page=per_page, error_out=False)
+    def to_collection_dict(
+        query,
+        per_page,
+        page,
+        endpoint,
+        include_total=True,
+        total_items=None,
+        fields=None,
+        **kwargs,
+    ):
+        """
+        Generate a representation for the `page`-th page of `query`'s results.
+
+        If the caller already knows the total number of results,
+        it can pass that number as `total_items`,
+        in which case the results are not counted by means of a `COUNT(*)` query.
+        """
+        page, per_page = PaginatedAPIMixin.clamp_page(page, per_page)
+        if include_total:
+            with timed("query"):
+                pagination_obj = PaginatedAPIMixin.paginate(
+                    query, page, per_page, total_items
+                )
+            items = pagination_obj.items
+            has_next = pagination_obj.has_next
+            has_prev = pagination_obj.has_prev
+            total_items = pagination_obj.total
+            total_pages = pagination_obj.pages
+        else:
+            # Avoid issuing a `COUNT(*)` query
+            # by fetching one more item than is required for the requested page;
+            # whether that additional item exists determines if there is a next page.
+            with timed("query"):
+                items = query.limit(per_page + 1).offset((page - 1) * per_page).all()
+            has_next = len(items) > per_page
+            has_prev = page > 1
+            items = items[:per_page]
+            total_items = None
+            total_pages = None
+            kwargs["include_total"] = "false"
+        if fields is not None:
+            kwargs["fields"] = ",".join(fields)
 
         link_to_self = url_for(endpoint, per_page=per_page, page=page, **kwargs)
         link_to_next = (
             url_for(endpoint, per_page=per_page, page=page + 1, **kwargs)
-            if pagination_obj.has_next
+            if has_next
             else None
         )
         link_to_prev = (
             url_for(endpoint, per_page=per_page, page=page - 1, **kwargs)
-            if pagination_obj.has_prev
+            if has_prev
             else None
         )
         link_to_first = url_for(endpoint, per_page=per_page, page=1, **kwargs)
         link_to_last = (
-            url_for(endpoint, per_page=per_page, page=pagination_obj.pages, **kwargs)
-            if pagination_obj.pages > 0
+            url_for(endpoint, per_page=per_page, page=total_pages, **kwargs)
+            if total_pages
             else None
         )
 
         resource_representations = {
-            "items": [resource.to_dict() for resource in pagination_obj.items],
+            "items": PaginatedAPIMixin.to_dicts(items, fields),
             "_meta": {
-                "total_items": pagination_obj.total,
+                "total_items": total_items,
                 "per_page": per_page,
-                "total_pages": pagination_obj.pages,
+                "total_pages": total_pages,
                 "page": page,
             },
             "_links": {
@@ -51,6 +113,147 @@ class PaginatedAPIMixin(object):
         }
         return resource_representations
 
+    @staticmethod
+    def to_cursor_collection_dict(
+        query,
+        key_column,
+        descending,
+        per_page,
+        after,
+        endpoint,
+        include_total=True,
+        total_items=None,
+        fields=None,
+        **kwargs,
+    ):
+        """
+        Generate a representation for the page of `query`'s results,
+        which comes right after the item identified by the `after` cursor.
+
+        The results are ordered by `key_column`, which must be unique
+        (in descending order if `descending` is truthy, or ascending order otherwise).
+        Each page is fetched by means of a `WHERE key_column < :key`
+        (or `WHERE key_column > :key`) condition instead of an `OFFSET`,
+        which is why every page costs the same to fetch.
+
+        If the caller already knows the total number of results,
+        it can pass that number as `total_items`.
+
+        An `after` value of `""` indicates the first page.
+        Any other value must be a cursor, which was previously issued by this method;
+        if it isn't, a `ValueError` is raised.
+        """
+        _, per_page = PaginatedAPIMixin.clamp_page(1, per_page)
+        if include_total:
+            if total_items is None:
+                with timed("query"):
+                    total_items = query.order_by(None).count()
+        else:
+            total_items = None
+            kwargs["include_total"] = "false"
+        if fields is not None:
+            kwargs["fields"] = ",".join(fields)
+
+        if after != "":
+            key = PaginatedAPIMixin.decode_cursor(after)
+            query = query.filter(key_column < key if descending else key_column > key)
+
+        query = query.order_by(None).order_by(
+            key_column.desc() if descending else key_column.asc()
+        )
+        with timed("query"):
+            items = query.limit(per_page + 1).all()
+        has_next = len(items) > per_page
+        items = items[:per_page]
+
+        link_to_self = url_for(endpoint, per_page=per_page, after=after, **kwargs)
+        link_to_next = (
+            url_for(
+                endpoint,
+                per_page=per_page,
+                after=PaginatedAPIMixin.encode_cursor(
+                    getattr(items[-1], key_column.key)
+                ),
+                **kwargs,
+            )
+            if has_next
+            else None
+        )
+
+        resource_representations = {
+            "items": PaginatedAPIMixin.to_dicts(items, fields),
+            "_meta": {
+                "total_items": total_items,
+                "per_page": per_page,
+            },
+            "_links": {
+                "self": link_to_self,
+                "next": link_to_next,
+            },
+        }
+        return resource_representations
+
+    @staticmethod
+    def clamp_page(page, per_page):
+        """
+        Bring the requested `page` and `per_page` into range
+        (i.e. `page >= 1` and `1 <= per_page <= MAX_PER_PAGE`),
+        so that they never produce a negative `LIMIT` or `OFFSET`
+        (which MySQL rejects).
+        """
+        return max(page, 1), min(max(per_page, 1), MAX_PER_PAGE)
+
+    @staticmethod
+    def paginate(query, page, per_page, total_items=None):
+        """
+        Fetch the `page`-th page of `query`'s results,
+        and count the results unless their number is passed as `total_items`.
+        """
+        if total_items is None:
+            return query.paginate(page=page, per_page=per_page, error_out=False)
+
+        items = query.limit(per_page).offset((page - 1) * per_page).all()
+        return Pagination(query, page, per_page, total_items, items)
+
+    @staticmethod
+    def to_dicts(items, fields=None):
+        """
+        Export each of `items` to a dict.
+
+        The items may be either model instances,
+        each of which is exported by its `to_dict` method
+        (restricted to the specified `fields`, if any are specified),
+        or `Row`s (as returned by a query for individual columns),
+        each of which is exported as is
+        - which avoids the cost of hydrating model instances.
+        """
+        with timed("serialize"):
+            if items and isinstance(items[0], Row):
+                return [row._asdict() for row in items]
+            if fields is None:
+                return [resource.to_dict() for resource in items]
+            return [resource.to_dict(fields) for resource in items]
+
+    @staticmethod
+    def encode_cursor(key):
+        """Turn `key` into an opaque (and URL-safe) cursor."""
+        key_json = json.dumps({"key": key})
+        return base64.urlsafe_b64encode(key_json.encode("utf-8")).decode("utf-8")
+
+    @staticmethod
+    def decode_cursor(cursor):
+        """Extract the key from a cursor, which was issued by `encode_cursor`."""
+        try:
+            key_json = base64.urlsafe_b64decode(cursor.encode("utf-8"))
+            key = json.loads(key_json)["key"]
+        except (ValueError, TypeError, KeyError) as e:
+            raise ValueError(f"invalid cursor: {repr(cursor)}") from e
+
+        if type(key) is not int:
+            raise ValueError(f"invalid cursor: {repr(cursor)}")
+
+        return key
+
 
 class User(PaginatedAPIMixin, db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -59,16 +262,33 @@ class User(PaginatedAPIMixin, db.Model):
     email = db.Column(db.String(128), unique=True, nullable=False)
     password_hash = db.Column(db.String(128), nullable=False)
     is_confirmed = db.Column(db.Boolean)
+    created = db.Column(db.DateTime, nullable=False, default=datetime.datetime.utcnow)
+    # The version of the access tokens, which are currently valid for this `User`;
+    # incrementing it revokes all access tokens that have been issued so far.
+    token_version = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    # The number of `Example`s, which belong to this `User`;
+    # it is adjusted within the same transaction as every creation/deletion of those
+    # (so that it can be read instead of counting them).
+    example_count = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    # The version of this `User`'s representations (i.e. of `username` and `email`),
+    # which is incremented whenever either of those changes;
+    # the `ETag`s of the `User` resource and of the user profile are derived from it.
+    version = db.Column(db.Integer, nullable=False, default=1, server_default="1")
 
+    # (Deleting a `User` makes the database delete the associated rows
+    # by means of `ON DELETE CASCADE`,
+    # so the ORM doesn't need to load those rows.)
     examples = db.relationship(
         "Example",
         lazy="dynamic",
         backref="user",
+        passive_deletes=True,
     )
     email_address_changes = db.relationship(
         "EmailAddressChange",
         lazy="dynamic",
         backref="user",
+        passive_deletes=True,
     )
 
     def to_dict(self):
@@ -79,7 +299,24 @@ class User(PaginatedAPIMixin, db.Model):
         return f"User({self.id}, {self.username})"
 
 
+@event.listens_for(User.username, "set")
+@event.listens_for(User.email, "set")
+def bump_version_of_user(target, value, oldvalue, initiator):
+    if target.id is not None and value != oldvalue:
+        target.version = (target.version or 0) + 1
+
+
 class Example(PaginatedAPIMixin, db.Model):
+    __table_args__ = (
+        # Support fetching a `User`'s `Example`s in order of descending IDs
+        # without sorting them (or scanning the entire table).
+        db.Index("ix_example_user_id_id", "user_id", "id"),
+        # Support computing the number of a `User`'s `Example`s
+        # and the most recent time at which any of them was updated
+        # from the index alone.
+        db.Index("ix_example_user_id_updated", "user_id", "updated"),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
 
     # Note that the next statement passes a function - not its invocation! -
@@ -87,33 +324,56 @@ class Example(PaginatedAPIMixin, db.Model):
     # Also, you always want to use UTC
     # when saving date+time to a DB (so they're consistent).
     created = db.Column(db.DateTime, nullable=False, default=datetime.datetime.utcnow)
+    # (On MySQL, the precision is increased to microseconds,
+    # so that any change is reflected by this column
+    # even if it occurs within the same second as the previous change.)
+    updated = db.Column(
+        db.DateTime().with_variant(mysql.DATETIME(fsp=6), "mysql"),
+        nullable=False,
+        default=datetime.datetime.utcnow,
+        onupdate=datetime.datetime.utcnow,
+    )
+    # Incremented by every UPDATE that is issued through the ORM
+    # (which makes such an UPDATE fail
+    # if the row has been updated since it was loaded);
+    # the server-side default covers the rows that are inserted in bulk.
+    version = db.Column(db.Integer, nullable=False, server_default="1")
     # Note that the string within the next statement uses a lower-case "u".
-    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
+    user_id = db.Column(
+        db.Integer,
+        db.ForeignKey("user.id", ondelete="CASCADE"),
+        nullable=False,
+    )
 
     source_language = db.Column(db.String(32), default="Finnish")
     new_word = db.Column(db.String(128), nullable=False)
     content = db.Column(db.Text, nullable=False)
     content_translation = db.Column(db.Text)
 
-    def to_dict(self):
-        return {
-            "id": self.id,
-            "source_language": self.source_language,
-            "new_word": self.new_word,
-            "content": self.content,
-            "content_translation": self.content_translation,
-        }
+    __mapper_args__ = {"version_id_col": version}
+
+    # The fields, which a representation of an `Example` consists of.
+    FIELDS = ("id", "source_language", "new_word", "content", "content_translation")
+
+    def to_dict(self, fields=FIELDS):
+        return {field: getattr(self, field) for field in fields}
 
     def __repr__(self):
         return f"Example({self.id}, {self.new_word})"
 
 
 class EmailAddressChange(db.Model):
+    __table_args__ = (
+        # Support finding the most recent `EmailAddressChange`
+        # that was initiated by a `User` from a given (old) email address.
+        db.Index("ix_email_address_change_user_id_old_id", "user_id", "old", "id"),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
 
     user_id = db.Column(
         db.Integer,
-        db.ForeignKey("user.id"),
+        db.ForeignKey("user.id", ondelete="CASCADE"),
         nullable=False,
     )
 
@@ -130,3 +390,98 @@ class EmailAddressChange(db.Model):
 
     def __repr__(self):
         return f"EmailAddressChange({self.id})"
+
+
+class OutboxEmail(db.Model):
+    """
+    An email message that is waiting to be sent.
+
+    Rows are written in the same transaction as the changes that require them,
+    and are sent (and then deleted) by the `flask mail-worker` command.
+    """
+
+    __tablename__ = "outbox_email"
+
+    id = db.Column(db.Integer, primary_key=True)
+
+    created = db.Column(db.DateTime, nullable=False, default=datetime.datetime.utcnow)
+
+    sender = db.Column(db.String(128), nullable=False)
+    recipients = db.Column(db.JSON, nullable=False)
+    subject = db.Column(db.String(256), nullable=False)
+    body = db.Column(db.Text, nullable=False)
+
+    attempts = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    # The earliest point in time at which the next attempt may be made
+    # (or `None` if all attempts have failed and the message has been given up on).
+    next_attempt_at = db.Column(
+        db.DateTime,
+        index=True,
+        default=datetime.datetime.utcnow,
+    )
+    last_error = db.Column(db.Text)
+
+    def __repr__(self):
+        return f"OutboxEmail({self.id})"
+
+
+class AccountDeletion(db.Model):
+    """
+    A background job, which deletes a `User` together with all of their resources.
+
+    (The `id` is random, because the status of the job can be queried
+    without authentication - the `User`'s credentials stop working
+    as soon as the job is created.)
+    """
+
+    __tablename__ = "account_deletion"
+
+    PENDING = "pending"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+    id = db.Column(
+        db.String(32),
+        primary_key=True,
+        default=lambda: uuid.uuid4().hex,
+    )
+
+    # (This is not a foreign key, because the job outlives the `User`.)
+    user_id = db.Column(db.Integer, nullable=False, index=True)
+
+    status = db.Column(db.String(16), nullable=False, default=PENDING, index=True)
+
+    created = db.Column(db.DateTime, nullable=False, default=datetime.datetime.utcnow)
+    updated = db.Column(
+        db.DateTime,
+        nullable=False,
+        default=datetime.datetime.utcnow,
+        onupdate=datetime.datetime.utcnow,
+    )
+
+    # (A job that fails is retried - with an exponentially-growing delay -
+    # until `ACCOUNT_DELETION_MAX_ATTEMPTS` attempts have failed.)
+    attempts = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    # (`None` means "as soon as possible".)
+    next_attempt_at = db.Column(db.DateTime)
+
+    n_examples_deleted = db.Column(
+        db.Integer, nullable=False, default=0, server_default="0"
+    )
+    n_email_address_changes_deleted = db.Column(
+        db.Integer, nullable=False, default=0, server_default="0"
+    )
+
+    error = db.Column(db.Text)
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "status": self.status,
+            "n_examples_deleted": self.n_examples_deleted,
+            "n_email_address_changes_deleted": self.n_email_address_changes_deleted,
+        }
+
+    def __repr__(self):
+        return f"AccountDeletion({self.id})"
@@ -0,0 +1,411 @@
+import collections
+import datetime
+import queue
+import smtplib
+import threading
+import time
+
+import click
+from flask import current_app, has_app_context
+from flask.cli import with_appcontext
+from flask_mail import Message
+from sqlalchemy import event
+
+from src import db, mail
+from src.instrumentation import (
+    OUTBOX_DISPATCH_MESSAGES,
+    OUTBOX_DISPATCH_QUEUE_DEPTH,
+    OUTBOX_SEND_DURATION,
+)
+from src.models import OutboxEmail
+
+
+def enqueue_email(sender, recipients, subject, body):
+    """
+    Add an email message to the outbox.
+
+    The message is only added to the current database session,
+    so it becomes durable if (and only if) the caller commits that session -
+    i.e. together with the changes that made it necessary to send the message.
+    """
+    outbox_email = OutboxEmail(
+        sender=sender,
+        recipients=recipients,
+        subject=subject,
+        body=body,
+    )
+    db.session.add(outbox_email)
+    return outbox_email
+
+
+def send_batch_from_outbox(batch_size):
+    """
+    Send (at most `batch_size` of) the messages, which are due to be sent,
+    over a single connection to the mail server.
+
+    Each message that is sent successfully is deleted from the outbox;
+    each message that fails to be sent is scheduled for a retry
+    with an exponentially-growing delay,
+    until `OUTBOX_MAX_ATTEMPTS` attempts have failed.
+
+    Return a `(n_sent, n_failed)` tuple.
+    """
+    outbox_emails = _claim_outbox_emails(batch_size)
+    if not outbox_emails:
+        db.session.commit()
+        return 0, 0
+
+    try:
+        connection = mail.connect()
+        connection.__enter__()
+    except Exception as e:
+        # The connection to the mail server could not be established,
+        # so each message is to be retried.
+        for outbox_email in outbox_emails:
+            _schedule_retry(outbox_email, e)
+        db.session.commit()
+        return 0, len(outbox_emails)
+
+    try:
+        result = _send_outbox_emails(outbox_emails, connection)
+    except _BrokenConnection as e:
+        result = e.n_sent, e.n_failed
+    finally:
+        # (Closing a connection, which has broken down, fails as well;
+        # but by now, every message has been either sent or scheduled for a retry.)
+        _close_quietly(connection)
+
+    db.session.commit()
+    return result
+
+
+def _claim_outbox_emails(batch_size, *criteria):
+    return (
+        OutboxEmail.query.filter(
+            OutboxEmail.next_attempt_at <= datetime.datetime.utcnow(),
+            *criteria,
+        )
+        .order_by(OutboxEmail.id)
+        .limit(batch_size)
+        # Let several workers drain the outbox concurrently
+        # without sending any message more than once.
+        .with_for_update(skip_locked=True)
+        .all()
+    )
+
+
+class _BrokenConnection(Exception):
+    def __init__(self, n_sent, n_failed):
+        super().__init__(n_sent, n_failed)
+        self.n_sent = n_sent
+        self.n_failed = n_failed
+
+
+def _send_outbox_emails(outbox_emails, connection, on_sent=None):
+    """
+    Send `outbox_emails` over `connection`,
+    deleting each message that is sent successfully from the outbox
+    and scheduling a retry for each message that fails to be sent.
+
+    Return a `(n_sent, n_failed)` tuple,
+    or raise `_BrokenConnection` if `connection` breaks down
+    (in which case a retry is scheduled for each message that hasn't been sent).
+    """
+    n_sent = 0
+    n_failed = 0
+    for index, outbox_email in enumerate(outbox_emails):
+        msg = Message(
+            outbox_email.subject,
+            sender=outbox_email.sender,
+            recipients=outbox_email.recipients,
+        )
+        msg.body = outbox_email.body
+        start = time.perf_counter()
+        try:
+            connection.send(msg)
+        except (smtplib.SMTPServerDisconnected, ConnectionError, TimeoutError) as e:
+            for unsent_outbox_email in outbox_emails[index:]:
+                _schedule_retry(unsent_outbox_email, e)
+            raise _BrokenConnection(n_sent, n_failed + len(outbox_emails) - index)
+        except Exception as e:
+            _schedule_retry(outbox_email, e)
+            n_failed += 1
+        else:
+            db.session.delete(outbox_email)
+            n_sent += 1
+            if on_sent is not None:
+                on_sent(time.perf_counter() - start)
+    return n_sent, n_failed
+
+
+def _schedule_retry(outbox_email, error):
+    now = datetime.datetime.utcnow()
+    outbox_email.attempts += 1
+    outbox_email.last_error = repr(error)
+
+    if outbox_email.attempts >= current_app.config["OUTBOX_MAX_ATTEMPTS"]:
+        outbox_email.next_attempt_at = None
+        current_app.logger.error(
+            "giving up on sending %r after %s attempts: %r",
+            outbox_email,
+            outbox_email.attempts,
+            error,
+        )
+        return
+
+    delay_in_seconds = current_app.config["OUTBOX_RETRY_BACKOFF_SECONDS"] * 2 ** (
+        outbox_email.attempts - 1
+    )
+    outbox_email.next_attempt_at = now + datetime.timedelta(seconds=delay_in_seconds)
+    current_app.logger.warning(
+        "failed to send %r (attempt #%s), will retry in %s seconds: %r",
+        outbox_email,
+        outbox_email.attempts,
+        delay_in_seconds,
+        error,
+    )
+
+
+@click.command("mail-worker")
+@click.option(
+    "--batch-size",
+    type=int,
+    default=None,
+    help="How many messages to send over each connection to the mail server.",
+)
+@click.option(
+    "--once",
+    is_flag=True,
+    help="Exit as soon as the outbox has no messages that are due to be sent.",
+)
+@with_appcontext
+def mail_worker_command(batch_size, once):
+    """Send the messages, which are waiting in the outbox."""
+    if batch_size is None:
+        batch_size = current_app.config["OUTBOX_BATCH_SIZE"]
+    poll_interval_in_seconds = current_app.config["OUTBOX_POLL_INTERVAL_SECONDS"]
+
+    while True:
+        n_sent, n_failed = send_batch_from_outbox(batch_size)
+        if n_sent or n_failed:
+            click.echo(f"sent {n_sent} message(s), failed to send {n_failed}")
+
+        if n_sent + n_failed < batch_size:
+            if once:
+                return
+            time.sleep(poll_interval_in_seconds)
+
+
+class OutboxDispatcher:
+    """
+    A Flask extension, which sends the messages that are committed to the outbox
+    from within the committing process -
+    promptly, but without making the committing request wait for the mail server.
+
+    After a commit, the IDs of the newly-committed messages are put
+    into a bounded queue,
+    which is drained by a fixed number of (lazily-started) worker threads;
+    each worker thread takes all queued IDs at once (up to `OUTBOX_BATCH_SIZE`)
+    and sends the corresponding messages
+    over a connection to the mail server that it keeps open
+    until it has been idle for `OUTBOX_DISPATCH_IDLE_SECONDS`.
+
+    When the queue is full, IDs are dropped instead of blocking the request;
+    the corresponding messages remain in the outbox
+    and get sent by the `flask mail-worker` command
+    (as do the messages whose sending by a worker thread fails).
+
+    The dispatcher is controlled by the following configuration values:
+    - `OUTBOX_DISPATCH_ENABLED`,
+    - `OUTBOX_DISPATCH_THREADS`,
+    - `OUTBOX_DISPATCH_QUEUE_SIZE`,
+    - `OUTBOX_DISPATCH_IDLE_SECONDS`.
+    """
+
+    def init_app(self, app):
+        app.extensions["outbox_dispatcher"] = _DispatcherState(app)
+
+    def dispatch(self, outbox_email_ids):
+        """
+        Schedule the messages with the given IDs to be sent by a worker thread
+        (if the current application has the dispatcher enabled).
+        """
+        _dispatch(outbox_email_ids)
+
+    def metrics(self):
+        """
+        Return a snapshot of the current application's dispatcher metrics:
+        its queue depth and capacity,
+        how many messages were dropped because the queue was full,
+        and how many messages were sent / failed to be sent.
+
+        (The same metrics of all processes - as well as a histogram
+        of how long sending the messages took - are exposed on `/metrics`.)
+        """
+        return current_app.extensions["outbox_dispatcher"].metrics()
+
+
+def _dispatch(outbox_email_ids):
+    if not current_app.config["OUTBOX_DISPATCH_ENABLED"]:
+        return
+    current_app.extensions["outbox_dispatcher"].submit(outbox_email_ids)
+
+
+class _DispatcherState:
+    def __init__(self, app):
+        self._app = app
+        self._queue = queue.Queue(maxsize=app.config["OUTBOX_DISPATCH_QUEUE_SIZE"])
+        self._lock = threading.Lock()
+        self._threads = []
+        self._counters = collections.Counter()
+
+    def submit(self, outbox_email_ids):
+        self._start_threads()
+        for outbox_email_id in outbox_email_ids:
+            try:
+                self._queue.put_nowait(outbox_email_id)
+            except queue.Full:
+                self._count("dropped", 1)
+            else:
+                OUTBOX_DISPATCH_QUEUE_DEPTH.inc()
+                self._count("submitted", 1)
+
+    def join(self):
+        """Block until every submitted ID has been processed."""
+        self._queue.join()
+
+    def metrics(self):
+        with self._lock:
+            return {
+                "queue_depth": self._queue.qsize(),
+                "queue_capacity": self._queue.maxsize,
+                "threads": len(self._threads),
+                "submitted": self._counters["submitted"],
+                "dropped": self._counters["dropped"],
+                "sent": self._counters["sent"],
+                "failed": self._counters["failed"],
+            }
+
+    def _start_threads(self):
+        with self._lock:
+            # (Threads don't survive a `fork()`,
+            # so the threads are started in the process that needs them.)
+            self._threads = [t for t in self._threads if t.is_alive()]
+            while len(self._threads) < self._app.config["OUTBOX_DISPATCH_THREADS"]:
+                t = threading.Thread(
+                    target=self._work,
+                    name=f"outbox-dispatcher-{len(self._threads)}",
+                    daemon=True,
+                )
+                t.start()
+                self._threads.append(t)
+
+    def _count(self, outcome, n):
+        """
+        Count `n` messages with the given `outcome`
+        both in this dispatcher's metrics and in the Prometheus metrics.
+        """
+        with self._lock:
+            self._counters[outcome] += n
+        OUTBOX_DISPATCH_MESSAGES.labels(outcome).inc(n)
+
+    def _work(self):
+        connection = None
+        while True:
+            try:
+                outbox_email_ids = [
+                    self._queue.get(
+                        timeout=(
+                            self._app.config["OUTBOX_DISPATCH_IDLE_SECONDS"]
+                            if connection is not None
+                            else None
+                        )
+                    )
+                ]
+            except queue.Empty:
+                connection = _close_quietly(connection)
+                continue
+
+            batch_size = self._app.config["OUTBOX_BATCH_SIZE"]
+            while len(outbox_email_ids) < batch_size:
+                try:
+                    outbox_email_ids.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            OUTBOX_DISPATCH_QUEUE_DEPTH.dec(len(outbox_email_ids))
+
+            try:
+                with self._app.app_context():
+                    connection, n_sent, n_failed = self._send(
+                        outbox_email_ids,
+                        connection,
+                    )
+            except Exception:
+                self._app.logger.exception("the outbox dispatcher failed")
+                connection = _close_quietly(connection)
+                n_sent, n_failed = 0, len(outbox_email_ids)
+            finally:
+                for _ in outbox_email_ids:
+                    self._queue.task_done()
+
+            self._count("sent", n_sent)
+            self._count("failed", n_failed)
+
+    def _send(self, outbox_email_ids, connection):
+        outbox_emails = _claim_outbox_emails(
+            len(outbox_email_ids),
+            OutboxEmail.id.in_(outbox_email_ids),
+        )
+        if not outbox_emails:
+            db.session.commit()
+            return connection, 0, 0
+
+        if connection is None:
+            try:
+                connection = mail.connect()
+                connection.__enter__()
+            except Exception as e:
+                for outbox_email in outbox_emails:
+                    _schedule_retry(outbox_email, e)
+                db.session.commit()
+                return None, 0, len(outbox_emails)
+
+        try:
+            n_sent, n_failed = _send_outbox_emails(
+                outbox_emails,
+                connection,
+                on_sent=OUTBOX_SEND_DURATION.observe,
+            )
+        except _BrokenConnection as e:
+            connection = _close_quietly(connection)
+            n_sent, n_failed = e.n_sent, e.n_failed
+
+        db.session.commit()
+        return connection, n_sent, n_failed
+
+
+def _close_quietly(connection):
+    if connection is not None:
+        try:
+            connection.__exit__(None, None, None)
+        except Exception:
+            pass
+    return None
+
+
+@event.listens_for(db.session, "pending_to_persistent")
+def remember_committed_outbox_email(session, instance):
+    if isinstance(instance, OutboxEmail):
+        session.info.setdefault("outbox_email_ids", []).append(instance.id)
+
+
+@event.listens_for(db.session, "after_commit")
+def dispatch_committed_outbox_emails(session):
+    outbox_email_ids = session.info.pop("outbox_email_ids", None)
+    if outbox_email_ids and has_app_context():
+        _dispatch(outbox_email_ids)
+
+
+@event.listens_for(db.session, "after_soft_rollback")
+def forget_rolled_back_outbox_emails(session, previous_transaction):
+    session.info.pop("outbox_email_ids", None)
@@ -0,0 +1,131 @@
+"""
+Profiling of the request-handling functions by means of `cProfile`,
+either on demand (for individual requests made by an administrator)
+or for a random sample of all requests.
+
+The profiles are written to disk in the format of the `pstats` module,
+so they can be inspected with `python -m pstats <file>`
+or turned into flame graphs with tools such as `snakeviz` or `flameprof`.
+"""
+
+import cProfile
+import datetime
+import functools
+import os
+import pstats
+import random
+import threading
+import uuid
+
+from flask import current_app, jsonify, request
+
+
+PROFILE_TOKEN_HEADER = "X-Profile-Token"
+PROFILE_HEADER = "X-Profile"
+
+
+class RequestProfiler:
+    """
+    A Flask extension, which wraps every request-handling function of the API,
+    so that it can be run under `cProfile` in either of the following two ways:
+
+    - on demand: a request, whose `X-Profile-Token` header holds an access token
+      that has been issued to an administrator, is profiled
+      and its profile is written to a separate file within `PROFILER_DIRECTORY`,
+      whose name is reported in the `X-Profile` response header;
+
+    - by sampling: a `PROFILER_SAMPLE_RATE` fraction of all requests are profiled,
+      and their profiles are aggregated per endpoint (separately within each process)
+      into files within `PROFILER_DIRECTORY`, whose names start with "sampled-".
+
+    The files can be downloaded by administrators via `GET /api/admin/profiles/...`.
+
+    The extension is controlled by the `PROFILER_ENABLED` configuration value;
+    since it wraps the request-handling functions,
+    it has to be initialized after the `api_bp` blueprint has been registered.
+    """
+
+    def init_app(self, app):
+        if not app.config["PROFILER_ENABLED"]:
+            return
+
+        from src.api import api_bp
+
+        app.extensions["request_profiler"] = _SampledProfiles()
+        for endpoint, view_function in list(app.view_functions.items()):
+            if endpoint.startswith(api_bp.name + "."):
+                app.view_functions[endpoint] = _profiled(view_function)
+
+
+def _profiled(view_function):
+    @functools.wraps(view_function)
+    def decorated_function(*args, **kwargs):
+        profile_token = request.headers.get(PROFILE_TOKEN_HEADER)
+        if profile_token is not None:
+            from src.auth import verify_administrator_token
+
+            if verify_administrator_token(profile_token) is None:
+                r = jsonify(
+                    {
+                        "error": "Forbidden",
+                        "message": (
+                            "Profiling a request requires administrator privileges."
+                        ),
+                    }
+                )
+                r.status_code = 403
+                return r
+        elif random.random() >= current_app.config["PROFILER_SAMPLE_RATE"]:
+            return view_function(*args, **kwargs)
+
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # (Another profiler is already active, e.g. one that a developer started.)
+            return view_function(*args, **kwargs)
+        try:
+            rv = view_function(*args, **kwargs)
+        finally:
+            profile.disable()
+
+        directory = current_app.config["PROFILER_DIRECTORY"]
+        os.makedirs(directory, exist_ok=True)
+        if profile_token is None:
+            current_app.extensions["request_profiler"].add(
+                directory, request.endpoint, profile
+            )
+            return rv
+
+        filename = "{}-{}-{}.prof".format(
+            datetime.datetime.utcnow().strftime("%Y%m%dT%H%M%S"),
+            request.endpoint,
+            uuid.uuid4().hex[:8],
+        )
+        profile.dump_stats(os.path.join(directory, filename))
+        response = current_app.make_response(rv)
+        response.headers[PROFILE_HEADER] = filename
+        return response
+
+    return decorated_function
+
+
+class _SampledProfiles:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats_per_endpoint = {}
+
+    def add(self, directory, endpoint, profile):
+        """
+        Merge `profile` into the aggregated profile of `endpoint`,
+        and (over)write the latter's file within `directory`.
+        """
+        with self._lock:
+            stats = self._stats_per_endpoint.get(endpoint)
+            if stats is None:
+                stats = self._stats_per_endpoint[endpoint] = pstats.Stats(profile)
+            else:
+                stats.add(profile)
+            stats.dump_stats(
+                os.path.join(directory, f"sampled-{endpoint}-{os.getpid()}.prof")
+            )
@@ -0,0 +1,120 @@
+import dataclasses
+import datetime
+
+import sqlalchemy as sa
+
+from src import db
+from src.models import User, Example, EmailAddressChange
+
+
+@dataclasses.dataclass
+class PurgeReport:
+    n_users: int = 0
+    n_examples: int = 0
+    n_email_address_changes: int = 0
+
+
+def expired_registrations_filter(days_for_email_address_confirmation, now=None):
+    """
+    Return a filter criterion matching the `User`s,
+    who have not confirmed their email address
+    within `days_for_email_address_confirmation` days of registering.
+    """
+    if now is None:
+        now = datetime.datetime.utcnow()
+    cutoff = now - datetime.timedelta(days=days_for_email_address_confirmation)
+
+    return sa.and_(
+        sa.or_(User.is_confirmed.is_(None), User.is_confirmed.is_(False)),
+        User.created < cutoff,
+    )
+
+
+def count_expired_registrations(days_for_email_address_confirmation, now=None):
+    """
+    Return a `PurgeReport` describing what `purge_expired_registrations` would delete,
+    computed by means of (one) aggregate query per table.
+    """
+    expired = expired_registrations_filter(days_for_email_address_confirmation, now)
+    ids_of_expired_users = sa.select(User.id).where(expired).scalar_subquery()
+
+    return PurgeReport(
+        n_users=db.session.query(sa.func.count(User.id)).filter(expired).scalar(),
+        n_examples=(
+            db.session.query(sa.func.count(Example.id))
+            .filter(Example.user_id.in_(ids_of_expired_users))
+            .scalar()
+        ),
+        n_email_address_changes=(
+            db.session.query(sa.func.count(EmailAddressChange.id))
+            .filter(EmailAddressChange.user_id.in_(ids_of_expired_users))
+            .scalar()
+        ),
+    )
+
+
+def purge_expired_registrations(
+    days_for_email_address_confirmation,
+    batch_size,
+    now=None,
+    on_batch=None,
+):
+    """
+    Delete the `User`s, who have not confirmed their email address in time,
+    together with their `Example`s and `EmailAddressChange`s.
+
+    The `User`s are processed in batches of (at most) `batch_size`;
+    each batch is deleted within its own transaction,
+    by means of one `DELETE ... WHERE user_id IN (...)` statement per table.
+    If provided, `on_batch` is called with a `PurgeReport` for each committed batch.
+
+    (Since such `User`s cannot authenticate,
+    no credentials or token versions of theirs are cached,
+    so there are no caches to be evicted.)
+
+    Return a `PurgeReport` describing everything that was deleted.
+    """
+    expired = expired_registrations_filter(days_for_email_address_confirmation, now)
+
+    total = PurgeReport()
+    while True:
+        user_ids = [
+            user_id
+            for (user_id,) in db.session.query(User.id)
+            .filter(expired)
+            .order_by(User.id)
+            .limit(batch_size)
+            # Prevent the selected `User`s from confirming their email address
+            # while they are being deleted.
+            .with_for_update()
+        ]
+        if not user_ids:
+            db.session.commit()
+            return total
+
+        batch = PurgeReport(
+            n_examples=db.session.execute(
+                sa.delete(Example).where(Example.user_id.in_(user_ids)),
+                execution_options={"synchronize_session": False},
+            ).rowcount,
+            n_email_address_changes=db.session.execute(
+                sa.delete(EmailAddressChange).where(
+                    EmailAddressChange.user_id.in_(user_ids)
+                ),
+                execution_options={"synchronize_session": False},
+            ).rowcount,
+            n_users=db.session.execute(
+                sa.delete(User).where(User.id.in_(user_ids)),
+                execution_options={"synchronize_session": False},
+            ).rowcount,
+        )
+        db.session.commit()
+
+        total.n_users += batch.n_users
+        total.n_examples += batch.n_examples
+        total.n_email_address_changes += batch.n_email_address_changes
+        if on_batch is not None:
+            on_batch(batch)
+
+        if len(user_ids) < batch_size:
+            return total
@@ -0,0 +1,128 @@
+"""
+Counting of the SQL statements that are issued while handling each request,
+and detection of statements that are issued over and over again
+(which is the telltale sign of an "N+1 queries" problem).
+"""
+
+import collections
+import contextlib
+import dataclasses
+import json
+import time
+import typing
+
+from flask import current_app, g, request
+from sqlalchemy import event
+
+from src import db
+
+
+class QueryCounter:
+    """
+    A Flask extension, which counts the SQL statements issued while handling
+    each request (as well as the time they took to execute),
+    logs those numbers at the end of the request,
+    and logs a warning about every statement that was issued
+    `QUERY_COUNTER_REPEAT_THRESHOLD` or more times during the same request.
+
+    The extension is controlled by the `QUERY_COUNTER_ENABLED` configuration value.
+    """
+
+    def init_app(self, app):
+        if not app.config["QUERY_COUNTER_ENABLED"]:
+            return
+
+        app.before_request(_start_counting)
+        app.after_request(_report_counts)
+
+
+def _start_counting():
+    # (The statements are counted, and the time spent executing them is accumulated,
+    # by the event listeners in `src.instrumentation`.)
+    g.db_statement_counts = collections.Counter()
+    g.db_seconds = 0.0
+
+
+def _report_counts(response):
+    statement_counts = g.pop("db_statement_counts", None)
+    if statement_counts is None:
+        return response
+
+    current_app.logger.info(
+        "%s",
+        json.dumps(
+            {
+                "event": "query_count",
+                "method": request.method,
+                "endpoint": request.endpoint,
+                "n_statements": sum(statement_counts.values()),
+                "n_distinct_statements": len(statement_counts),
+                "db_ms": round(g.db_seconds * 1000, 3),
+            }
+        ),
+    )
+
+    threshold = current_app.config["QUERY_COUNTER_REPEAT_THRESHOLD"]
+    for statement, n in statement_counts.items():
+        if n >= threshold:
+            current_app.logger.warning(
+                "the same statement was issued %d times while handling %s %s"
+                " (which suggests an N+1 queries problem): %s",
+                n,
+                request.method,
+                request.endpoint,
+                statement,
+            )
+    return response
+
+
+@dataclasses.dataclass
+class QueryLog:
+    """The SQL statements, which were issued within a `count_queries()` block."""
+
+    statements: typing.List[str] = dataclasses.field(default_factory=list)
+    seconds: float = 0.0
+
+    def __len__(self):
+        return len(self.statements)
+
+    def repeated_statements(self, threshold=2):
+        """
+        Return a dict mapping each statement, which was issued `threshold` or more times,
+        to the number of times it was issued.
+        """
+        return {
+            statement: n
+            for statement, n in collections.Counter(self.statements).items()
+            if n >= threshold
+        }
+
+
+@contextlib.contextmanager
+def count_queries(engine=None):
+    """
+    Record every SQL statement, which is issued through `engine` (`db.engine` by default)
+    within the block, into the yielded `QueryLog`
+    (no matter whether the statement is issued while handling a request or not).
+    """
+    if engine is None:
+        engine = db.engine
+    query_log = QueryLog()
+    starts = []
+
+    def before_cursor_execute(
+        conn, cursor, statement, parameters, context, executemany
+    ):
+        starts.append(time.perf_counter())
+
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        query_log.seconds += time.perf_counter() - starts.pop()
+        query_log.statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", after_cursor_execute)
+    try:
+        yield query_log
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+        event.remove(engine, "after_cursor_execute", after_cursor_execute)
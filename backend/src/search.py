@@ -0,0 +1,172 @@
+"""
+Full-text search over the `new_word`, `content` and `content_translation` columns
+of the `example` table.
+
+- On MySQL, the search is backed by a FULLTEXT index,
+  which InnoDB keeps up to date by itself.
+
+- On SQLite, the search is backed by an FTS5 virtual table called `example_fts`.
+  That table is an "external content" table,
+  i.e. it does not store a copy of the text but only the full-text index over it,
+  and it is kept in sync with the `example` table by means of triggers
+  (which fire on every INSERT, UPDATE and DELETE
+  - regardless of whether those statements are issued by the ORM or not).
+
+Both sets of schema objects are created (and dropped) together with the `example`
+table by `db.create_all()` (and `db.drop_all()`);
+a database that is managed via Flask-Migrate gets them from a migration script.
+"""
+
+import sqlalchemy as sa
+from sqlalchemy import event, DDL
+
+from src.models import Example
+
+
+FULL_TEXT_INDEX_NAME = "ix_example_full_text"
+FTS_TABLE_NAME = "example_fts"
+
+# The columns, which are indexed for full-text search.
+_INDEXED_COLUMNS = ("new_word", "content", "content_translation")
+
+
+_MYSQL_DDL_STATEMENTS_FOR_CREATION = (
+    f"CREATE FULLTEXT INDEX {FULL_TEXT_INDEX_NAME}"
+    f" ON example ({', '.join(_INDEXED_COLUMNS)})",
+)
+
+
+def _build_sqlite_ddl_statements_for_creation():
+    """
+    Build the statements, which create the FTS5 table and the triggers on `example`,
+    from `_INDEXED_COLUMNS`.
+
+    (The migration scripts contain frozen copies of these statements;
+    the one that owns them is `f0137799dfd9_add_full_text_search_over_examples`.)
+    """
+    columns = ", ".join(_INDEXED_COLUMNS)
+    new_values = ", ".join("new." + column for column in _INDEXED_COLUMNS)
+    old_values = ", ".join("old." + column for column in _INDEXED_COLUMNS)
+
+    insert_new_row = (
+        f"INSERT INTO {FTS_TABLE_NAME} (rowid, {columns})"
+        f" VALUES (new.id, {new_values});"
+    )
+    delete_old_row = (
+        f"INSERT INTO {FTS_TABLE_NAME} ({FTS_TABLE_NAME}, rowid, {columns})"
+        f" VALUES ('delete', old.id, {old_values});"
+    )
+
+    def create_trigger(event_name, *statements):
+        return (
+            f"CREATE TRIGGER {FTS_TABLE_NAME}_after_{event_name.lower()}"
+            f" AFTER {event_name} ON example BEGIN {' '.join(statements)} END"
+        )
+
+    return (
+        f"CREATE VIRTUAL TABLE {FTS_TABLE_NAME} USING fts5("
+        f" {columns}, content='example', content_rowid='id'"
+        ")",
+        create_trigger("INSERT", insert_new_row),
+        create_trigger("DELETE", delete_old_row),
+        create_trigger("UPDATE", delete_old_row, insert_new_row),
+    )
+
+
+_SQLITE_DDL_STATEMENTS_FOR_CREATION = _build_sqlite_ddl_statements_for_creation()
+
+# (
+# The triggers are dropped by SQLite itself, together with the `example` table.
+# )
+_SQLITE_DDL_STATEMENTS_FOR_DELETION = (f"DROP TABLE IF EXISTS {FTS_TABLE_NAME}",)
+
+
+for statement in _MYSQL_DDL_STATEMENTS_FOR_CREATION:
+    event.listen(
+        Example.__table__,
+        "after_create",
+        DDL(statement).execute_if(dialect="mysql"),
+    )
+
+for statement in _SQLITE_DDL_STATEMENTS_FOR_CREATION:
+    event.listen(
+        Example.__table__,
+        "after_create",
+        DDL(statement).execute_if(dialect="sqlite"),
+    )
+
+for statement in _SQLITE_DDL_STATEMENTS_FOR_DELETION:
+    event.listen(
+        Example.__table__,
+        "after_drop",
+        DDL(statement).execute_if(dialect="sqlite"),
+    )
+
+
+def include_object(object, name, type_, reflected, compare_to):
+    """
+    Prevent Alembic's autogenerate feature from proposing
+    to drop the schema objects, which are managed by this module.
+
+    (This function is meant to be passed to Flask-Migrate as `include_object`.)
+    """
+    if type_ == "index" and name == FULL_TEXT_INDEX_NAME:
+        return False
+    if type_ == "table" and name.startswith(FTS_TABLE_NAME):
+        return False
+    return True
+
+
+def apply_full_text_search(query, dialect_name, search_terms):
+    """
+    Restrict `query` (which must select from the `example` table)
+    to those rows that match at least one of the words in `search_terms`,
+    and order the result by relevance (from most relevant to least relevant).
+
+    Rows that are equally relevant are ordered from newest to oldest.
+    """
+    words = search_terms.split()
+
+    if dialect_name == "mysql":
+        qualified_columns = ", ".join("example." + c for c in _INDEXED_COLUMNS)
+        match_against = sa.text(
+            f"MATCH ({qualified_columns})"
+            " AGAINST (:search_terms IN NATURAL LANGUAGE MODE)"
+        ).bindparams(search_terms=" ".join(words))
+        return query.filter(match_against).order_by(
+            sa.desc(match_against),
+            Example.id.desc(),
+        )
+
+    if dialect_name == "sqlite":
+        # Quote each word,
+        # so that FTS5 treats it as a string (rather than as a query operator).
+        fts5_query = " OR ".join('"' + word.replace('"', '""') + '"' for word in words)
+
+        fts_table = sa.table(FTS_TABLE_NAME, sa.column("rowid"))
+        return (
+            query.join(fts_table, fts_table.c.rowid == Example.id)
+            .filter(
+                sa.text(f"{FTS_TABLE_NAME} MATCH :fts5_query").bindparams(
+                    fts5_query=fts5_query
+                )
+            )
+            .order_by(
+                # (
+                # Lower `bm25()` values indicate better matches.
+                # )
+                sa.text(f"bm25({FTS_TABLE_NAME})"),
+                Example.id.desc(),
+            )
+        )
+
+    # For any other database, fall back to (unranked) pattern matching.
+    return query.filter(
+        sa.or_(
+            *[
+                Example.__table__.c[column].like("%" + word + "%")
+                for word in words
+                for column in _INDEXED_COLUMNS
+            ]
+        )
+    ).order_by(Example.id.desc())
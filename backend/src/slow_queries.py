@@ -0,0 +1,176 @@
+"""
+A recorder of the SQL statements that take longer than a threshold to execute,
+each of which is kept (in a bounded, in-process buffer) and logged
+together with the database's plan for executing it.
+"""
+
+import collections
+import datetime
+import threading
+import time
+
+from flask import current_app, has_app_context, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+_EXPLAINABLE_STATEMENT_TYPES = ("SELECT", "INSERT", "UPDATE", "DELETE")
+
+
+class SlowQueryRecorder:
+    """
+    A Flask extension, which records every SQL statement
+    that takes at least `SLOW_QUERY_THRESHOLD_MS` milliseconds to execute,
+    together with the types of its bound parameters (but not their values),
+    the endpoint that issued it (if it was issued while handling a request),
+    and the output of `EXPLAIN` for it
+    (which is obtained on the same connection, right after the statement).
+
+    The most recent `SLOW_QUERY_BUFFER_SIZE` records are kept in memory
+    (separately within each process)
+    and can be inspected by administrators via `GET /api/admin/slow-queries`.
+
+    The extension is controlled by the `SLOW_QUERY_RECORDER_ENABLED` configuration value.
+    """
+
+    def init_app(self, app):
+        app.extensions["slow_query_recorder"] = _RecorderState(
+            app.config["SLOW_QUERY_RECORDER_ENABLED"],
+            app.config["SLOW_QUERY_THRESHOLD_MS"] / 1000,
+            app.config["SLOW_QUERY_BUFFER_SIZE"],
+        )
+
+    def records(self):
+        """Return the current application's records, the most recent one first."""
+        return current_app.extensions["slow_query_recorder"].records()
+
+    def clear(self):
+        current_app.extensions["slow_query_recorder"].clear()
+
+
+class _RecorderState:
+    def __init__(self, is_enabled, threshold_seconds, buffer_size):
+        self.is_enabled = is_enabled
+        self.threshold_seconds = threshold_seconds
+        self._lock = threading.Lock()
+        self._records = collections.deque(maxlen=buffer_size)
+
+    def add(self, record):
+        with self._lock:
+            self._records.append(record)
+
+    def records(self):
+        with self._lock:
+            return list(reversed(self._records))
+
+    def clear(self):
+        with self._lock:
+            self._records.clear()
+
+
+def _get_enabled_state():
+    if not has_app_context():
+        return None
+    state = current_app.extensions.get("slow_query_recorder")
+    if state is None or not state.is_enabled:
+        return None
+    return state
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _start_timing_statement(conn, cursor, statement, parameters, context, executemany):
+    if _get_enabled_state() is not None:
+        conn.info.setdefault("slow_query_starts", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _record_slow_statement(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get("slow_query_starts")
+    state = _get_enabled_state()
+    if not starts or state is None:
+        return
+
+    seconds = time.perf_counter() - starts.pop()
+    if seconds < state.threshold_seconds:
+        return
+
+    record = {
+        "recorded_at": datetime.datetime.utcnow().isoformat(),
+        "duration_ms": round(seconds * 1000, 3),
+        "statement": statement,
+        "parameter_types": _describe_parameters(parameters, executemany),
+        "endpoint": request.endpoint if has_request_context() else None,
+        "plan": (
+            None
+            if executemany or _is_streamed(context)
+            else _explain(conn, statement, parameters)
+        ),
+    }
+    state.add(record)
+    current_app.logger.warning(
+        "slow SQL statement (%.1f ms) issued by %s: %s; plan: %s",
+        record["duration_ms"],
+        record["endpoint"],
+        statement,
+        record["plan"],
+    )
+
+
+@event.listens_for(Engine, "handle_error")
+def _forget_failed_statement(exception_context):
+    # (No `after_cursor_execute` event follows a statement that fails.)
+    connection = exception_context.connection
+    if connection is not None:
+        starts = connection.info.get("slow_query_starts")
+        if starts:
+            starts.pop()
+
+
+def _describe_parameters(parameters, executemany):
+    """
+    Describe the "shape" of `parameters` (i.e. their types)
+    without disclosing their values.
+    """
+    if executemany:
+        return {
+            "n_parameter_sets": len(parameters),
+            "first": _describe_parameters(parameters[0], False) if parameters else None,
+        }
+    if isinstance(parameters, dict):
+        return {key: type(value).__name__ for key, value in parameters.items()}
+    return [type(value).__name__ for value in parameters or ()]
+
+
+def _is_streamed(context):
+    """
+    Return whether the statement's rows are being fetched through a server-side cursor,
+    which must be read to the end before the same connection can execute `EXPLAIN`
+    (e.g. an unbuffered cursor of PyMySQL would otherwise fail or drop the rest of the rows).
+    """
+    return context is not None and bool(
+        context.execution_options.get("stream_results", False)
+    )
+
+
+def _explain(conn, statement, parameters):
+    """
+    Return the database's plan for executing `statement`
+    as a list of dicts (one per row of the output of `EXPLAIN`),
+    or `None` if the statement cannot be explained.
+    """
+    if not statement.lstrip().upper().startswith(_EXPLAINABLE_STATEMENT_TYPES):
+        return None
+
+    prefix = "EXPLAIN QUERY PLAN " if conn.dialect.name == "sqlite" else "EXPLAIN "
+    # (The DBAPI connection is used directly,
+    # so that `EXPLAIN` doesn't trigger these event listeners itself.)
+    cursor = conn.connection.cursor()
+    try:
+        cursor.execute(prefix + statement, parameters)
+        column_names = [column[0] for column in cursor.description]
+        return [dict(zip(column_names, row)) for row in cursor.fetchall()]
+    except Exception:
+        current_app.logger.debug("failed to explain %s", statement, exc_info=True)
+        return None
+    finally:
+        cursor.close()
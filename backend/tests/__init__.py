@@ -1,16 +1,28 @@
+import contextlib
 import dataclasses
 import json
 import unittest
+from unittest.mock import patch
 import datetime as dt
 import jwt
 
+from configuration import TestingConfig
 from src import db, create_app
+from src.query_counter import count_queries
 from src.constants import EMAIL_ADDRESS_CONFIRMATION
 
 
 class TestBase(unittest.TestCase):
+    # The configuration values, which differ from those of `TestingConfig`
+    # for the tests of a subclass
+    # (e.g. in order to turn on a feature that those tests exercise).
+    configuration_overrides = {}
+
     def setUp(self):
-        self.app = create_app(name_of_configuration="testing")
+        with contextlib.ExitStack() as stack:
+            for name, value in self.configuration_overrides.items():
+                stack.enter_context(patch.object(TestingConfig, name, value))
+            self.app = create_app(name_of_configuration="testing")
 
         self.app_context = self.app.app_context()
         self.app_context.push()
@@ -25,6 +37,23 @@ class TestBase(unittest.TestCase):
 
         self.app_context.pop()
 
+    @contextlib.contextmanager
+    def assertMaxQueries(self, max_n_queries):
+        """
+        Assert that no more than `max_n_queries` SQL statements are issued
+        within the block
+        (e.g. while the test client makes a request to an endpoint).
+        """
+        with count_queries() as query_log:
+            yield query_log
+
+        self.assertLessEqual(
+            len(query_log),
+            max_n_queries,
+            msg="too many SQL statements were issued:\n"
+            + "\n".join(query_log.statements),
+        )
+
 
 @dataclasses.dataclass(frozen=True)
 class UserResource:
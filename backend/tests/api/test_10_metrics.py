@@ -0,0 +1,168 @@
+import base64
+import os
+import subprocess
+import sys
+import tempfile
+from unittest.mock import patch
+
+from prometheus_client import REGISTRY
+
+from configuration import TestingConfig
+from src import create_app
+from tests import TestBasePlusUtilities
+
+
+class Test_01_RequestMetrics(TestBasePlusUtilities):
+    configuration_overrides = {
+        "METRICS_ENABLED": True,
+    }
+
+    def util_sample(self, name, **labels):
+        return REGISTRY.get_sample_value(name, labels) or 0.0
+
+    def util_basic_auth(self, email, password):
+        b_a_c = base64.b64encode(f"{email}:{password}".encode("utf-8"))
+        return "Basic " + b_a_c.decode("utf-8")
+
+    def test_1_expose_metrics(self):
+        # Arrange.
+        labels = {"method": "GET", "endpoint": "api_blueprint.get_users"}
+        n_before = self.util_sample("http_request_duration_seconds_count", **labels)
+
+        # Act.
+        rv_1 = self.client.get("/api/users")
+        rv_2 = self.client.get("/metrics")
+
+        # Assert.
+        self.assertEqual(rv_1.status_code, 200)
+        self.assertEqual(rv_2.status_code, 200)
+        self.assertEqual(rv_2.mimetype, "text/plain")
+        body = rv_2.get_data(as_text=True)
+        self.assertIn("# TYPE http_request_duration_seconds histogram", body)
+        self.assertIn("# TYPE outbox_dispatch_queue_depth gauge", body)
+        self.assertIn("# TYPE outbox_send_duration_seconds histogram", body)
+        self.assertIn("# TYPE db_pool_checkout_wait_seconds histogram", body)
+        self.assertIn(
+            'http_requests_total{endpoint="api_blueprint.get_users",method="GET",'
+            'status="200"}',
+            body,
+        )
+        self.assertEqual(
+            self.util_sample("http_request_duration_seconds_count", **labels),
+            n_before + 1,
+        )
+        self.assertGreater(
+            self.util_sample("http_request_db_duration_seconds_sum", **labels), 0.0
+        )
+
+    def test_2_sizes_and_status_codes(self):
+        # Arrange.
+        labels = {"method": "POST", "endpoint": "api_blueprint.create_user"}
+        size_before = self.util_sample("http_request_size_bytes_sum", **labels)
+        n_400_before = self.util_sample("http_requests_total", status="400", **labels)
+
+        # Act.
+        rv = self.client.post(
+            "/api/users",
+            data='{"username": "jd"}',
+            headers={"Content-Type": "application/json"},
+        )
+
+        # Assert.
+        self.assertEqual(rv.status_code, 400)
+        self.assertEqual(
+            self.util_sample("http_request_size_bytes_sum", **labels),
+            size_before + len(b'{"username": "jd"}'),
+        )
+        self.assertEqual(
+            self.util_sample("http_requests_total", status="400", **labels),
+            n_400_before + 1,
+        )
+        self.assertGreater(
+            self.util_sample("http_response_size_bytes_sum", **labels), 0.0
+        )
+
+    def test_3_auth_attempts(self):
+        # Arrange.
+        self.util_create_user(
+            "jd",
+            "john.doe@protonmail.com",
+            "123",
+            should_confirm_email_address=True,
+        )
+        rv = self.client.post(
+            "/api/tokens",
+            headers={
+                "Authorization": self.util_basic_auth("john.doe@protonmail.com", "123")
+            },
+        )
+        token = rv.json["token"]
+        scheme_and_outcome_pairs = (
+            ("basic", "wrong_password"),
+            ("basic", "unknown_user"),
+            ("bearer", "invalid"),
+            ("bearer", "success"),
+        )
+        n_before = [
+            self.util_sample("auth_attempts_total", scheme=scheme, outcome=outcome)
+            for scheme, outcome in scheme_and_outcome_pairs
+        ]
+
+        # Act.
+        for email, password in (
+            ("john.doe@protonmail.com", "wrong-password"),
+            ("mary.smith@protonmail.com", "456"),
+        ):
+            rv = self.client.post(
+                "/api/tokens",
+                headers={"Authorization": self.util_basic_auth(email, password)},
+            )
+            self.assertEqual(rv.status_code, 401)
+        for t in ("not-a-token", token):
+            self.client.get(
+                "/api/examples",
+                headers={"Authorization": "Bearer " + t},
+            )
+
+        # Assert.
+        n_after = [
+            self.util_sample("auth_attempts_total", scheme=scheme, outcome=outcome)
+            for scheme, outcome in scheme_and_outcome_pairs
+        ]
+        self.assertEqual(
+            [after - before for before, after in zip(n_before, n_after)],
+            [1, 1, 1, 1],
+        )
+
+    def test_4_disabled(self):
+        # Arrange.
+        with patch.object(TestingConfig, "METRICS_ENABLED", False):
+            app = create_app(name_of_configuration="testing")
+
+        # Act.
+        rv = app.test_client().get("/metrics")
+
+        # Assert.
+        self.assertEqual(rv.status_code, 404)
+
+    def test_5_aggregate_metrics_of_several_processes(self):
+        # Arrange.
+        code = (
+            "from src.instrumentation import AUTH_ATTEMPTS;"
+            "AUTH_ATTEMPTS.labels('bearer', 'expired').inc()"
+        )
+        with tempfile.TemporaryDirectory() as multiproc_dir:
+            env = {**os.environ, "PROMETHEUS_MULTIPROC_DIR": multiproc_dir}
+            for _ in range(2):
+                subprocess.run([sys.executable, "-c", code], env=env, check=True)
+
+            # Act.
+            with patch.dict(os.environ, {"PROMETHEUS_MULTIPROC_DIR": multiproc_dir}):
+                rv = self.client.get("/metrics")
+
+        # Assert.
+        self.assertEqual(rv.status_code, 200)
+        self.assertIn(
+            'auth_attempts_total{outcome="expired",scheme="bearer"} 2.0',
+            rv.get_data(as_text=True),
+        )
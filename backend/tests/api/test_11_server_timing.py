@@ -0,0 +1,107 @@
+import base64
+import json
+from unittest.mock import patch
+
+from configuration import TestingConfig
+from src import create_app, verified_credentials_cache
+from src.server_timing import timed
+from tests import UserResource
+from tests.api.test_4_examples import TestBaseForExampleResources_2
+
+
+class Test_01_ServerTiming(TestBaseForExampleResources_2):
+    configuration_overrides = {
+        "SERVER_TIMING_ENABLED": True,
+    }
+
+    def setUp(self):
+        super().setUp()
+
+        self._u_r_1: UserResource = self.util_create_user(
+            "jd",
+            "john.doe@protonmail.com",
+            "123",
+        )
+        self.util_create_example(
+            self._u_r_1.token,
+            "Finnish",
+            "kieli",
+            "Mitä kieltä sinä puhut?",
+            "What languages do you speak?",
+        )
+
+    def util_parse_server_timing(self, rv):
+        durations = {}
+        for metric in rv.headers["Server-Timing"].split(", "):
+            phase, duration = metric.split(";dur=")
+            durations[phase] = float(duration)
+        return durations
+
+    def test_1_get_examples(self):
+        for url in ("/api/examples", "/api/examples?after="):
+            # Act.
+            rv = self.client.get(
+                url,
+                headers={"Authorization": "Bearer " + self._u_r_1.token},
+            )
+
+            # Assert.
+            self.assertEqual(rv.status_code, 200)
+            durations = self.util_parse_server_timing(rv)
+            self.assertEqual(
+                set(durations),
+                {"jwt", "user", "query", "serialize", "json", "db", "total"},
+            )
+            self.assertTrue(all(ms >= 0.0 for ms in durations.values()))
+            self.assertGreater(durations["db"], 0.0)
+            self.assertGreaterEqual(durations["total"], durations["db"])
+
+    def test_2_issue_token(self):
+        # Arrange.
+        # (Make sure that the credentials are verified by means of bcrypt.)
+        verified_credentials_cache.backend.clear()
+
+        # Act.
+        b_a_c = base64.b64encode(b"john.doe@protonmail.com:123").decode("utf-8")
+        rv = self.client.post(
+            "/api/tokens",
+            headers={"Authorization": "Basic " + b_a_c},
+        )
+
+        # Assert.
+        self.assertEqual(rv.status_code, 200)
+        self.assertIn("bcrypt", self.util_parse_server_timing(rv))
+
+    def test_3_log_line(self):
+        # Act.
+        with self.assertLogs(self.app.logger, level="INFO") as logs:
+            rv = self.client.get(
+                "/api/examples?new_word=kieli",
+                headers={"Authorization": "Bearer " + self._u_r_1.token},
+            )
+
+        # Assert.
+        self.assertEqual(rv.status_code, 200)
+        log_line = json.loads(logs.records[-1].getMessage())
+        self.assertEqual(log_line["event"], "server_timing")
+        self.assertEqual(log_line["method"], "GET")
+        self.assertEqual(log_line["endpoint"], "api_blueprint.get_examples")
+        self.assertEqual(log_line["status"], 200)
+        self.assertEqual(
+            log_line["durations_ms"],
+            self.util_parse_server_timing(rv),
+        )
+
+    def test_4_disabled(self):
+        # Arrange.
+        with patch.object(TestingConfig, "SERVER_TIMING_ENABLED", False):
+            app = create_app(name_of_configuration="testing")
+
+        # Act.
+        rv = app.test_client().get("/api/users")
+        with timed("phase"):
+            pass
+
+        # Assert.
+        self.assertEqual(rv.status_code, 200)
+        self.assertNotIn("Server-Timing", rv.headers)
@@ -0,0 +1,116 @@
+import json
+
+from src import db, User, Example
+from src.query_counter import count_queries
+from tests import UserResource
+from tests.api.test_4_examples import TestBaseForExampleResources_2
+
+
+class Test_01_QueryCounter(TestBaseForExampleResources_2):
+    configuration_overrides = {
+        "QUERY_COUNTER_ENABLED": True,
+    }
+
+    def setUp(self):
+        super().setUp()
+
+        self._u_r_1: UserResource = self.util_create_user(
+            "jd",
+            "john.doe@protonmail.com",
+            "123",
+        )
+        self._u_r_2: UserResource = self.util_create_user(
+            "ms",
+            "mary.smith@protonmail.com",
+            "456",
+        )
+        for u_r in (self._u_r_1, self._u_r_2):
+            self.util_create_example(u_r.token, "Finnish", "kieli", "-", None)
+
+    def util_get(self, url, token=None):
+        # (Make the request start out with an empty identity map,
+        # as it would outside of the test suite.)
+        db.session.expunge_all()
+        return self.client.get(
+            url,
+            headers={"Authorization": "Bearer " + (token or self._u_r_1.token)},
+        )
+
+    def test_1_log_counts(self):
+        # Act.
+        with self.assertLogs(self.app.logger, level="INFO") as logs:
+            rv = self.util_get("/api/users")
+
+        # Assert.
+        self.assertEqual(rv.status_code, 200)
+        log_lines = [
+            json.loads(record.getMessage())
+            for record in logs.records
+            if "query_count" in record.getMessage()
+        ]
+        self.assertEqual(len(log_lines), 1)
+        self.assertEqual(log_lines[0]["endpoint"], "api_blueprint.get_users")
+        self.assertEqual(log_lines[0]["n_statements"], 2)
+        self.assertEqual(log_lines[0]["n_distinct_statements"], 2)
+        self.assertGreaterEqual(log_lines[0]["db_ms"], 0.0)
+
+    def test_2_warn_about_repeated_statements(self):
+        # Arrange.
+        self.app.config["QUERY_COUNTER_REPEAT_THRESHOLD"] = 1
+
+        # Act.
+        with self.assertLogs(self.app.logger, level="WARNING") as logs:
+            rv = self.util_get("/api/users")
+
+        # Assert.
+        self.assertEqual(rv.status_code, 200)
+        self.assertEqual(len(logs.records), 2)
+        self.assertIn(
+            "the same statement was issued 1 times while handling"
+            " GET api_blueprint.get_users",
+            logs.records[0].getMessage(),
+        )
+
+    def test_3_detect_n_plus_1_queries(self):
+        # Act.
+        with count_queries() as query_log:
+            for u in User.query.all():
+                Example.query.filter_by(user_id=u.id).all()
+
+        # Assert.
+        self.assertEqual(len(query_log), 3)
+        self.assertGreaterEqual(query_log.seconds, 0.0)
+        [(statement, n)] = query_log.repeated_statements().items()
+        self.assertIn("FROM example", statement)
+        self.assertEqual(n, 2)
+
+    def test_4_max_queries_per_endpoint(self):
+        for url, max_n_queries in (
+            # (authentication, `ETag`, page of results)
+            ("/api/examples", 3),
+            # (authentication, `ETag`, count of the filtered results, page of results)
+            ("/api/examples?new_word=kiel&per_page=1", 4),
+            # (authentication, the `Example` itself)
+            ("/api/examples/1", 2),
+            # (count, page of results)
+            ("/api/users?page=2&per_page=1", 2),
+            # (the `User` itself)
+            ("/api/users/2", 1),
+            # (authentication)
+            ("/api/user-profile", 1),
+        ):
+            with self.subTest(url=url):
+                with self.assertMaxQueries(max_n_queries):
+                    rv = self.util_get(url)
+
+                self.assertEqual(rv.status_code, 200)
+
+    def test_5_assert_max_queries(self):
+        # Act.
+        with self.assertRaises(AssertionError) as context:
+            with self.assertMaxQueries(0):
+                User.query.all()
+
+        # Assert.
+        self.assertIn("too many SQL statements were issued", str(context.exception))
+        self.assertIn("FROM user", str(context.exception))
@@ -0,0 +1,171 @@
+import json
+
+from src import slow_query_recorder, User
+from tests import UserResource
+from tests.api.test_4_examples import TestBaseForExampleResources_2
+
+
+class Test_01_SlowQueryRecorder(TestBaseForExampleResources_2):
+    configuration_overrides = {
+        "SLOW_QUERY_RECORDER_ENABLED": True,
+    }
+
+    def setUp(self):
+        super().setUp()
+
+        self.app.config["ADMINISTRATOR_EMAIL_ADDRESSES"] = ["john.doe@protonmail.com"]
+        self._u_r_1: UserResource = self.util_create_user(
+            "jd",
+            "john.doe@protonmail.com",
+            "123",
+        )
+        self._u_r_2: UserResource = self.util_create_user(
+            "ms",
+            "mary.smith@protonmail.com",
+            "456",
+        )
+        self.util_create_example(self._u_r_2.token, "Finnish", "kieli", "-", None)
+
+        # Record every statement.
+        self.app.config["SLOW_QUERY_THRESHOLD_MS"] = 0
+        slow_query_recorder.init_app(self.app)
+
+    def util_get_slow_queries(self, token=None):
+        rv = self.client.get(
+            "/api/admin/slow-queries",
+            headers={"Authorization": "Bearer " + (token or self._u_r_1.token)},
+        )
+        return rv.status_code, json.loads(rv.get_data(as_text=True))
+
+    def test_1_record_statements_with_plans(self):
+        # Arrange.
+        rv = self.client.get(
+            "/api/examples?new_word=kiel",
+            headers={"Authorization": "Bearer " + self._u_r_2.token},
+        )
+        self.assertEqual(rv.status_code, 200)
+
+        # Act.
+        status_code, body = self.util_get_slow_queries()
+
+        # Assert.
+        self.assertEqual(status_code, 200)
+        self.assertEqual(body["_meta"]["total_items"], len(body["items"]))
+        [record] = [
+            r
+            for r in body["items"]
+            if r["statement"].startswith("SELECT example.id")
+            and r["endpoint"] == "api_blueprint.get_examples"
+        ]
+        self.assertGreaterEqual(record["duration_ms"], 0.0)
+        self.assertIn("int", record["parameter_types"])
+        self.assertIn("str", record["parameter_types"])
+        self.assertTrue(
+            any("ix_example_user_id" in step["detail"] for step in record["plan"]),
+            msg=record["plan"],
+        )
+        # (The most recent record comes first.)
+        self.assertEqual(body["items"][0]["endpoint"], "api_blueprint.get_slow_queries")
+
+    def test_2_record_batches(self):
+        # Act.
+        rv = self.client.post(
+            "/api/examples:batch",
+            json=[{"new_word": "osata", "content": "-"}] * 2,
+            headers={"Authorization": "Bearer " + self._u_r_1.token},
+        )
+        self.assertEqual(rv.status_code, 200)
+
+        # Assert.
+        records = slow_query_recorder.records()
+        inserts = [r for r in records if r["statement"].startswith("INSERT INTO")]
+        self.assertNotEqual(inserts, [])
+        self.assertTrue(all(r["endpoint"] is not None for r in inserts))
+
+    def test_3_do_not_explain_streamed_statements(self):
+        # Act.
+        rv = self.client.get(
+            "/api/examples/export",
+            headers={"Authorization": "Bearer " + self._u_r_2.token},
+        )
+
+        # Assert.
+        self.assertEqual(rv.status_code, 200)
+        lines = rv.get_data(as_text=True).splitlines()
+        self.assertEqual([json.loads(line)["new_word"] for line in lines], ["kieli"])
+
+        [record] = [
+            r
+            for r in slow_query_recorder.records()
+            if r["statement"].startswith("SELECT example.id")
+        ]
+        self.assertEqual(record["endpoint"], "api_blueprint.export_examples")
+        self.assertIsNone(record["plan"])
+
+    def test_4_threshold(self):
+        # Arrange.
+        self.app.config["SLOW_QUERY_THRESHOLD_MS"] = 60_000
+        slow_query_recorder.init_app(self.app)
+
+        # Act.
+        status_code, body = self.util_get_slow_queries()
+
+        # Assert.
+        self.assertEqual(status_code, 200)
+        self.assertEqual(body["items"], [])
+
+    def test_5_bounded_buffer(self):
+        # Arrange.
+        self.app.config["SLOW_QUERY_BUFFER_SIZE"] = 2
+        slow_query_recorder.init_app(self.app)
+
+        # Act.
+        for _ in range(3):
+            User.query.all()
+
+        # Assert.
+        records = slow_query_recorder.records()
+        self.assertEqual(len(records), 2)
+        self.assertTrue(all(r["endpoint"] is None for r in records))
+
+    def test_6_clear(self):
+        # Arrange.
+        self.util_get_slow_queries()
+        self.assertNotEqual(slow_query_recorder.records(), [])
+
+        # Act.
+        rv = self.client.delete(
+            "/api/admin/slow-queries",
+            headers={"Authorization": "Bearer " + self._u_r_1.token},
+        )
+
+        # Assert.
+        self.assertEqual(rv.status_code, 204)
+        self.assertEqual(slow_query_recorder.records(), [])
+
+    def test_7_administrators_only(self):
+        # Act.
+        status_code_1, body_1 = self.util_get_slow_queries(self._u_r_2.token)
+        self.app.config["ADMINISTRATOR_EMAIL_ADDRESSES"] = []
+        status_code_2, _ = self.util_get_slow_queries()
+
+        # Assert.
+        self.assertEqual(status_code_1, 403)
+        self.assertEqual(
+            body_1,
+            {
+                "error": "Forbidden",
+                "message": "Your request requires administrator privileges.",
+            },
+        )
+        self.assertEqual(status_code_2, 403)
+
+    def test_8_administrator_with_stateless_token(self):
+        # Arrange.
+        self.app.config["STATELESS_TOKEN_AUTH_ENABLED"] = True
+
+        # Act.
+        status_code, _ = self.util_get_slow_queries()
+
+        # Assert.
+        self.assertEqual(status_code, 200)
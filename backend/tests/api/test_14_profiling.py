@@ -0,0 +1,172 @@
+import base64
+import json
+import os
+import pstats
+import shutil
+import tempfile
+
+from tests import UserResource
+from tests.api.test_4_examples import TestBaseForExampleResources_2
+
+
+class Test_01_RequestProfiler(TestBaseForExampleResources_2):
+    configuration_overrides = {
+        "PROFILER_ENABLED": True,
+    }
+
+    def setUp(self):
+        super().setUp()
+
+        self._profiler_directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self._profiler_directory)
+        self.app.config["PROFILER_DIRECTORY"] = self._profiler_directory
+
+        self.app.config["ADMINISTRATOR_EMAIL_ADDRESSES"] = ["john.doe@protonmail.com"]
+        self._u_r_1: UserResource = self.util_create_user(
+            "jd",
+            "john.doe@protonmail.com",
+            "123",
+        )
+        self._u_r_2: UserResource = self.util_create_user(
+            "ms",
+            "mary.smith@protonmail.com",
+            "456",
+        )
+
+    def util_load_profile(self, filename):
+        return pstats.Stats(os.path.join(self._profiler_directory, filename))
+
+    def util_n_calls(self, stats, function_name):
+        return sum(
+            n_calls
+            for (_, _, name), (_, n_calls, _, _, _) in stats.stats.items()
+            if name == function_name
+        )
+
+    def test_1_profile_on_demand(self):
+        # Act.
+        rv = self.client.post(
+            "/api/users",
+            json={
+                "username": "jb",
+                "email": "jane.brown@protonmail.com",
+                "password": "789",
+            },
+            headers={"X-Profile-Token": self._u_r_1.token},
+        )
+
+        # Assert.
+        self.assertEqual(rv.status_code, 201)
+        filename = rv.headers["X-Profile"]
+        self.assertIn("api_blueprint.create_user", filename)
+        stats = self.util_load_profile(filename)
+        self.assertEqual(self.util_n_calls(stats, "create_user"), 1)
+        self.assertGreaterEqual(self.util_n_calls(stats, "generate_password_hash"), 1)
+
+    def test_2_profile_authenticated_request(self):
+        # Arrange.
+        credentials = base64.b64encode(b"mary.smith@protonmail.com:456").decode("utf-8")
+
+        # Act.
+        rv = self.client.post(
+            "/api/tokens",
+            headers={
+                "Authorization": "Basic " + credentials,
+                "X-Profile-Token": self._u_r_1.token,
+            },
+        )
+
+        # Assert.
+        self.assertEqual(rv.status_code, 200)
+        stats = self.util_load_profile(rv.headers["X-Profile"])
+        self.assertEqual(self.util_n_calls(stats, "verify_password"), 1)
+
+    def test_3_profile_on_demand_for_administrators_only(self):
+        for token in (self._u_r_2.token, "not-a-token"):
+            with self.subTest(token=token):
+                # Act.
+                rv = self.client.get(
+                    "/api/examples",
+                    headers={
+                        "Authorization": "Bearer " + self._u_r_2.token,
+                        "X-Profile-Token": token,
+                    },
+                )
+
+                # Assert.
+                self.assertEqual(rv.status_code, 403)
+                self.assertEqual(
+                    json.loads(rv.get_data(as_text=True)),
+                    {
+                        "error": "Forbidden",
+                        "message": (
+                            "Profiling a request requires administrator privileges."
+                        ),
+                    },
+                )
+                self.assertEqual(os.listdir(self._profiler_directory), [])
+
+    def test_4_do_not_profile_by_default(self):
+        # Act.
+        rv = self.client.get(
+            "/api/examples",
+            headers={"Authorization": "Bearer " + self._u_r_2.token},
+        )
+
+        # Assert.
+        self.assertEqual(rv.status_code, 200)
+        self.assertNotIn("X-Profile", rv.headers)
+        self.assertEqual(os.listdir(self._profiler_directory), [])
+
+    def test_5_aggregate_sampled_profiles(self):
+        # Arrange.
+        self.app.config["PROFILER_SAMPLE_RATE"] = 1.0
+
+        # Act.
+        for _ in range(2):
+            rv = self.client.get(
+                "/api/examples",
+                headers={"Authorization": "Bearer " + self._u_r_2.token},
+            )
+            self.assertEqual(rv.status_code, 200)
+
+        # Assert.
+        self.assertNotIn("X-Profile", rv.headers)
+        filename = f"sampled-api_blueprint.get_examples-{os.getpid()}.prof"
+        self.assertEqual(os.listdir(self._profiler_directory), [filename])
+        stats = self.util_load_profile(filename)
+        self.assertEqual(self.util_n_calls(stats, "get_examples"), 2)
+
+    def test_6_download_profiles(self):
+        # Arrange.
+        rv = self.client.get(
+            "/api/user-profile",
+            headers={
+                "Authorization": "Bearer " + self._u_r_2.token,
+                "X-Profile-Token": self._u_r_1.token,
+            },
+        )
+        filename = rv.headers["X-Profile"]
+        headers = {"Authorization": "Bearer " + self._u_r_1.token}
+
+        # Act.
+        rv_1 = self.client.get("/api/admin/profiles", headers=headers)
+        rv_2 = self.client.get("/api/admin/profiles/" + filename, headers=headers)
+        rv_3 = self.client.get("/api/admin/profiles/missing.prof", headers=headers)
+        rv_4 = self.client.get(
+            "/api/admin/profiles",
+            headers={"Authorization": "Bearer " + self._u_r_2.token},
+        )
+
+        # Assert.
+        self.assertEqual(rv_1.status_code, 200)
+        body_1 = json.loads(rv_1.get_data(as_text=True))
+        self.assertEqual([item["filename"] for item in body_1["items"]], [filename])
+        self.assertEqual(body_1["_meta"], {"total_items": 1})
+
+        self.assertEqual(rv_2.status_code, 200)
+        with open(os.path.join(self._profiler_directory, filename), "rb") as f:
+            self.assertEqual(rv_2.get_data(), f.read())
+
+        self.assertEqual(rv_3.status_code, 404)
+        self.assertEqual(rv_4.status_code, 403)
@@ -5,8 +5,9 @@ import jwt
 import datetime as dt
 
 from flask import url_for, current_app
+from sqlalchemy import event
 
-from src import flsk_bcrpt, User
+from src import db, flsk_bcrpt, User
 from tests import TestBase, TestBasePlusUtilities, UserResource
 from src.constants import EMAIL_ADDRESS_CONFIRMATION, ACCESS, PASSWORD_RESET
 
@@ -583,6 +584,177 @@ class Test_03_GetUsers(TestBasePlusUtilities):
             },
         )
 
+    def test_4_cursor_pagination(self):
+        """
+        Ensure that a list of `User` resources can be paged through by means of cursors.
+        """
+
+        # Arrange.
+        for username, email, password in (
+            ("jd", "john.doe@protonmail.com", "123"),
+            ("ms", "mary.smith@protonmail.com", "456"),
+            ("ab", "alice.brown@protonmail.com", "789"),
+        ):
+            __ = self.util_create_user(
+                username,
+                email,
+                password,
+                should_confirm_email_address=True,
+            )
+
+        # Act.
+        rv_1 = self.client.get("/api/users?per_page=2&after=&include_total=false")
+
+        body_str_1 = rv_1.get_data(as_text=True)
+        body_1 = json.loads(body_str_1)
+
+        rv_2 = self.client.get(body_1["_links"]["next"])
+
+        body_str_2 = rv_2.get_data(as_text=True)
+        body_2 = json.loads(body_str_2)
+
+        # Assert.
+        self.assertEqual(rv_1.status_code, 200)
+        self.assertEqual(
+            body_1["items"],
+            [
+                {"id": 1, "username": "jd"},
+                {"id": 2, "username": "ms"},
+            ],
+        )
+        self.assertEqual(
+            body_1["_meta"],
+            {
+                "total_items": None,
+                "per_page": 2,
+            },
+        )
+
+        self.assertEqual(rv_2.status_code, 200)
+        self.assertEqual(
+            body_2["items"],
+            [
+                {"id": 3, "username": "ab"},
+            ],
+        )
+        self.assertEqual(body_2["_links"]["next"], None)
+
+    def test_5_count_is_cached(self):
+        """
+        Ensure that the confirmed User resources are counted once for all pages,
+        and counted anew as soon as another email address has been confirmed.
+        """
+
+        # Arrange.
+        for username, email, password in (
+            ("jd", "john.doe@protonmail.com", "123"),
+            ("ms", "mary.smith@protonmail.com", "456"),
+        ):
+            __ = self.util_create_user(
+                username,
+                email,
+                password,
+                should_confirm_email_address=True,
+            )
+        __ = self.util_create_user("ab", "alice.brown@protonmail.com", "789")
+
+        statements = []
+
+        def before_cursor_execute(
+            conn, cursor, statement, parameters, context, executemany
+        ):
+            if "count(" in statement:
+                statements.append(statement)
+
+        # Act.
+        event.listen(db.engine, "before_cursor_execute", before_cursor_execute)
+        try:
+            rv_1 = self.client.get("/api/users?per_page=1&page=1")
+            rv_2 = self.client.get("/api/users?per_page=1&page=2")
+            statements_1, statements[:] = statements[:], []
+
+            self.util_confirm_email_address(3)
+            rv_3 = self.client.get("/api/users?per_page=1&page=1")
+            statements_2 = statements[:]
+        finally:
+            event.remove(db.engine, "before_cursor_execute", before_cursor_execute)
+
+        # Assert.
+        self.assertEqual(rv_1.json["_meta"]["total_items"], 2)
+        self.assertEqual(rv_2.json["_meta"]["total_items"], 2)
+        self.assertEqual(len(statements_1), 1)
+
+        self.assertEqual(rv_3.json["_meta"]["total_items"], 3)
+        self.assertEqual(len(statements_2), 1)
+
+    def test_6_out_of_range_pagination_parameters(self):
+        """
+        Ensure that out-of-range values of `page` and `per_page` are brought into range
+        instead of producing a negative `LIMIT` or `OFFSET`
+        (which SQLite tolerates, but MySQL rejects).
+        """
+
+        # Arrange.
+        for username, email, password in (
+            ("jd", "john.doe@protonmail.com", "123"),
+            ("ms", "mary.smith@protonmail.com", "456"),
+        ):
+            __ = self.util_create_user(
+                username,
+                email,
+                password,
+                should_confirm_email_address=True,
+            )
+
+        parameters_of_statements = []
+
+        def before_cursor_execute(
+            conn, cursor, statement, parameters, context, executemany
+        ):
+            if "LIMIT" in statement:
+                parameters_of_statements.append(parameters)
+
+        for query_string, expected_meta in (
+            ("page=0&per_page=-5", {"page": 1, "per_page": 1}),
+            ("page=-3&per_page=0", {"page": 1, "per_page": 1}),
+            ("page=1&per_page=1000", {"page": 1, "per_page": 100}),
+        ):
+            for include_total in ("true", "false"):
+                with self.subTest(
+                    query_string=query_string, include_total=include_total
+                ):
+                    # Act.
+                    parameters_of_statements.clear()
+                    event.listen(
+                        db.engine, "before_cursor_execute", before_cursor_execute
+                    )
+                    try:
+                        rv = self.client.get(
+                            f"/api/users?{query_string}&include_total={include_total}"
+                        )
+                    finally:
+                        event.remove(
+                            db.engine, "before_cursor_execute", before_cursor_execute
+                        )
+
+                    # Assert.
+                    self.assertEqual(rv.status_code, 200)
+                    meta = rv.json["_meta"]
+                    self.assertEqual(
+                        {"page": meta["page"], "per_page": meta["per_page"]},
+                        expected_meta,
+                    )
+                    self.assertNotEqual(parameters_of_statements, [])
+                    for parameters in parameters_of_statements:
+                        self.assertTrue(
+                            all(
+                                value >= 0
+                                for value in parameters
+                                if isinstance(value, int)
+                            ),
+                            msg=parameters,
+                        )
+
 
 class Test_04_GetUser(TestBasePlusUtilities):
     """Test the request responsible for getting one specific User resource."""
@@ -677,6 +849,73 @@ class Test_04_GetUser(TestBasePlusUtilities):
             },
         )
 
+    def test_4_conditional_request(self):
+        """
+        Ensure that
+        getting a User resource with an `If-None-Match` header,
+        which matches the resource's current `ETag`, returns a 304.
+        """
+
+        # Arrange.
+        self.util_create_user(
+            "jd",
+            "john.doe@protonmail.com",
+            "123",
+            should_confirm_email_address=True,
+        )
+        etag, _ = self.client.get("/api/users/1").get_etag()
+
+        # Act.
+        rv_1 = self.client.get("/api/users/1", headers={"If-None-Match": f'"{etag}"'})
+        rv_2 = self.client.get("/api/users/1", headers={"If-None-Match": '"outdated"'})
+
+        # Assert.
+        self.assertEqual(rv_1.status_code, 304)
+        self.assertEqual(rv_1.get_data(), b"")
+        self.assertEqual(rv_2.status_code, 200)
+        self.assertEqual(rv_2.get_etag(), (etag, False))
+
+    def test_5_conditional_request_after_edit(self):
+        """
+        Ensure that
+        a conditional request is answered without serializing the User resource,
+        and that editing the User resource changes its `ETag`.
+        """
+
+        # Arrange.
+        self.util_create_user(
+            "jd",
+            "john.doe@protonmail.com",
+            "123",
+            should_confirm_email_address=True,
+        )
+        etag, _ = self.client.get("/api/users/1").get_etag()
+
+        # Act.
+        with patch.object(User, "to_dict") as to_dict_mock:
+            rv_1 = self.client.get(
+                "/api/users/1", headers={"If-None-Match": f'"{etag}"'}
+            )
+
+        b_a_c = base64.b64encode(b"john.doe@protonmail.com:123").decode("utf-8")
+        rv = self.client.put(
+            "/api/users/1",
+            json={"username": "JD"},
+            headers={"Authorization": "Basic " + b_a_c},
+        )
+        self.assertEqual(rv.status_code, 200)
+
+        rv_2 = self.client.get("/api/users/1", headers={"If-None-Match": f'"{etag}"'})
+
+        # Assert.
+        self.assertEqual(rv_1.status_code, 304)
+        to_dict_mock.assert_not_called()
+        self.assertEqual(rv_2.status_code, 200)
+        self.assertEqual(
+            json.loads(rv_2.get_data(as_text=True)), {"id": 1, "username": "JD"}
+        )
+        self.assertNotEqual(rv_2.get_etag(), (etag, False))
+
 
 class Test_05_EditUser(TestBasePlusUtilities):
     """Test the request responsible for editing a specific User resource."""
@@ -1,10 +1,14 @@
 import json
+from unittest.mock import patch
 import base64
+import hmac
 import datetime as dt
 import jwt
 
 from flask import current_app
 
+from src import db, flsk_bcrpt, verified_credentials_cache, User
+from src.auth import _compute_credentials_digest
 from tests import TestBasePlusUtilities, UserResource
 from src.constants import EMAIL_ADDRESS_CONFIRMATION, ACCESS, PASSWORD_RESET
 
@@ -38,6 +42,8 @@ class Test_01_IssueToken(TestBasePlusUtilities):
             "exp": expiration_timestamp_for_token,
             "purpose": ACCESS,
             "user_id": self._u_r.id,
+            "username": self._u_r.username,
+            "token_version": 0,
         }
         token = jwt.encode(
             token_payload,
@@ -221,6 +227,128 @@ class Test_01_IssueToken(TestBasePlusUtilities):
             },
         )
 
+    def _util_issue_token(self, email, password):
+        basic_auth_credentials = f"{email}:{password}"
+        b_a_c = base64.b64encode(basic_auth_credentials.encode("utf-8")).decode("utf-8")
+        return self.client.post(
+            "/api/tokens",
+            headers={"Authorization": "Basic " + b_a_c},
+        )
+
+    def test_5_verified_credentials_are_cached(self):
+        """
+        Ensure that, once a set of Basic Auth credentials has been verified,
+        subsequent requests that provide the same credentials
+        are authenticated without re-running bcrypt.
+        """
+
+        # Arrange.
+        __ = self.util_confirm_email_address(self._u_r.id)
+
+        with patch(
+            "src.auth.flsk_bcrpt.check_password_hash",
+            wraps=flsk_bcrpt.check_password_hash,
+        ) as mock_4_check_password_hash, patch(
+            "src.auth.hmac.compare_digest", wraps=hmac.compare_digest
+        ) as mock_4_compare_digest:
+            # Act.
+            rv_1 = self._util_issue_token(self._u_r.email, self._u_r.password)
+            rv_2 = self._util_issue_token(self._u_r.email, self._u_r.password)
+            rv_3 = self._util_issue_token(self._u_r.email, "wrong-password")
+
+            # Assert.
+            self.assertEqual(rv_1.status_code, 200)
+            self.assertEqual(rv_2.status_code, 200)
+            self.assertEqual(rv_3.status_code, 401)
+            # (The 2nd request is served from the cache,
+            # whereas the 3rd request has to be checked by bcrypt.)
+            self.assertEqual(mock_4_check_password_hash.call_count, 2)
+            # (The cached digest is compared in constant time.)
+            user = User.query.get(self._u_r.id)
+            credentials_digest = _compute_credentials_digest(
+                self._u_r.email, self._u_r.password, user.password_hash
+            )
+            mock_4_compare_digest.assert_any_call(
+                credentials_digest, credentials_digest
+            )
+
+        # Act.
+        self.app.config["VERIFIED_CREDENTIALS_CACHE_ENABLED"] = False
+
+        with patch(
+            "src.auth.flsk_bcrpt.check_password_hash",
+            wraps=flsk_bcrpt.check_password_hash,
+        ) as mock_4_check_password_hash:
+            rv_4 = self._util_issue_token(self._u_r.email, self._u_r.password)
+
+            # Assert.
+            self.assertEqual(rv_4.status_code, 200)
+            self.assertEqual(mock_4_check_password_hash.call_count, 1)
+
+    def test_6_cached_credentials_are_forgotten_when_password_changes(self):
+        """
+        Ensure that, once a user's password has been changed,
+        the user's old password is no longer accepted
+        (even if it was verified - and cached - before the change).
+        """
+
+        # Arrange.
+        __ = self.util_confirm_email_address(self._u_r.id)
+
+        rv_1 = self._util_issue_token(self._u_r.email, self._u_r.password)
+        self.assertEqual(rv_1.status_code, 200)
+
+        basic_auth_credentials = f"{self._u_r.email}:{self._u_r.password}"
+        b_a_c = base64.b64encode(basic_auth_credentials.encode("utf-8")).decode("utf-8")
+        rv_2 = self.client.put(
+            f"/api/users/{self._u_r.id}",
+            json={"password": "new-password"},
+            headers={"Authorization": "Basic " + b_a_c},
+        )
+        self.assertEqual(rv_2.status_code, 200)
+
+        # Act.
+        rv_3 = self._util_issue_token(self._u_r.email, self._u_r.password)
+        rv_4 = self._util_issue_token(self._u_r.email, "new-password")
+
+        # Assert.
+        self.assertEqual(rv_3.status_code, 401)
+        self.assertEqual(rv_4.status_code, 200)
+
+    def test_7_cached_credentials_are_forgotten_after_commit(self):
+        """
+        Ensure that a user's cached credentials are evicted
+        only once the change of the user's password has been committed
+        (and not at all if that change is rolled back).
+        """
+
+        # Arrange.
+        __ = self.util_confirm_email_address(self._u_r.id)
+
+        rv = self._util_issue_token(self._u_r.email, self._u_r.password)
+        self.assertEqual(rv.status_code, 200)
+        cache = verified_credentials_cache.backend
+        cached_digest = cache.get(self._u_r.id)
+        self.assertIsNotNone(cached_digest)
+
+        # Act.
+        user = User.query.get(self._u_r.id)
+        user.password_hash = flsk_bcrpt.generate_password_hash("456").decode("utf-8")
+        db.session.flush()
+        cached_digest_1 = cache.get(self._u_r.id)
+        db.session.rollback()
+        cached_digest_2 = cache.get(self._u_r.id)
+
+        user = User.query.get(self._u_r.id)
+        user.password_hash = flsk_bcrpt.generate_password_hash("456").decode("utf-8")
+        db.session.commit()
+        cached_digest_3 = cache.get(self._u_r.id)
+
+        # Assert.
+        self.assertEqual(cached_digest_1, cached_digest)
+        self.assertEqual(cached_digest_2, cached_digest)
+        self.assertIsNone(cached_digest_3)
+
 
 class Test_02_GetUserProfile(TestBasePlusUtilities):
     """
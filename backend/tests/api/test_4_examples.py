@@ -1,4 +1,7 @@
+import csv
+import io
 import json
+import re
 from unittest.mock import patch
 import base64
 import jwt
@@ -7,8 +10,13 @@ import datetime as dt
 from typing import Optional
 
 from flask import url_for, current_app
+import sqlalchemy as sa
+from sqlalchemy import event
 
-from src import User, Example
+from src import db, response_cache, token_versions_cache
+from src import User, Example, EmailAddressChange, AccountDeletion
+from src import account_deletion
+from src.caching import LRUCache
 from tests import TestBasePlusUtilities, UserResource
 from src.constants import ACCESS
 
@@ -707,7 +715,7 @@ class Test_02_GetExamples(TestBaseForExampleResources_2):
         source_language = "Finnish"
         list_of_example_data = [
             {
-                "new_word": x,
+                "new_word": str(x),
                 "content": (
                     f"Dividing {x} by 2 gives"
                     f" a quotient of {x // 2}"
@@ -782,6 +790,368 @@ class Test_02_GetExamples(TestBaseForExampleResources_2):
             body_2,
         )
 
+    def test_6_full_text_search(self):
+        """
+        Ensure that a `User` can run a full-text search over her own `Example` resources,
+        and that the results are ordered by relevance.
+        """
+
+        # Arrange.
+        source_language = "Finnish"
+        list_of_example_data = [
+            {
+                "new_word": "kieli",
+                "content": "Mitä kieltä sinä puhut?",
+                "content_translation": "What languages do you speak?",
+            },
+            {
+                "new_word": "osallistua [+ MIHIN]",
+                "content": "Kuka haluaa osallistua kilpailuun?",
+                "content_translation": "Who wants to participate in the competition?",
+            },
+            {
+                "new_word": "kilpailu",
+                "content": "Kilpailu alkaa huomenna.",
+                "content_translation": "The competition starts tomorrow.",
+            },
+        ]
+        for example_data in list_of_example_data:
+            self.util_create_example(
+                self._u_r_1.token,
+                source_language,
+                example_data["new_word"],
+                example_data["content"],
+                example_data["content_translation"],
+            )
+
+        # Create an `Example` resource, which belongs to a second `User`
+        # and which would match the full-text search.
+        u_r_2: UserResource = self.util_create_user(
+            "ms",
+            "mary.smith@protonmail.com",
+            "456",
+        )
+        self.util_create_example(
+            u_r_2.token,
+            source_language,
+            "kilpailu",
+            "Kilpailu on ohi.",
+            "The competition is over.",
+        )
+
+        # Act.
+        rv = self.client.get(
+            "/api/examples?q=competition starts",
+            headers={
+                "Authorization": "Bearer " + self._u_r_1.token,
+            },
+        )
+
+        # Assert.
+        body_str = rv.get_data(as_text=True)
+        body = json.loads(body_str)
+
+        self.assertEqual(rv.status_code, 200)
+        self.assertEqual([item["id"] for item in body["items"]], [3, 2])
+        self.assertEqual(body["_meta"]["total_items"], 2)
+        self.assertEqual(
+            body["_links"]["self"],
+            "/api/examples?per_page=10&page=1&q=competition+starts",
+        )
+
+    def test_7_full_text_search_reflects_edits_and_deletions(self):
+        """
+        Ensure that the full-text search stays in sync with
+        the edits to, and the deletions of, `Example` resources.
+        """
+
+        # Arrange.
+        e_1 = self.util_create_example(
+            self._u_r_1.token,
+            "Finnish",
+            "kieli",
+            "Mitä kieltä sinä puhut?",
+            "What languages do you speak?",
+        )
+        e_2 = self.util_create_example(
+            self._u_r_1.token,
+            "Finnish",
+            "kilpailu",
+            "Kilpailu alkaa huomenna.",
+            "The competition starts tomorrow.",
+        )
+
+        # Act.
+        self.client.put(
+            f"/api/examples/{e_1.id}",
+            json={"content_translation": "Which language do you speak?"},
+            headers={
+                "Authorization": "Bearer " + self._u_r_1.token,
+            },
+        )
+        self.client.delete(
+            f"/api/examples/{e_2.id}",
+            headers={
+                "Authorization": "Bearer " + self._u_r_1.token,
+            },
+        )
+
+        # Assert.
+        for q, expected_ids in (
+            ("languages", []),
+            ("language", [e_1.id]),
+            ("competition", []),
+        ):
+            rv = self.client.get(
+                f"/api/examples?q={q}",
+                headers={
+                    "Authorization": "Bearer " + self._u_r_1.token,
+                },
+            )
+
+            body_str = rv.get_data(as_text=True)
+            body = json.loads(body_str)
+
+            self.assertEqual([item["id"] for item in body["items"]], expected_ids)
+
+    def test_8_cursor_pagination(self):
+        """
+        Ensure that a `User` can page through her own `Example` resources
+        by means of cursors.
+        """
+
+        # Arrange.
+        for x in range(5):
+            self.util_create_example(
+                self._u_r_1.token,
+                "Finnish",
+                str(x),
+                f"Content #{x}",
+                None,
+            )
+
+        # Act.
+        ids_per_page = []
+        list_of_meta = []
+        url = "/api/examples?per_page=2&after="
+        while url is not None:
+            rv = self.client.get(
+                url,
+                headers={
+                    "Authorization": "Bearer " + self._u_r_1.token,
+                },
+            )
+
+            body_str = rv.get_data(as_text=True)
+            body = json.loads(body_str)
+
+            self.assertEqual(rv.status_code, 200)
+            ids_per_page.append([item["id"] for item in body["items"]])
+            list_of_meta.append(body["_meta"])
+            url = body["_links"]["next"]
+
+        # Assert.
+        self.assertEqual(ids_per_page, [[5, 4], [3, 2], [1]])
+        self.assertEqual(
+            list_of_meta,
+            3 * [{"total_items": 5, "per_page": 2}],
+        )
+
+    def test_9_invalid_cursor(self):
+        """
+        Ensure that a malformed cursor is rejected.
+        """
+
+        # Act.
+        rv = self.client.get(
+            "/api/examples?after=this-is-not-a-cursor",
+            headers={
+                "Authorization": "Bearer " + self._u_r_1.token,
+            },
+        )
+
+        # Assert.
+        body_str = rv.get_data(as_text=True)
+        body = json.loads(body_str)
+
+        self.assertEqual(rv.status_code, 400)
+        self.assertEqual(
+            body,
+            {
+                "error": "Bad Request",
+                "message": "The provided value for 'after' is not a valid cursor.",
+            },
+        )
+
+    def test_10_pagination_without_total(self):
+        """
+        Ensure that, when a `User` opts out of the total number of results,
+        the response is paginated properly all the same.
+        """
+
+        # Arrange.
+        for x in range(3):
+            self.util_create_example(
+                self._u_r_1.token,
+                "Finnish",
+                str(x),
+                f"Content #{x}",
+                None,
+            )
+
+        # Act.
+        rv = self.client.get(
+            "/api/examples?per_page=2&page=1&include_total=false",
+            headers={
+                "Authorization": "Bearer " + self._u_r_1.token,
+            },
+        )
+
+        # Assert.
+        body_str = rv.get_data(as_text=True)
+        body = json.loads(body_str)
+
+        self.assertEqual(rv.status_code, 200)
+        self.assertEqual([item["id"] for item in body["items"]], [3, 2])
+        self.assertEqual(
+            body["_meta"],
+            {
+                "total_items": None,
+                "per_page": 2,
+                "total_pages": None,
+                "page": 1,
+            },
+        )
+        self.assertEqual(
+            body["_links"],
+            {
+                "self": "/api/examples?per_page=2&page=1&include_total=false",
+                "next": "/api/examples?per_page=2&page=2&include_total=false",
+                "prev": None,
+                "first": "/api/examples?per_page=2&page=1&include_total=false",
+                "last": None,
+            },
+        )
+
+    def test_11_sparse_fieldsets(self):
+        """
+        Ensure that a `User` can request only some of the fields of her `Example`s,
+        and that only the corresponding columns are loaded from the database.
+        """
+
+        # Arrange.
+        for new_word in ("kieli", "osata", "puhua"):
+            self.util_create_example(
+                self._u_r_1.token,
+                "Finnish",
+                new_word,
+                "A very long piece of content. " * 10,
+                "Its translation.",
+            )
+
+        statements = []
+
+        def before_cursor_execute(
+            conn, cursor, statement, parameters, context, executemany
+        ):
+            if statement.startswith("SELECT example.id"):
+                statements.append(statement)
+
+        for url in (
+            "/api/examples?per_page=2&fields=new_word",
+            "/api/examples?per_page=2&fields=new_word&after=",
+        ):
+            # Act.
+            event.listen(db.engine, "before_cursor_execute", before_cursor_execute)
+            try:
+                rv = self.client.get(
+                    url,
+                    headers={
+                        "Authorization": "Bearer " + self._u_r_1.token,
+                    },
+                )
+            finally:
+                event.remove(db.engine, "before_cursor_execute", before_cursor_execute)
+
+            # Assert.
+            body_str = rv.get_data(as_text=True)
+            body = json.loads(body_str)
+
+            self.assertEqual(rv.status_code, 200)
+            self.assertEqual(
+                body["items"],
+                [{"id": 3, "new_word": "puhua"}, {"id": 2, "new_word": "osata"}],
+            )
+            self.assertIn("fields=id,new_word", body["_links"]["next"])
+
+            self.assertEqual(len(statements), 1)
+            self.assertNotIn("example.content", statements[0])
+            statements.clear()
+
+    def test_12_sparse_fieldsets_with_unknown_field(self):
+        # Act.
+        rv = self.client.get(
+            "/api/examples?fields=new_word,password_hash",
+            headers={
+                "Authorization": "Bearer " + self._u_r_1.token,
+            },
+        )
+
+        # Assert.
+        body_str = rv.get_data(as_text=True)
+        body = json.loads(body_str)
+
+        self.assertEqual(rv.status_code, 400)
+        self.assertEqual(
+            body,
+            {
+                "error": "Bad Request",
+                "message": (
+                    "The 'fields' query parameter may only specify"
+                    " any of id, source_language, new_word, content, content_translation"
+                    " (but it specifies password_hash)"
+                ),
+            },
+        )
+
+    def test_13_out_of_range_pagination_parameters(self):
+        """
+        Ensure that out-of-range values of `page` and `per_page` are brought into range
+        for both ways of paginating.
+        """
+
+        # Arrange.
+        for x in range(3):
+            self.util_create_example(
+                self._u_r_1.token,
+                "Finnish",
+                str(x),
+                f"Content #{x}",
+                None,
+            )
+
+        for url, expected_ids in (
+            ("/api/examples?per_page=-5&page=0&include_total=false", [3]),
+            ("/api/examples?per_page=-5&after=", [3]),
+        ):
+            with self.subTest(url=url):
+                # Act.
+                rv = self.client.get(
+                    url,
+                    headers={
+                        "Authorization": "Bearer " + self._u_r_1.token,
+                    },
+                )
+
+                # Assert.
+                body_str = rv.get_data(as_text=True)
+                body = json.loads(body_str)
+
+                self.assertEqual(rv.status_code, 200)
+                self.assertEqual([item["id"] for item in body["items"]], expected_ids)
+                self.assertEqual(body["_meta"]["per_page"], 1)
+                self.assertIn("per_page=1", body["_links"]["next"])
+
 
 class Test_03_GetExample(TestBaseForExampleResources_2):
     """Test the request responsible for getting a specific `Example` resource."""
@@ -1293,6 +1663,31 @@ class Test_04_EditExample(TestBaseForExampleResources_2):
             },
         )
 
+    def test_5_request_body_is_not_a_json_object(self):
+        # Arrange.
+        example = self.util_create_example(
+            self._u_r_1.token, "Finnish", "kieli", "-", None
+        )
+
+        # Act.
+        rv = self.client.put(
+            f"/api/examples/{example.id}",
+            json=[1, 2],
+            headers={
+                "Authorization": "Bearer " + self._u_r_1.token,
+            },
+        )
+
+        # Assert.
+        self.assertEqual(rv.status_code, 400)
+        self.assertEqual(
+            json.loads(rv.get_data(as_text=True)),
+            {
+                "error": "Bad Request",
+                "message": "Your request body did not specify a JSON object",
+            },
+        )
+
 
 class Test_05_DeleteExample(TestBaseForExampleResources_2):
     """Test the request responsible for deleting a specific Example resource."""
@@ -1508,7 +1903,18 @@ class Test_06_DeleteUserHavingResources(TestBaseForExampleResources_2):
             user_data_1["password"],
         )
 
-    def test_1_prevent_deletion(self):
+    def util_delete_user(self):
+        basic_auth_credentials = f"{self._u_r_1.email}:{self._u_r_1.password}"
+        b_a_c = base64.b64encode(basic_auth_credentials.encode("utf-8")).decode("utf-8")
+        authorization = "Basic " + b_a_c
+        return self.client.delete(
+            f"/api/users/{self._u_r_1.id}",
+            headers={
+                "Authorization": authorization,
+            },
+        )
+
+    def test_1_delete_user_having_few_resources(self):
         # Arrange.
         source_language = "Finnish"
         new_word = "kieli"
@@ -1522,37 +1928,1763 @@ class Test_06_DeleteUserHavingResources(TestBaseForExampleResources_2):
             content,
             content_translation,
         )
+        db.session.add(
+            EmailAddressChange(
+                user_id=self._u_r_1.id,
+                old=self._u_r_1.email,
+                new="jd@protonmail.com",
+            )
+        )
+        db.session.commit()
 
         # Act.
-        basic_auth_credentials = f"{self._u_r_1.email}:{self._u_r_1.password}"
-        b_a_c = base64.b64encode(basic_auth_credentials.encode("utf-8")).decode("utf-8")
-        authorization = "Basic " + b_a_c
-        rv = self.client.delete(
-            f"/api/users/{self._u_r_1.id}",
-            headers={
-                "Authorization": authorization,
-            },
-        )
+        rv = self.util_delete_user()
 
         # Assert.
-        body_str = rv.get_data(as_text=True)
-        body = json.loads(body_str)
+        self.assertEqual(rv.status_code, 204)
 
-        self.assertEqual(rv.status_code, 400)
-        self.assertEqual(
+        users = User.query.filter_by(id=self._u_r_1.id)
+        self.assertEqual(users.count(), 0)
+
+        examples = Example.query.filter_by(user_id=self._u_r_1.id)
+        self.assertEqual(examples.count(), 0)
+
+        e_a_cs = EmailAddressChange.query.filter_by(user_id=self._u_r_1.id)
+        self.assertEqual(e_a_cs.count(), 0)
+
+        self.assertEqual(AccountDeletion.query.count(), 0)
+
+    def test_2_delete_user_having_many_resources(self):
+        # Arrange.
+        self.app.config["ACCOUNT_DELETION_SYNC_MAX_EXAMPLES"] = 2
+        for x in range(5):
+            self.util_create_example(
+                self._u_r_1.token,
+                "Finnish",
+                str(x),
+                f"Content #{x}",
+                None,
+            )
+
+        # Act.
+        rv = self.util_delete_user()
+
+        # Assert.
+        body_str = rv.get_data(as_text=True)
+        body = json.loads(body_str)
+
+        self.assertEqual(rv.status_code, 202)
+        account_deletion_id = body["id"]
+        self.assertEqual(
             body,
             {
-                "error": "Bad Request",
+                "id": account_deletion_id,
+                "status": "pending",
+                "n_examples_deleted": 0,
+                "n_email_address_changes_deleted": 0,
+            },
+        )
+        self.assertEqual(
+            rv.headers["Location"],
+            f"/api/account-deletions/{account_deletion_id}",
+        )
+
+        # The User is locked out of their account straight away.
+        rv_2 = self.util_delete_user()
+        self.assertEqual(rv_2.status_code, 401)
+        rv_3 = self.client.get(
+            "/api/examples",
+            headers={"Authorization": "Bearer " + self._u_r_1.token},
+        )
+        self.assertEqual(rv_3.status_code, 401)
+
+        # Act.
+        result = self.app.test_cli_runner().invoke(
+            args=["account-deletion-worker", "--once", "--chunk-size", "2"],
+        )
+
+        # Assert.
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertEqual(
+            result.output,
+            f"AccountDeletion({account_deletion_id}): completed\n",
+        )
+
+        self.assertEqual(User.query.filter_by(id=self._u_r_1.id).count(), 0)
+        self.assertEqual(Example.query.filter_by(user_id=self._u_r_1.id).count(), 0)
+
+        rv_4 = self.client.get(rv.headers["Location"])
+        self.assertEqual(rv_4.status_code, 200)
+        self.assertEqual(
+            json.loads(rv_4.get_data(as_text=True)),
+            {
+                "id": account_deletion_id,
+                "status": "completed",
+                "n_examples_deleted": 5,
+                "n_email_address_changes_deleted": 0,
+            },
+        )
+
+    def test_3_get_nonexistent_account_deletion(self):
+        # Act.
+        rv = self.client.get("/api/account-deletions/0123456789abcdef")
+
+        # Assert.
+        body_str = rv.get_data(as_text=True)
+        body = json.loads(body_str)
+
+        self.assertEqual(rv.status_code, 404)
+        self.assertEqual(
+            body,
+            {
+                "error": "Not Found",
                 "message": (
-                    "Your User resource cannot be deleted at this time,"
-                    " because there exists at least one resource"
-                    " that is associated with your User resource."
+                    "There doesn't exist an AccountDeletion resource with an ID of"
+                    " 0123456789abcdef"
                 ),
             },
         )
 
-        users = User.query.filter_by(id=self._u_r_1.id)
-        self.assertEqual(users.count(), 1)
+    def test_4_retry_failed_account_deletion(self):
+        # Arrange.
+        self.app.config["ACCOUNT_DELETION_SYNC_MAX_EXAMPLES"] = 2
+        for x in range(5):
+            self.util_create_example(
+                self._u_r_1.token,
+                "Finnish",
+                str(x),
+                f"Content #{x}",
+                None,
+            )
+        rv = self.util_delete_user()
+        account_deletion_id = json.loads(rv.get_data(as_text=True))["id"]
 
-        examples = Example.query.filter_by(user_id=self._u_r_1.id)
-        self.assertEqual(examples.count(), 1)
+        original_run_account_deletion = account_deletion.run_account_deletion
+
+        def run_account_deletion_and_fail(a_d, chunk_size):
+            original_run_account_deletion(a_d, chunk_size=2)
+            raise RuntimeError("the database went away")
+
+        # Act.
+        with patch(
+            "src.account_deletion.run_account_deletion",
+            side_effect=run_account_deletion_and_fail,
+        ), self.assertLogs(self.app.logger, level="WARNING") as logs:
+            result_1 = self.app.test_cli_runner().invoke(
+                args=["account-deletion-worker", "--once"],
+            )
+        # (The retry isn't due yet.)
+        result_2 = self.app.test_cli_runner().invoke(
+            args=["account-deletion-worker", "--once"],
+        )
+
+        # Assert.
+        self.assertEqual(
+            result_1.output,
+            f"AccountDeletion({account_deletion_id}): pending\n",
+        )
+        self.assertEqual(result_2.output, "")
+        self.assertIn("(attempt #1), will retry in 60", logs.output[0])
+
+        a_d = AccountDeletion.query.get(account_deletion_id)
+        self.assertEqual(a_d.attempts, 1)
+        self.assertIn("the database went away", a_d.error)
+        self.assertGreater(a_d.next_attempt_at, dt.datetime.utcnow())
+
+        # Act.
+        a_d.next_attempt_at = dt.datetime.utcnow()
+        db.session.commit()
+        result_3 = self.app.test_cli_runner().invoke(
+            args=["account-deletion-worker", "--once"],
+        )
+
+        # Assert.
+        self.assertEqual(
+            result_3.output,
+            f"AccountDeletion({account_deletion_id}): completed\n",
+        )
+        self.assertEqual(User.query.filter_by(id=self._u_r_1.id).count(), 0)
+        self.assertEqual(AccountDeletion.query.get(account_deletion_id).attempts, 1)
+
+    def test_5_give_up_on_account_deletion_after_max_attempts(self):
+        # Arrange.
+        self.app.config["ACCOUNT_DELETION_SYNC_MAX_EXAMPLES"] = 0
+        self.app.config["ACCOUNT_DELETION_MAX_ATTEMPTS"] = 2
+        self.app.config["ACCOUNT_DELETION_RETRY_BACKOFF_SECONDS"] = 0
+        self.util_create_example(self._u_r_1.token, "Finnish", "kieli", "-", None)
+        rv = self.util_delete_user()
+        account_deletion_id = json.loads(rv.get_data(as_text=True))["id"]
+
+        # Act.
+        with patch(
+            "src.account_deletion.run_account_deletion",
+            side_effect=RuntimeError("the database went away"),
+        ) as run_account_deletion_mock, self.assertLogs(
+            self.app.logger, level="WARNING"
+        ) as logs:
+            result = self.app.test_cli_runner().invoke(
+                args=["account-deletion-worker", "--once"],
+            )
+
+        # Assert.
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertEqual(run_account_deletion_mock.call_count, 2)
+        self.assertEqual(
+            result.output,
+            f"AccountDeletion({account_deletion_id}): pending\n"
+            f"AccountDeletion({account_deletion_id}): failed\n",
+        )
+        self.assertIn("giving up on running", logs.output[-1])
+        self.assertEqual(User.query.filter_by(id=self._u_r_1.id).count(), 1)
+
+    def test_6_reclaim_stalled_account_deletion(self):
+        # Arrange.
+        self.app.config["ACCOUNT_DELETION_SYNC_MAX_EXAMPLES"] = 0
+        self.app.config["ACCOUNT_DELETION_RETRY_BACKOFF_SECONDS"] = 0
+        self.util_create_example(self._u_r_1.token, "Finnish", "kieli", "-", None)
+        rv = self.util_delete_user()
+        account_deletion_id = json.loads(rv.get_data(as_text=True))["id"]
+
+        # (Simulate a worker, which claimed the job and then got killed.)
+        def mark_as_running(updated):
+            db.session.execute(
+                sa.update(AccountDeletion)
+                .where(AccountDeletion.id == account_deletion_id)
+                .values(status=AccountDeletion.RUNNING, updated=updated)
+            )
+            db.session.commit()
+
+        now = dt.datetime.utcnow()
+        mark_as_running(now - dt.timedelta(seconds=60))
+
+        # Act.
+        result_1 = self.app.test_cli_runner().invoke(
+            args=["account-deletion-worker", "--once"],
+        )
+
+        mark_as_running(now - dt.timedelta(seconds=601))
+        with self.assertLogs(self.app.logger, level="WARNING") as logs:
+            result_2 = self.app.test_cli_runner().invoke(
+                args=["account-deletion-worker", "--once"],
+            )
+
+        # Assert.
+        self.assertEqual(result_1.output, "")
+        self.assertEqual(
+            result_2.output,
+            f"AccountDeletion({account_deletion_id}): completed\n",
+        )
+        self.assertIn("made no progress for 600.0 seconds", logs.output[0])
+        self.assertEqual(User.query.filter_by(id=self._u_r_1.id).count(), 0)
+        a_d = AccountDeletion.query.get(account_deletion_id)
+        self.assertEqual(a_d.attempts, 1)
+        self.assertEqual(a_d.n_examples_deleted, 1)
+
+
+class Test_07_StatelessTokenAuth(TestBaseForExampleResources_2):
+    """
+    Test the handling of requests for `Example` resources
+    in the case where access tokens are authenticated
+    without loading the corresponding `User` from the database.
+    """
+
+    def setUp(self):
+        super().setUp()
+
+        self.app.config["STATELESS_TOKEN_AUTH_ENABLED"] = True
+
+        user_data = {
+            "username": "jd",
+            "email": "john.doe@protonmail.com",
+            "password": "123",
+        }
+        self._u_r_1: UserResource = self.util_create_user(
+            user_data["username"],
+            user_data["email"],
+            user_data["password"],
+        )
+
+        self._basic_auth = "Basic " + base64.b64encode(
+            f"{user_data['email']}:{user_data['password']}".encode("utf-8")
+        ).decode("utf-8")
+
+    def test_1_no_user_lookup(self):
+        """
+        Ensure that a request for an `Example` resource is served
+        without querying the `user` table.
+        """
+
+        # Arrange.
+        example = self.util_create_example(
+            self._u_r_1.token,
+            "Finnish",
+            "kieli",
+            "Mitä kieltä sinä puhut?",
+            "What languages do you speak?",
+        )
+
+        statements = []
+
+        def before_cursor_execute(
+            conn, cursor, statement, parameters, context, executemany
+        ):
+            statements.append(statement)
+
+        # Act.
+        event.listen(db.engine, "before_cursor_execute", before_cursor_execute)
+        try:
+            rv = self.client.get(
+                f"/api/examples/{example.id}",
+                headers={
+                    "Authorization": "Bearer " + self._u_r_1.token,
+                },
+            )
+        finally:
+            event.remove(db.engine, "before_cursor_execute", before_cursor_execute)
+
+        # Assert.
+        self.assertEqual(rv.status_code, 200)
+        self.assertEqual(
+            [statement for statement in statements if "FROM user" in statement],
+            [],
+        )
+
+    def test_2_reject_token_after_password_change(self):
+        """
+        Ensure that, once a `User` has changed her password,
+        the access tokens that were issued to her before that change are rejected.
+        """
+
+        # Arrange.
+        rv_1 = self.client.put(
+            f"/api/users/{self._u_r_1.id}",
+            json={"password": "456"},
+            headers={
+                "Authorization": self._basic_auth,
+            },
+        )
+        self.assertEqual(rv_1.status_code, 200)
+
+        # Act.
+        rv_2 = self.client.get(
+            "/api/examples",
+            headers={
+                "Authorization": "Bearer " + self._u_r_1.token,
+            },
+        )
+
+        # Assert.
+        self.assertEqual(rv_2.status_code, 401)
+
+    def test_3_reject_token_of_deleted_user(self):
+        """
+        Ensure that, once a `User` has been deleted,
+        the access tokens that were issued to her are rejected.
+        """
+
+        # Arrange.
+        rv_1 = self.client.get(
+            "/api/examples",
+            headers={
+                "Authorization": "Bearer " + self._u_r_1.token,
+            },
+        )
+        self.assertEqual(rv_1.status_code, 200)
+
+        rv_2 = self.client.delete(
+            f"/api/users/{self._u_r_1.id}",
+            headers={
+                "Authorization": self._basic_auth,
+            },
+        )
+        self.assertEqual(rv_2.status_code, 204)
+
+        # Act.
+        rv_3 = self.client.get(
+            "/api/examples",
+            headers={
+                "Authorization": "Bearer " + self._u_r_1.token,
+            },
+        )
+
+        # Assert.
+        self.assertEqual(rv_3.status_code, 401)
+
+    def test_4_reject_creation_by_user_deleted_in_another_process(self):
+        """
+        Ensure that,
+        if a `User` has been deleted by another process
+        (so that this process still has the `User`'s `token_version` cached),
+        an attempt to create an `Example` with one of her access tokens
+        is rejected with a 401 instead of failing with a 500.
+        """
+
+        # Arrange.
+        rv_1 = self.client.get(
+            "/api/examples",
+            headers={
+                "Authorization": "Bearer " + self._u_r_1.token,
+            },
+        )
+        self.assertEqual(rv_1.status_code, 200)
+
+        # (Delete the `User` without evicting her cached `token_version`.)
+        db.session.execute(sa.delete(User).where(User.id == self._u_r_1.id))
+        db.session.commit()
+        self.assertIsNotNone(token_versions_cache.backend.get(self._u_r_1.id))
+
+        # Act.
+        rv_2 = self.client.post(
+            "/api/examples",
+            json={"new_word": "kieli", "content": "Mitä kieltä sinä puhut?"},
+            headers={
+                "Authorization": "Bearer " + self._u_r_1.token,
+            },
+        )
+
+        # Assert.
+        self.assertEqual(rv_2.status_code, 401)
+        self.assertEqual(
+            json.loads(rv_2.get_data(as_text=True)),
+            {
+                "error": "Unauthorized",
+                "message": (
+                    "Authentication in the Bearer-Token Auth format is required."
+                ),
+            },
+        )
+        self.assertEqual(Example.query.count(), 0)
+
+
+class Test_08_BatchOperations(TestBaseForExampleResources_2):
+    """
+    Test the requests responsible for creating, editing and deleting
+    several `Example` resources at once.
+    """
+
+    def setUp(self):
+        super().setUp()
+
+        self._u_r_1: UserResource = self.util_create_user(
+            "jd",
+            "john.doe@protonmail.com",
+            "123",
+        )
+
+    def test_1_create_examples(self):
+        """
+        Ensure that a `User` can create several `Example` resources at once,
+        and that each invalid element of the batch is reported individually.
+        """
+
+        # Arrange.
+        list_of_example_data = [
+            {"new_word": "kieli", "content": "Mitä kieltä sinä puhut?"},
+            {"new_word": "kilpailu"},
+        ] + [
+            {
+                "source_language": "German",
+                "new_word": str(x),
+                "content": f"Content #{x}",
+                "content_translation": f"Translation #{x}",
+            }
+            for x in range(250)
+        ]
+
+        # Act.
+        rv = self.client.post(
+            "/api/examples:batch",
+            json=list_of_example_data,
+            headers={
+                "Authorization": "Bearer " + self._u_r_1.token,
+            },
+        )
+
+        # Assert.
+        body_str = rv.get_data(as_text=True)
+        body = json.loads(body_str)
+
+        self.assertEqual(rv.status_code, 200)
+        self.assertEqual(len(body["results"]), 252)
+        self.assertEqual(
+            body["results"][:3],
+            [
+                {
+                    "status": 201,
+                    "example": {
+                        "id": 1,
+                        "source_language": "Finnish",
+                        "new_word": "kieli",
+                        "content": "Mitä kieltä sinä puhut?",
+                        "content_translation": None,
+                    },
+                },
+                {
+                    "status": 400,
+                    "error": "Bad Request",
+                    "message": "Your request body did not specify a value for 'content'",
+                },
+                {
+                    "status": 201,
+                    "example": {
+                        "id": 2,
+                        "source_language": "German",
+                        "new_word": "0",
+                        "content": "Content #0",
+                        "content_translation": "Translation #0",
+                    },
+                },
+            ],
+        )
+
+        # (Reach directly into the application's persistence layer to)
+        # Ensure that the reported IDs are those of the persisted `Example` resources.
+        for result in body["results"]:
+            if result["status"] == 201:
+                e = Example.query.get(result["example"]["id"])
+                self.assertEqual(e.to_dict(), result["example"])
+                self.assertEqual(e.user_id, self._u_r_1.id)
+        self.assertEqual(Example.query.count(), 251)
+
+    def test_2_edit_examples(self):
+        """
+        Ensure that a `User` can edit several `Example` resources of her own at once,
+        but cannot edit any `Example` resource that belongs to another `User`.
+        """
+
+        # Arrange.
+        e_1 = self.util_create_example(
+            self._u_r_1.token, "Finnish", "kieli", "Mitä kieltä sinä puhut?", None
+        )
+        e_2 = self.util_create_example(
+            self._u_r_1.token, "Finnish", "kilpailu", "Kilpailu alkaa.", None
+        )
+
+        u_r_2: UserResource = self.util_create_user(
+            "ms",
+            "mary.smith@protonmail.com",
+            "456",
+        )
+        e_3 = self.util_create_example(
+            u_r_2.token, "Finnish", "osallistua", "Kuka haluaa osallistua?", None
+        )
+
+        # Act.
+        rv = self.client.patch(
+            "/api/examples:batch",
+            json=[
+                {"id": e_1.id, "content_translation": "What languages do you speak?"},
+                {"id": e_2.id, "new_word": "kilpailu [+ MISSÄ]"},
+                {"id": e_3.id, "new_word": "hijacked"},
+                {"new_word": "no id"},
+            ],
+            headers={
+                "Authorization": "Bearer " + self._u_r_1.token,
+            },
+        )
+
+        # Assert.
+        body_str = rv.get_data(as_text=True)
+        body = json.loads(body_str)
+
+        self.assertEqual(rv.status_code, 200)
+        self.assertEqual(
+            [result["status"] for result in body["results"]],
+            [200, 200, 404, 400],
+        )
+        self.assertEqual(
+            body["results"][0]["example"]["content_translation"],
+            "What languages do you speak?",
+        )
+        self.assertEqual(
+            body["results"][1]["example"]["new_word"],
+            "kilpailu [+ MISSÄ]",
+        )
+        self.assertEqual(Example.query.get(e_3.id).new_word, "osallistua")
+
+    def test_3_delete_examples(self):
+        """
+        Ensure that a `User` can delete several `Example` resources of her own at once,
+        but cannot delete any `Example` resource that belongs to another `User`.
+        """
+
+        # Arrange.
+        e_1 = self.util_create_example(
+            self._u_r_1.token, "Finnish", "kieli", "Mitä kieltä sinä puhut?", None
+        )
+
+        u_r_2: UserResource = self.util_create_user(
+            "ms",
+            "mary.smith@protonmail.com",
+            "456",
+        )
+        e_2 = self.util_create_example(
+            u_r_2.token, "Finnish", "osallistua", "Kuka haluaa osallistua?", None
+        )
+
+        # Act.
+        rv = self.client.delete(
+            "/api/examples:batch",
+            json=[e_1.id, e_2.id, 17, "abc"],
+            headers={
+                "Authorization": "Bearer " + self._u_r_1.token,
+            },
+        )
+
+        # Assert.
+        body_str = rv.get_data(as_text=True)
+        body = json.loads(body_str)
+
+        self.assertEqual(rv.status_code, 200)
+        self.assertEqual(
+            [result["status"] for result in body["results"]],
+            [204, 404, 404, 400],
+        )
+        self.assertEqual(
+            [e.id for e in Example.query.order_by(Example.id).all()],
+            [e_2.id],
+        )
+
+    def test_4_create_examples_with_non_consecutive_ids(self):
+        """
+        Ensure that the reported IDs are those of the created `Example` resources
+        even if the rows inserted by a single statement aren't assigned consecutive IDs
+        (as happens on MySQL when `auto_increment_increment` is greater than 1).
+        """
+
+        # Arrange.
+        u_r_2: UserResource = self.util_create_user(
+            "ms",
+            "mary.smith@protonmail.com",
+            "456",
+        )
+        # (Make SQLite assign an ID to a row of another `User`
+        # after each row of the batch.)
+        db.session.execute(
+            sa.text(
+                f"""
+                CREATE TRIGGER interleave_example AFTER INSERT ON example
+                WHEN NEW.user_id = {self._u_r_1.id}
+                BEGIN
+                    INSERT INTO example (created, updated, user_id, new_word, content)
+                    VALUES (NEW.created, NEW.updated, {u_r_2.id}, 'other', 'other');
+                END
+                """
+            )
+        )
+        db.session.commit()
+
+        # Act.
+        rv = self.client.post(
+            "/api/examples:batch",
+            json=[{"new_word": str(x), "content": f"Content #{x}"} for x in range(3)],
+            headers={
+                "Authorization": "Bearer " + self._u_r_1.token,
+            },
+        )
+
+        # Assert.
+        body_str = rv.get_data(as_text=True)
+        body = json.loads(body_str)
+
+        self.assertEqual(rv.status_code, 200)
+        self.assertEqual(
+            [result["example"]["id"] for result in body["results"]],
+            [1, 3, 5],
+        )
+        for result in body["results"]:
+            e = Example.query.get(result["example"]["id"])
+            self.assertEqual(e.to_dict(), result["example"])
+            self.assertEqual(e.user_id, self._u_r_1.id)
+
+    def test_5_reject_values_that_cannot_be_stored(self):
+        """
+        Ensure that each element of a batch, which specifies a value
+        that is not a (non-empty) string or that is too long, is reported individually
+        instead of failing the entire batch.
+        """
+
+        # Arrange.
+        e_1 = self.util_create_example(
+            self._u_r_1.token, "Finnish", "kieli", "Mitä kieltä sinä puhut?", None
+        )
+        headers = {"Authorization": "Bearer " + self._u_r_1.token}
+
+        # Act.
+        rv_1 = self.client.post(
+            "/api/examples:batch",
+            json=[
+                {"new_word": 5, "content": "-"},
+                {"new_word": {"nested": "object"}, "content": "-"},
+                {"new_word": "kilpailu", "content": "-", "content_translation": []},
+                {"new_word": "x" * 129, "content": "-"},
+                {"new_word": "kilpailu", "content": "Kilpailu alkaa."},
+            ],
+            headers=headers,
+        )
+        rv_2 = self.client.patch(
+            "/api/examples:batch",
+            json=[
+                {"id": e_1.id, "content": ""},
+                {"id": e_1.id, "source_language": True},
+                {"id": e_1.id, "content_translation": "What languages do you speak?"},
+            ],
+            headers=headers,
+        )
+        rv_3 = self.client.put(
+            f"/api/examples/{e_1.id}",
+            json={"new_word": ["kieli"]},
+            headers=headers,
+        )
+
+        # Assert.
+        body_1 = json.loads(rv_1.get_data(as_text=True))
+        self.assertEqual(rv_1.status_code, 200)
+        self.assertEqual(
+            [result.get("message") for result in body_1["results"]],
+            [
+                "The value for 'new_word' must be a non-empty string",
+                "The value for 'new_word' must be a non-empty string",
+                "The value for 'content_translation' must be a non-empty string",
+                "The value for 'new_word' must not be longer than 128 characters",
+                None,
+            ],
+        )
+        self.assertEqual(body_1["results"][4]["status"], 201)
+
+        body_2 = json.loads(rv_2.get_data(as_text=True))
+        self.assertEqual(rv_2.status_code, 200)
+        self.assertEqual(
+            [result["status"] for result in body_2["results"]],
+            [400, 400, 200],
+        )
+        self.assertEqual(
+            body_2["results"][1]["message"],
+            "The value for 'source_language' must be a non-empty string",
+        )
+
+        self.assertEqual(rv_3.status_code, 400)
+        self.assertEqual(
+            json.loads(rv_3.get_data(as_text=True)),
+            {
+                "error": "Bad Request",
+                "message": "The value for 'new_word' must be a non-empty string",
+            },
+        )
+
+        e = Example.query.get(e_1.id)
+        self.assertEqual(
+            (e.new_word, e.content, e.source_language),
+            ("kieli", "Mitä kieltä sinä puhut?", "Finnish"),
+        )
+        self.assertEqual(Example.query.count(), 2)
+
+
+class Test_09_ExportExamples(TestBaseForExampleResources_2):
+    """
+    Test the request responsible for exporting
+    all `Example` resources of the authenticated `User`.
+    """
+
+    def setUp(self):
+        super().setUp()
+
+        self._u_r_1: UserResource = self.util_create_user(
+            "jd",
+            "john.doe@protonmail.com",
+            "123",
+        )
+        self._e_1 = self.util_create_example(
+            self._u_r_1.token,
+            "Finnish",
+            "kieli",
+            "Mitä kieltä sinä puhut?",
+            "What languages do you speak?",
+        )
+        self._e_2 = self.util_create_example(
+            self._u_r_1.token,
+            "Finnish",
+            "osallistua [+ MIHIN]",
+            'Kuka haluaa osallistua "kilpailuun"?',
+            None,
+        )
+
+        u_r_2: UserResource = self.util_create_user(
+            "ms",
+            "mary.smith@protonmail.com",
+            "456",
+        )
+        self.util_create_example(
+            u_r_2.token,
+            "Finnish",
+            "kilpailu",
+            "Kilpailu alkaa.",
+            None,
+        )
+
+    def test_1_export_as_ndjson(self):
+        # Act.
+        rv = self.client.get(
+            "/api/examples/export",
+            headers={
+                "Authorization": "Bearer " + self._u_r_1.token,
+            },
+        )
+
+        # Assert.
+        self.assertEqual(rv.status_code, 200)
+        self.assertEqual(rv.mimetype, "application/x-ndjson")
+        self.assertTrue(rv.is_streamed)
+
+        lines = rv.get_data(as_text=True).splitlines()
+        self.assertEqual(
+            [json.loads(line) for line in lines],
+            [self._e_1.to_dict(), self._e_2.to_dict()],
+        )
+
+    def test_2_export_as_csv(self):
+        # Act.
+        rv = self.client.get(
+            "/api/examples/export?format=csv",
+            headers={
+                "Authorization": "Bearer " + self._u_r_1.token,
+            },
+        )
+
+        # Assert.
+        self.assertEqual(rv.status_code, 200)
+        self.assertEqual(rv.mimetype, "text/csv")
+
+        rows = list(csv.DictReader(io.StringIO(rv.get_data(as_text=True))))
+        self.assertEqual(
+            rows,
+            [
+                {
+                    "id": str(self._e_1.id),
+                    "source_language": "Finnish",
+                    "new_word": "kieli",
+                    "content": "Mitä kieltä sinä puhut?",
+                    "content_translation": "What languages do you speak?",
+                },
+                {
+                    "id": str(self._e_2.id),
+                    "source_language": "Finnish",
+                    "new_word": "osallistua [+ MIHIN]",
+                    "content": 'Kuka haluaa osallistua "kilpailuun"?',
+                    "content_translation": "",
+                },
+            ],
+        )
+
+    def test_3_unsupported_format(self):
+        # Act.
+        rv = self.client.get(
+            "/api/examples/export?format=xml",
+            headers={
+                "Authorization": "Bearer " + self._u_r_1.token,
+            },
+        )
+
+        # Assert.
+        body_str = rv.get_data(as_text=True)
+        body = json.loads(body_str)
+
+        self.assertEqual(rv.status_code, 400)
+        self.assertEqual(
+            body,
+            {
+                "error": "Bad Request",
+                "message": "The 'format' query parameter must be 'ndjson' or 'csv'.",
+            },
+        )
+
+
+class Test_10_ImportExamples(TestBaseForExampleResources_2):
+    """
+    Test the request responsible for importing `Example` resources
+    for the authenticated `User`.
+    """
+
+    def setUp(self):
+        super().setUp()
+
+        self._u_r_1: UserResource = self.util_create_user(
+            "jd",
+            "john.doe@protonmail.com",
+            "123",
+        )
+
+    def util_import(self, data, content_type):
+        return self.client.post(
+            "/api/examples/import",
+            data=data.encode("utf-8"),
+            headers={
+                "Content-Type": content_type,
+                "Authorization": "Bearer " + self._u_r_1.token,
+            },
+        )
+
+    def test_1_import_ndjson(self):
+        # Arrange.
+        data = (
+            '{"new_word": "kieli", "content": "Mitä kieltä sinä puhut?"}\n'
+            "\n"
+            "this is not JSON\n"
+            '{"new_word": "kilpailu"}\n'
+            '["kilpailu", "Kilpailu alkaa."]\n'
+            '{"source_language": "German", "new_word": "die Sprache",'
+            ' "content": "Welche Sprachen sprichst du?",'
+            ' "content_translation": "What languages do you speak?"}\n'
+        )
+
+        # Act.
+        rv = self.util_import(data, "application/x-ndjson")
+
+        # Assert.
+        body = json.loads(rv.get_data(as_text=True))
+
+        self.assertEqual(rv.status_code, 200)
+        self.assertEqual(
+            body,
+            {
+                "n_lines": 6,
+                "n_imported": 2,
+                "n_failed": 3,
+                "errors": [
+                    {
+                        "line": 3,
+                        "message": "This line is not valid JSON",
+                    },
+                    {
+                        "line": 4,
+                        "message": (
+                            "Your request body did not specify a value for 'content'"
+                        ),
+                    },
+                    {
+                        "line": 5,
+                        "message": "Your request body did not specify a JSON object",
+                    },
+                ],
+            },
+        )
+
+        examples = Example.query.order_by(Example.id).all()
+        self.assertEqual(
+            [e.to_dict() for e in examples],
+            [
+                {
+                    "id": 1,
+                    "source_language": "Finnish",
+                    "new_word": "kieli",
+                    "content": "Mitä kieltä sinä puhut?",
+                    "content_translation": None,
+                },
+                {
+                    "id": 2,
+                    "source_language": "German",
+                    "new_word": "die Sprache",
+                    "content": "Welche Sprachen sprichst du?",
+                    "content_translation": "What languages do you speak?",
+                },
+            ],
+        )
+        self.assertEqual({e.user_id for e in examples}, {self._u_r_1.id})
+
+    def test_2_import_csv(self):
+        # Arrange.
+        data = (
+            "\ufeffnew_word,content,content_translation\r\n"
+            'kieli,"Mitä kieltä\r\nsinä puhut?",What languages do you speak?\r\n'
+            "kilpailu,,\r\n"
+            "kilpailu,Kilpailu alkaa.\r\n"
+            "osallistua,Kuka haluaa osallistua?,\r\n"
+        )
+
+        # Act.
+        rv = self.util_import(data, "text/csv")
+
+        # Assert.
+        body = json.loads(rv.get_data(as_text=True))
+
+        self.assertEqual(rv.status_code, 200)
+        self.assertEqual(
+            body,
+            {
+                "n_lines": 6,
+                "n_imported": 2,
+                "n_failed": 2,
+                "errors": [
+                    {
+                        "line": 4,
+                        "message": (
+                            "Your request body did not specify a value for 'content'"
+                        ),
+                    },
+                    {
+                        "line": 5,
+                        "message": "This record has 2 fields instead of 3",
+                    },
+                ],
+            },
+        )
+
+        examples = Example.query.order_by(Example.id).all()
+        self.assertEqual(
+            [e.to_dict() for e in examples],
+            [
+                {
+                    "id": 1,
+                    "source_language": "Finnish",
+                    "new_word": "kieli",
+                    "content": "Mitä kieltä\r\nsinä puhut?",
+                    "content_translation": "What languages do you speak?",
+                },
+                {
+                    "id": 2,
+                    "source_language": "Finnish",
+                    "new_word": "osallistua",
+                    "content": "Kuka haluaa osallistua?",
+                    "content_translation": None,
+                },
+            ],
+        )
+
+    def test_3_import_csv_without_required_column(self):
+        # Act.
+        rv = self.util_import("new_word\r\nkieli\r\n", "text/csv")
+
+        # Assert.
+        body = json.loads(rv.get_data(as_text=True))
+
+        self.assertEqual(rv.status_code, 200)
+        self.assertEqual(
+            body,
+            {
+                "n_lines": 0,
+                "n_imported": 0,
+                "n_failed": 1,
+                "errors": [
+                    {
+                        "line": 1,
+                        "message": (
+                            "The header row did not specify a column for 'content'"
+                        ),
+                    },
+                ],
+            },
+        )
+        self.assertEqual(Example.query.count(), 0)
+
+    def test_4_import_in_chunks(self):
+        # Arrange.
+        data = "".join(
+            json.dumps({"new_word": str(x), "content": f"Content #{x}"}) + "\n"
+            for x in range(5)
+        )
+
+        # Act.
+        with patch("src.api.examples.ROWS_PER_IMPORT_CHUNK", 2):
+            rv = self.util_import(data, "application/x-ndjson")
+
+        # Assert.
+        body = json.loads(rv.get_data(as_text=True))
+
+        self.assertEqual(rv.status_code, 200)
+        self.assertEqual(body["n_imported"], 5)
+        self.assertEqual(
+            [e.new_word for e in Example.query.order_by(Example.id)],
+            ["0", "1", "2", "3", "4"],
+        )
+
+    def test_5_unsupported_content_type(self):
+        # Act.
+        rv = self.util_import("[]", "application/json")
+
+        # Assert.
+        body = json.loads(rv.get_data(as_text=True))
+
+        self.assertEqual(rv.status_code, 400)
+        self.assertEqual(
+            body,
+            {
+                "error": "Bad Request",
+                "message": (
+                    'Your request must set the "Content-Type" header'
+                    ' to either "application/x-ndjson" or "text/csv".'
+                ),
+            },
+        )
+
+    def test_6_import_ndjson_with_a_line_that_is_not_utf_8(self):
+        # Arrange.
+        lines = [
+            json.dumps({"new_word": str(x), "content": f"Content #{x}"}).encode("utf-8")
+            for x in range(100)
+        ]
+        lines.append(b'{"new_word": "\xff", "content": "-"}')
+        lines.append(
+            json.dumps({"new_word": "kieli", "content": "Mitä kieltä?"}).encode("utf-8")
+        )
+        data = b"\xef\xbb\xbf" + b"\n".join(lines) + b"\n"
+
+        # Act.
+        rv = self.client.post(
+            "/api/examples/import",
+            data=data,
+            headers={
+                "Content-Type": "application/x-ndjson",
+                "Authorization": "Bearer " + self._u_r_1.token,
+            },
+        )
+
+        # Assert.
+        body = json.loads(rv.get_data(as_text=True))
+
+        self.assertEqual(rv.status_code, 200)
+        self.assertEqual(
+            body,
+            {
+                "n_lines": 102,
+                "n_imported": 101,
+                "n_failed": 1,
+                "errors": [
+                    {"line": 101, "message": "This line is not valid UTF-8"},
+                ],
+            },
+        )
+        new_words = [e.new_word for e in Example.query.order_by(Example.id)]
+        self.assertEqual(new_words, [str(x) for x in range(100)] + ["kieli"])
+
+
+class Test_11_ResponseCache(TestBaseForExampleResources_2):
+    """
+    Test the caching of the responses to requests for `Example` resources.
+    """
+
+    def setUp(self):
+        super().setUp()
+
+        self._u_r_1: UserResource = self.util_create_user(
+            "jd",
+            "john.doe@protonmail.com",
+            "123",
+        )
+        self._e_1 = self.util_create_example(
+            self._u_r_1.token,
+            "Finnish",
+            "kieli",
+            "Mitä kieltä sinä puhut?",
+            "What languages do you speak?",
+        )
+
+        self._statements = []
+
+        def before_cursor_execute(
+            conn, cursor, statement, parameters, context, executemany
+        ):
+            if "FROM example" in statement:
+                self._statements.append(statement)
+
+        self._before_cursor_execute = before_cursor_execute
+        event.listen(db.engine, "before_cursor_execute", before_cursor_execute)
+
+    def tearDown(self):
+        event.remove(db.engine, "before_cursor_execute", self._before_cursor_execute)
+        super().tearDown()
+
+    def util_get(self, url, token=None):
+        rv = self.client.get(
+            url,
+            headers={
+                "Authorization": "Bearer " + (token or self._u_r_1.token),
+            },
+        )
+        return rv.status_code, json.loads(rv.get_data(as_text=True))
+
+    def test_1_serve_cached_responses(self):
+        for url in ("/api/examples", f"/api/examples/{self._e_1.id}"):
+            # Act.
+            status_code_1, body_1 = self.util_get(url)
+            n_statements = len(self._statements)
+            status_code_2, body_2 = self.util_get(url)
+
+            # Assert.
+            self.assertEqual(status_code_1, 200)
+            self.assertEqual((status_code_2, body_2), (status_code_1, body_1))
+            self.assertGreater(n_statements, 0)
+            self.assertEqual(len(self._statements), n_statements)
+
+    def test_2_invalidate_upon_changes(self):
+        url_collection = "/api/examples"
+        url_resource = f"/api/examples/{self._e_1.id}"
+        self.util_get(url_collection)
+        self.util_get(url_resource)
+
+        # Act (edit).
+        rv = self.client.put(
+            url_resource,
+            json={"new_word": "kielet"},
+            headers={"Authorization": "Bearer " + self._u_r_1.token},
+        )
+        self.assertEqual(rv.status_code, 200)
+
+        # Assert.
+        self.assertEqual(self.util_get(url_resource)[1]["new_word"], "kielet")
+        self.assertEqual(
+            [e["new_word"] for e in self.util_get(url_collection)[1]["items"]],
+            ["kielet"],
+        )
+
+        # Act (create).
+        self.util_create_example(self._u_r_1.token, "Finnish", "osata", "-", None)
+
+        # Assert.
+        self.assertEqual(
+            [e["new_word"] for e in self.util_get(url_collection)[1]["items"]],
+            ["osata", "kielet"],
+        )
+
+        # Act (delete).
+        rv = self.client.delete(
+            url_resource,
+            headers={"Authorization": "Bearer " + self._u_r_1.token},
+        )
+        self.assertEqual(rv.status_code, 204)
+
+        # Assert.
+        self.assertEqual(self.util_get(url_resource)[0], 404)
+        self.assertEqual(
+            [e["new_word"] for e in self.util_get(url_collection)[1]["items"]],
+            ["osata"],
+        )
+
+    def test_3_invalidate_upon_batch_changes(self):
+        url = "/api/examples"
+        self.util_get(url)
+
+        # Act.
+        rv = self.client.post(
+            "/api/examples:batch",
+            json=[{"new_word": "osata", "content": "-"}],
+            headers={"Authorization": "Bearer " + self._u_r_1.token},
+        )
+        self.assertEqual(rv.status_code, 200)
+
+        # Assert.
+        self.assertEqual(self.util_get(url)[1]["_meta"]["total_items"], 2)
+
+        # Act.
+        rv = self.client.post(
+            "/api/examples/import",
+            data=b'{"new_word": "kilpailu", "content": "-"}\n',
+            headers={
+                "Content-Type": "application/x-ndjson",
+                "Authorization": "Bearer " + self._u_r_1.token,
+            },
+        )
+        self.assertEqual(rv.status_code, 200)
+
+        # Assert.
+        self.assertEqual(self.util_get(url)[1]["_meta"]["total_items"], 3)
+
+    def test_4_responses_are_cached_per_user(self):
+        # Arrange.
+        u_r_2: UserResource = self.util_create_user(
+            "ms",
+            "mary.smith@protonmail.com",
+            "456",
+        )
+        url = f"/api/examples/{self._e_1.id}"
+        self.assertEqual(self.util_get(url)[0], 200)
+
+        # Act.
+        status_code, body = self.util_get(url, token=u_r_2.token)
+
+        # Assert.
+        self.assertEqual(status_code, 404)
+
+    def test_5_custom_backend(self):
+        # Arrange.
+        self.app.config["RESPONSE_CACHE_BACKEND"] = Counting
+        response_cache.init_app(self.app)
+
+        # Act.
+        self.util_get("/api/examples")
+        self.util_get("/api/examples")
+
+        # Assert.
+        backend = self.app.extensions["response_cache"]
+        self.assertIsInstance(backend, Counting)
+        self.assertEqual(backend.n_hits, 1)
+
+    def test_6_etag_matches_cache_key(self):
+        # Arrange.
+        headers = {"Authorization": "Bearer " + self._u_r_1.token}
+        rv_1 = self.client.get(
+            "/api/examples", base_url="http://localhost", headers=headers
+        )
+        self.app.extensions["response_cache"].clear()
+
+        # Act.
+        rv_2 = self.client.get(
+            "/api/examples", base_url="http://example.com", headers=headers
+        )
+
+        # Assert.
+        self.assertEqual(rv_2.status_code, 200)
+        self.assertEqual(rv_2.headers["ETag"], rv_1.headers["ETag"])
+
+
+class Test_12_ConditionalRequests(TestBaseForExampleResources_2):
+    """
+    Test the `ETag`s of `Example` resources
+    and the handling of requests that carry an `If-None-Match` header.
+    """
+
+    def setUp(self):
+        super().setUp()
+
+        self._u_r_1: UserResource = self.util_create_user(
+            "jd",
+            "john.doe@protonmail.com",
+            "123",
+        )
+        self._e_1 = self.util_create_example(
+            self._u_r_1.token,
+            "Finnish",
+            "kieli",
+            "Mitä kieltä sinä puhut?",
+            "What languages do you speak?",
+        )
+
+    def util_get(self, url, etag=None):
+        headers = {"Authorization": "Bearer " + self._u_r_1.token}
+        if etag is not None:
+            headers["If-None-Match"] = f'"{etag}"'
+        return self.client.get(url, headers=headers)
+
+    def test_1_get_example(self):
+        url = f"/api/examples/{self._e_1.id}"
+
+        # Act.
+        rv_1 = self.util_get(url)
+        etag, _ = rv_1.get_etag()
+        rv_2 = self.util_get(url, etag)
+
+        # Assert.
+        self.assertEqual(rv_1.status_code, 200)
+        self.assertIsNotNone(etag)
+        self.assertEqual(rv_2.status_code, 304)
+        self.assertEqual(rv_2.get_data(), b"")
+        self.assertEqual(rv_2.get_etag(), (etag, False))
+
+        # Act (edit).
+        self.client.put(
+            url,
+            json={"new_word": "kielet"},
+            headers={"Authorization": "Bearer " + self._u_r_1.token},
+        )
+        rv_3 = self.util_get(url, etag)
+
+        # Assert.
+        self.assertEqual(rv_3.status_code, 200)
+        self.assertEqual(json.loads(rv_3.get_data(as_text=True))["new_word"], "kielet")
+        self.assertNotEqual(rv_3.get_etag()[0], etag)
+
+    def test_2_get_examples(self):
+        url = "/api/examples"
+
+        # Act.
+        rv_1 = self.util_get(url)
+        etag, _ = rv_1.get_etag()
+        rv_2 = self.util_get(url, etag)
+        rv_3 = self.util_get(url + "?per_page=5", etag)
+
+        # Assert.
+        self.assertEqual(rv_1.status_code, 200)
+        self.assertEqual(rv_2.status_code, 304)
+        self.assertEqual(rv_2.get_etag(), (etag, False))
+        # A different page of results has a different `ETag`.
+        self.assertEqual(rv_3.status_code, 200)
+        self.assertNotEqual(rv_3.get_etag()[0], etag)
+
+        # Act (create).
+        e_2 = self.util_create_example(self._u_r_1.token, "Finnish", "osata", "-", None)
+        rv_4 = self.util_get(url, etag)
+        etag_4, _ = rv_4.get_etag()
+
+        # Assert.
+        self.assertEqual(rv_4.status_code, 200)
+        self.assertEqual(
+            [e["new_word"] for e in json.loads(rv_4.get_data(as_text=True))["items"]],
+            ["osata", "kieli"],
+        )
+
+        # Act (edit via the batch endpoint).
+        self.client.patch(
+            "/api/examples:batch",
+            json=[{"id": e_2.id, "content": "+"}],
+            headers={"Authorization": "Bearer " + self._u_r_1.token},
+        )
+        rv_5 = self.util_get(url, etag_4)
+        etag_5, _ = rv_5.get_etag()
+
+        # Assert.
+        self.assertEqual(rv_5.status_code, 200)
+
+        # Act (delete).
+        self.client.delete(
+            f"/api/examples/{e_2.id}",
+            headers={"Authorization": "Bearer " + self._u_r_1.token},
+        )
+        rv_6 = self.util_get(url, etag_5)
+
+        # Assert.
+        self.assertEqual(rv_6.status_code, 200)
+        self.assertEqual(
+            [e["new_word"] for e in json.loads(rv_6.get_data(as_text=True))["items"]],
+            ["kieli"],
+        )
+
+    def test_3_not_modified_without_querying_for_a_page(self):
+        # Arrange.
+        url = "/api/examples"
+        etag, _ = self.util_get(url).get_etag()
+        # Make sure that the response is not served from the cache.
+        response_cache.invalidate(self._u_r_1.id)
+
+        statements = []
+
+        def before_cursor_execute(
+            conn, cursor, statement, parameters, context, executemany
+        ):
+            if "FROM example" in statement:
+                statements.append(statement)
+
+        # Act.
+        event.listen(db.engine, "before_cursor_execute", before_cursor_execute)
+        try:
+            rv = self.util_get(url, etag)
+        finally:
+            event.remove(db.engine, "before_cursor_execute", before_cursor_execute)
+
+        # Assert.
+        self.assertEqual(rv.status_code, 304)
+        self.assertEqual(len(statements), 1)
+        self.assertIn("user.example_count", statements[0])
+        self.assertIn("max(example.updated)", statements[0])
+
+
+class Test_13_OptimisticConcurrency(TestBaseForExampleResources_2):
+    """
+    Test that edits of `Example` resources don't overwrite each other.
+    """
+
+    def setUp(self):
+        super().setUp()
+
+        self._u_r_1: UserResource = self.util_create_user(
+            "jd",
+            "john.doe@protonmail.com",
+            "123",
+        )
+        self._e_1 = self.util_create_example(
+            self._u_r_1.token,
+            "Finnish",
+            "kieli",
+            "Mitä kieltä sinä puhut?",
+            "What languages do you speak?",
+        )
+        self._url = f"/api/examples/{self._e_1.id}"
+
+    def util_put(self, data, etag=None):
+        headers = {"Authorization": "Bearer " + self._u_r_1.token}
+        if etag is not None:
+            headers["If-Match"] = f'"{etag}"'
+        return self.client.put(self._url, json=data, headers=headers)
+
+    def test_1_if_match(self):
+        # Arrange.
+        etag, _ = self.client.get(
+            self._url,
+            headers={"Authorization": "Bearer " + self._u_r_1.token},
+        ).get_etag()
+
+        # Act.
+        rv_1 = self.util_put({"new_word": "kielet"}, etag)
+        # (Another tab still holds on to the original `ETag`.)
+        rv_2 = self.util_put({"new_word": "kielten"}, etag)
+        rv_3 = self.util_put({"new_word": "kielten"}, rv_1.get_etag()[0])
+
+        # Assert.
+        self.assertEqual(rv_1.status_code, 200)
+        self.assertNotEqual(rv_1.get_etag()[0], etag)
+
+        self.assertEqual(rv_2.status_code, 412)
+        body_2 = json.loads(rv_2.get_data(as_text=True))
+        self.assertEqual(body_2["error"], "Precondition Failed")
+
+        self.assertEqual(rv_3.status_code, 200)
+        self.assertEqual(Example.query.get(self._e_1.id).new_word, "kielten")
+        self.assertEqual(Example.query.get(self._e_1.id).version, 3)
+
+    def test_2_if_match_any(self):
+        # Act.
+        headers = {
+            "Authorization": "Bearer " + self._u_r_1.token,
+            "If-Match": "*",
+        }
+        rv = self.client.put(self._url, json={"new_word": "kielet"}, headers=headers)
+
+        # Assert.
+        self.assertEqual(rv.status_code, 200)
+
+    def test_3_statements(self):
+        """
+        Ensure that editing/deleting an `Example`
+        issues a single statement, which checks the ownership (and the version),
+        instead of loading the `Example` beforehand.
+        """
+
+        # Arrange.
+        statements = []
+
+        def before_cursor_execute(
+            conn, cursor, statement, parameters, context, executemany
+        ):
+            # (Neither `example_fts` nor `user.example_count` is of interest.)
+            if re.search(r"\bexample\b", statement):
+                statements.append(statement)
+
+        # Act.
+        event.listen(db.engine, "before_cursor_execute", before_cursor_execute)
+        try:
+            rv_1 = self.util_put({"new_word": "kielet"}, f"{self._e_1.id}-1")
+            statements_1, statements[:] = statements[:], []
+            rv_2 = self.client.delete(
+                self._url,
+                headers={"Authorization": "Bearer " + self._u_r_1.token},
+            )
+            statements_2 = statements[:]
+        finally:
+            event.remove(db.engine, "before_cursor_execute", before_cursor_execute)
+
+        # Assert.
+        self.assertEqual(rv_1.status_code, 200)
+        self.assertEqual(rv_1.get_etag(), (f"{self._e_1.id}-2", False))
+        # (The `UPDATE` is followed by a `SELECT` for the response body.)
+        self.assertEqual(len(statements_1), 2)
+        self.assertTrue(statements_1[0].startswith("UPDATE example"))
+        self.assertIn("example.user_id = ?", statements_1[0])
+        self.assertIn("example.version IN", statements_1[0])
+
+        self.assertEqual(rv_2.status_code, 204)
+        self.assertEqual(len(statements_2), 1)
+        self.assertTrue(statements_2[0].startswith("DELETE FROM example"))
+        self.assertIn("example.user_id = ?", statements_2[0])
+
+    def test_4_not_found_instead_of_precondition_failed(self):
+        # Arrange.
+        u_r_2: UserResource = self.util_create_user(
+            "ms",
+            "mary.smith@protonmail.com",
+            "456",
+        )
+
+        # Act.
+        rv_1 = self.client.put(
+            self._url,
+            json={"new_word": "kielet"},
+            headers={
+                "Authorization": "Bearer " + u_r_2.token,
+                "If-Match": f'"{self._e_1.id}-1"',
+            },
+        )
+        rv_2 = self.client.delete(
+            self._url,
+            headers={"Authorization": "Bearer " + u_r_2.token},
+        )
+
+        # Assert.
+        self.assertEqual(rv_1.status_code, 404)
+        self.assertEqual(rv_2.status_code, 404)
+        self.assertEqual(Example.query.get(self._e_1.id).new_word, "kieli")
+
+    def test_5_batch_edit_changes_etag(self):
+        # Arrange.
+        etag, _ = self.client.get(
+            self._url,
+            headers={"Authorization": "Bearer " + self._u_r_1.token},
+        ).get_etag()
+
+        # Act.
+        self.client.patch(
+            "/api/examples:batch",
+            json=[{"id": self._e_1.id, "content": "-"}],
+            headers={"Authorization": "Bearer " + self._u_r_1.token},
+        )
+        rv = self.util_put({"new_word": "kielet"}, etag)
+
+        # Assert.
+        self.assertEqual(rv.status_code, 412)
+
+
+class Test_14_CountCache(TestBaseForExampleResources_2):
+    """
+    Test that the total number of `Example` resources in a response
+    is neither counted anew for every page
+    nor out of date after the `Example` resources have been changed.
+    """
+
+    def setUp(self):
+        super().setUp()
+
+        self._u_r_1: UserResource = self.util_create_user(
+            "jd",
+            "john.doe@protonmail.com",
+            "123",
+        )
+        for new_word in ("kieli", "kielet", "osata"):
+            self.util_create_example(self._u_r_1.token, "Finnish", new_word, "-", None)
+
+        self._statements = []
+
+        def before_cursor_execute(
+            conn, cursor, statement, parameters, context, executemany
+        ):
+            if "count(" in statement:
+                self._statements.append(statement)
+
+        self._before_cursor_execute = before_cursor_execute
+        event.listen(db.engine, "before_cursor_execute", before_cursor_execute)
+
+    def tearDown(self):
+        event.remove(db.engine, "before_cursor_execute", self._before_cursor_execute)
+        super().tearDown()
+
+    def util_get_total_items(self, url):
+        rv = self.client.get(
+            url,
+            headers={"Authorization": "Bearer " + self._u_r_1.token},
+        )
+        self.assertEqual(rv.status_code, 200)
+        return rv.json["_meta"]["total_items"]
+
+    def util_assert_example_count(self, expected):
+        u = User.query.get(self._u_r_1.id)
+        self.assertEqual(u.example_count, expected)
+        self.assertEqual(
+            Example.query.filter_by(user_id=self._u_r_1.id).count(),
+            expected,
+        )
+
+    def test_1_maintain_example_count(self):
+        # Arrange.
+        self.util_assert_example_count(3)
+        headers = {"Authorization": "Bearer " + self._u_r_1.token}
+
+        # Act (create in a batch).
+        rv = self.client.post(
+            "/api/examples:batch",
+            json=[{"new_word": "osallistua", "content": "-"}, {"content": "-"}],
+            headers=headers,
+        )
+        self.assertEqual(rv.status_code, 200)
+
+        # Assert.
+        self.util_assert_example_count(4)
+
+        # Act (import).
+        rv = self.client.post(
+            "/api/examples/import",
+            data=b'{"new_word": "kilpailu", "content": "-"}\n',
+            headers={"Content-Type": "application/x-ndjson", **headers},
+        )
+        self.assertEqual(rv.status_code, 200)
+
+        # Assert.
+        self.util_assert_example_count(5)
+
+        # Act (delete).
+        example_ids = [
+            e.id for e in Example.query.filter_by(user_id=self._u_r_1.id).all()
+        ]
+        rv = self.client.delete(f"/api/examples/{example_ids[0]}", headers=headers)
+        self.assertEqual(rv.status_code, 204)
+        rv = self.client.delete(f"/api/examples/{example_ids[0]}", headers=headers)
+        self.assertEqual(rv.status_code, 404)
+
+        # Assert.
+        self.util_assert_example_count(4)
+
+        # Act (delete in a batch).
+        rv = self.client.delete(
+            "/api/examples:batch",
+            json=example_ids[:3],
+            headers=headers,
+        )
+        self.assertEqual(rv.status_code, 200)
+
+        # Assert.
+        self.util_assert_example_count(2)
+
+    def test_2_no_count_without_filters(self):
+        # Act.
+        total_items_1 = self.util_get_total_items("/api/examples?per_page=1&page=2")
+        total_items_2 = self.util_get_total_items("/api/examples?per_page=1&after=")
+
+        # Assert.
+        self.assertEqual((total_items_1, total_items_2), (3, 3))
+        self.assertEqual(self._statements, [])
+
+    def test_3_count_once_per_filter(self):
+        # Act.
+        total_items_1 = self.util_get_total_items(
+            "/api/examples?per_page=1&page=1&new_word=kiel"
+        )
+        total_items_2 = self.util_get_total_items(
+            "/api/examples?per_page=1&page=2&new_word=kiel"
+        )
+        total_items_3 = self.util_get_total_items("/api/examples?new_word=osata")
+
+        # Assert.
+        self.assertEqual((total_items_1, total_items_2, total_items_3), (2, 2, 1))
+        self.assertEqual(len(self._statements), 2)
+
+    def test_4_invalidate_upon_changes(self):
+        # Arrange.
+        url = "/api/examples?per_page=1&page=2&new_word=kiel"
+        self.assertEqual(self.util_get_total_items(url), 2)
+
+        # Act (create).
+        self.util_create_example(self._u_r_1.token, "Finnish", "kielioppi", "-", None)
+
+        # Assert.
+        self.assertEqual(self.util_get_total_items(url), 3)
+
+        # Act (edit).
+        e = Example.query.filter_by(new_word="kieli").one()
+        rv = self.client.put(
+            f"/api/examples/{e.id}",
+            json={"new_word": "sana"},
+            headers={"Authorization": "Bearer " + self._u_r_1.token},
+        )
+        self.assertEqual(rv.status_code, 200)
+
+        # Assert.
+        self.assertEqual(self.util_get_total_items(url), 2)
+
+
+class Counting(LRUCache):
+    """An `LRUCache` that counts how many lookups of responses have been hits."""
+
+    def __init__(self, max_size, ttl_seconds):
+        super().__init__(max_size, ttl_seconds)
+        self.n_hits = 0
+
+    def get(self, key, default=None):
+        value = super().get(key, default)
+        if key.startswith("response:") and value is not default:
+            self.n_hits += 1
+        return value
@@ -0,0 +1,193 @@
+import datetime as dt
+import re
+import jwt
+
+from sqlalchemy import event
+
+from src import db, EmailAddressChange
+from tests import UserResource
+from tests.api.test_4_examples import TestBaseForExampleResources_2
+from src.constants import EMAIL_ADDRESS_CONFIRMATION
+
+
+class TestBaseForQueryPlans(TestBaseForExampleResources_2):
+    """
+    Provide utilities for inspecting how SQLite executes
+    the SQL statements that are issued while the application handles a request.
+
+    (The test cases, which are built on top of this class, are meant to ensure that
+    the database schema and the access paths of the request-handling functions
+    don't drift apart from each other.)
+    """
+
+    def util_capture_query_plans(self, issue_request, table_name):
+        """
+        Issue a request by calling `issue_request`,
+        and return the query plans of all SQL statements,
+        which were issued while handling that request and which involve `table_name`.
+
+        Each query plan is returned as a list of the "detail" strings
+        within the output of SQLite's `EXPLAIN QUERY PLAN` command.
+        """
+        captured_statements = []
+
+        def before_cursor_execute(
+            conn, cursor, statement, parameters, context, executemany
+        ):
+            if re.search(rf"\b{table_name}\b", statement) and not executemany:
+                captured_statements.append((statement, parameters))
+
+        event.listen(db.engine, "before_cursor_execute", before_cursor_execute)
+        try:
+            rv = issue_request()
+        finally:
+            event.remove(db.engine, "before_cursor_execute", before_cursor_execute)
+
+        query_plans = []
+        with db.engine.connect() as connection:
+            for statement, parameters in captured_statements:
+                rows = connection.exec_driver_sql(
+                    "EXPLAIN QUERY PLAN " + statement,
+                    parameters,
+                ).fetchall()
+                query_plans.append([row[-1] for row in rows])
+
+        return rv, query_plans
+
+    def util_assert_no_full_scans(self, query_plans, table_name):
+        for query_plan in query_plans:
+            for detail in query_plan:
+                self.assertFalse(
+                    detail.startswith(f"SCAN {table_name}"),
+                    msg=f"full table scan: {query_plan}",
+                )
+                self.assertNotIn(
+                    "USE TEMP B-TREE",
+                    detail,
+                    msg=f"sorting without an index: {query_plan}",
+                )
+
+
+class Test_01_ExampleQueryPlans(TestBaseForQueryPlans):
+    def setUp(self):
+        super().setUp()
+
+        self._u_r_1: UserResource = self.util_create_user(
+            "jd",
+            "john.doe@protonmail.com",
+            "123",
+        )
+        for x in range(3):
+            self.util_create_example(
+                self._u_r_1.token,
+                "Finnish",
+                str(x),
+                f"Content #{x}",
+                None,
+            )
+
+    def test_1_get_examples(self):
+        """
+        Ensure that getting a page of a `User`'s own `Example` resources
+        is served by the composite index over `example(user_id, id)`,
+        and that computing the `ETag` of the response
+        is served by the composite index over `example(user_id, updated)` alone.
+        """
+
+        for url in (
+            "/api/examples?per_page=2&page=2",
+            "/api/examples?per_page=2&after=",
+        ):
+            # Act.
+            rv, query_plans = self.util_capture_query_plans(
+                lambda: self.client.get(
+                    url,
+                    headers={
+                        "Authorization": "Bearer " + self._u_r_1.token,
+                    },
+                ),
+                "example",
+            )
+
+            # Assert.
+            self.assertEqual(rv.status_code, 200)
+            self.assertNotEqual(query_plans, [])
+            self.util_assert_no_full_scans(query_plans, "example")
+            etag_query_plan, *query_plans = query_plans
+            self.assertTrue(
+                any(
+                    "COVERING INDEX ix_example_user_id_updated" in detail
+                    for detail in etag_query_plan
+                ),
+                msg=f"the covering index isn't used: {etag_query_plan}",
+            )
+            self.assertNotEqual(query_plans, [])
+            for query_plan in query_plans:
+                # (The total number of results
+                # may be counted by means of either composite index.)
+                self.assertTrue(
+                    any(
+                        "ix_example_user_id_id" in detail
+                        or "ix_example_user_id_updated" in detail
+                        for detail in query_plan
+                    ),
+                    msg=f"no composite index is used: {query_plan}",
+                )
+            self.assertTrue(
+                any(
+                    "USING INDEX ix_example_user_id_id" in detail
+                    for query_plan in query_plans
+                    for detail in query_plan
+                ),
+                msg=f"the page isn't fetched via the composite index: {query_plans}",
+            )
+
+
+class Test_02_EmailAddressChangeQueryPlans(TestBaseForQueryPlans):
+    def test_1_confirm_email_address_change(self):
+        """
+        Ensure that looking up (and cleaning up)
+        the `EmailAddressChange`s initiated by a `User`
+        is served by the composite index over
+        `email_address_change(user_id, old, id)`.
+        """
+
+        # Arrange.
+        u_r: UserResource = self.util_create_user(
+            "jd",
+            "john.doe@protonmail.com",
+            "123",
+        )
+        for new in ("jd@protonmail.com", "john.d@protonmail.com"):
+            db.session.add(EmailAddressChange(user_id=u_r.id, old=u_r.email, new=new))
+        db.session.commit()
+
+        token = jwt.encode(
+            {
+                "exp": dt.datetime.utcnow() + dt.timedelta(minutes=1),
+                "purpose": EMAIL_ADDRESS_CONFIRMATION,
+                "user_id": u_r.id,
+                "email_address_change_id": 2,
+            },
+            key=self.app.config["SECRET_KEY"],
+            algorithm="HS256",
+        )
+
+        # Act.
+        rv, query_plans = self.util_capture_query_plans(
+            lambda: self.client.post(f"/api/confirm-email-address/{token}"),
+            "email_address_change",
+        )
+
+        # Assert.
+        self.assertEqual(rv.status_code, 200)
+        self.assertNotEqual(query_plans, [])
+        self.util_assert_no_full_scans(query_plans, "email_address_change")
+        for query_plan in query_plans:
+            self.assertTrue(
+                any(
+                    "ix_email_address_change_user_id_old_id" in detail
+                    for detail in query_plan
+                ),
+                msg=f"the composite index isn't used: {query_plan}",
+            )
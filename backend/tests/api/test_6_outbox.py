@@ -0,0 +1,401 @@
+import datetime as dt
+import smtplib
+import threading
+from unittest.mock import patch
+
+import flask_mail
+from prometheus_client import REGISTRY
+
+from src import db, mail, outbox_dispatcher, OutboxEmail
+from src.outbox import enqueue_email, send_batch_from_outbox
+from tests import TestBasePlusUtilities, UserResource
+
+
+class Test_01_EnqueueEmails(TestBasePlusUtilities):
+    def test_1_create_user(self):
+        """
+        Ensure that creating a User resource
+        puts an email-address-confirmation message into the outbox
+        (instead of sending it straight away).
+        """
+
+        # Act.
+        with mail.record_messages() as outbox:
+            u_r: UserResource = self.util_create_user(
+                "jd",
+                "john.doe@protonmail.com",
+                "123",
+            )
+
+        # Assert.
+        self.assertEqual(outbox, [])
+
+        outbox_emails = OutboxEmail.query.all()
+        self.assertEqual(len(outbox_emails), 1)
+        self.assertEqual(outbox_emails[0].sender, self.app.config["ADMINS"][0])
+        self.assertEqual(outbox_emails[0].recipients, [u_r.email])
+        self.assertEqual(
+            outbox_emails[0].subject,
+            "[VocabTreasury] Please confirm your email address",
+        )
+        self.assertEqual(outbox_emails[0].attempts, 0)
+
+    def test_2_request_password_reset(self):
+        # Arrange.
+        u_r: UserResource = self.util_create_user(
+            "jd",
+            "john.doe@protonmail.com",
+            "123",
+            should_confirm_email_address=True,
+        )
+
+        # Act.
+        rv = self.client.post(
+            "/api/request-password-reset",
+            json={"email": u_r.email},
+        )
+
+        # Assert.
+        self.assertEqual(rv.status_code, 202)
+        self.assertEqual(
+            [e.subject for e in OutboxEmail.query.order_by(OutboxEmail.id)],
+            [
+                "[VocabTreasury] Please confirm your email address",
+                "[VocabTreasury] Your request for a password reset",
+            ],
+        )
+
+
+class Test_02_MailWorker(TestBasePlusUtilities):
+    def setUp(self):
+        super().setUp()
+
+        for username, email in (
+            ("jd", "john.doe@protonmail.com"),
+            ("ms", "mary.smith@protonmail.com"),
+        ):
+            self.util_create_user(username, email, "123")
+
+    def test_1_send_all_messages(self):
+        # Act.
+        with mail.record_messages() as outbox:
+            result = self.app.test_cli_runner().invoke(
+                args=["mail-worker", "--once"],
+            )
+
+        # Assert.
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertEqual(result.output, "sent 2 message(s), failed to send 0\n")
+
+        self.assertEqual(
+            [msg.recipients for msg in outbox],
+            [["john.doe@protonmail.com"], ["mary.smith@protonmail.com"]],
+        )
+        self.assertEqual(OutboxEmail.query.count(), 0)
+
+    def test_2_send_messages_in_batches(self):
+        # Act.
+        with patch("src.outbox.mail.connect", wraps=mail.connect) as connect_mock:
+            with mail.record_messages() as outbox:
+                result = self.app.test_cli_runner().invoke(
+                    args=["mail-worker", "--once", "--batch-size", "1"],
+                )
+
+        # Assert.
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertEqual(len(outbox), 2)
+        # One connection per batch of 1 message.
+        self.assertEqual(connect_mock.call_count, 2)
+        self.assertEqual(OutboxEmail.query.count(), 0)
+
+    def test_3_retry_with_backoff(self):
+        # Act.
+        with patch(
+            "src.outbox.mail.connect",
+            side_effect=ConnectionRefusedError("no mail server"),
+        ):
+            n_sent, n_failed = send_batch_from_outbox(10)
+
+        # Assert.
+        self.assertEqual((n_sent, n_failed), (0, 2))
+
+        backoff = dt.timedelta(seconds=self.app.config["OUTBOX_RETRY_BACKOFF_SECONDS"])
+        for outbox_email in OutboxEmail.query.all():
+            self.assertEqual(outbox_email.attempts, 1)
+            self.assertIn("no mail server", outbox_email.last_error)
+            self.assertGreater(
+                outbox_email.next_attempt_at,
+                dt.datetime.utcnow() + backoff - dt.timedelta(seconds=5),
+            )
+
+        # The failed messages aren't retried before their backoff has elapsed.
+        with mail.record_messages() as outbox:
+            self.assertEqual(send_batch_from_outbox(10), (0, 0))
+        self.assertEqual(outbox, [])
+
+        # Once it has elapsed, they are retried.
+        for outbox_email in OutboxEmail.query.all():
+            outbox_email.next_attempt_at = dt.datetime.utcnow()
+        db.session.commit()
+        with mail.record_messages() as outbox:
+            self.assertEqual(send_batch_from_outbox(10), (2, 0))
+        self.assertEqual(len(outbox), 2)
+        self.assertEqual(OutboxEmail.query.count(), 0)
+
+    def test_4_give_up_after_max_attempts(self):
+        # Arrange.
+        self.app.config["OUTBOX_MAX_ATTEMPTS"] = 1
+
+        # Act.
+        with patch(
+            "src.outbox.mail.connect",
+            side_effect=ConnectionRefusedError("no mail server"),
+        ):
+            send_batch_from_outbox(10)
+
+        # Assert.
+        outbox_emails = OutboxEmail.query.all()
+        self.assertEqual(len(outbox_emails), 2)
+        for outbox_email in outbox_emails:
+            self.assertEqual(outbox_email.attempts, 1)
+            self.assertIsNone(outbox_email.next_attempt_at)
+
+    def test_5_failure_of_a_single_message(self):
+        # Arrange.
+        original_send = flask_mail.Connection.send
+
+        def send(connection, message, *args, **kwargs):
+            if message.recipients == ["john.doe@protonmail.com"]:
+                raise RuntimeError("recipient refused")
+            return original_send(connection, message, *args, **kwargs)
+
+        # Act.
+        with patch("flask_mail.Connection.send", send):
+            with mail.record_messages() as outbox:
+                n_sent, n_failed = send_batch_from_outbox(10)
+
+        # Assert.
+        self.assertEqual((n_sent, n_failed), (1, 1))
+        self.assertEqual(
+            [msg.recipients for msg in outbox],
+            [["mary.smith@protonmail.com"]],
+        )
+
+        outbox_emails = OutboxEmail.query.all()
+        self.assertEqual(len(outbox_emails), 1)
+        self.assertEqual(outbox_emails[0].recipients, ["john.doe@protonmail.com"])
+        self.assertEqual(outbox_emails[0].attempts, 1)
+
+    def test_6_connection_breaks_down_partway(self):
+        # Arrange.
+        original_send = flask_mail.Connection.send
+
+        def send(connection, message, *args, **kwargs):
+            if message.recipients == ["mary.smith@protonmail.com"]:
+                raise smtplib.SMTPServerDisconnected("connection unexpectedly closed")
+            return original_send(connection, message, *args, **kwargs)
+
+        def exit(connection, exc_type, exc_value, traceback):
+            # (This is what `QUIT` does on a connection that has broken down.)
+            raise smtplib.SMTPServerDisconnected("please run connect() first")
+
+        # Act.
+        with patch("flask_mail.Connection.send", send), patch(
+            "flask_mail.Connection.__exit__", exit
+        ):
+            with mail.record_messages() as outbox:
+                n_sent, n_failed = send_batch_from_outbox(10)
+
+        # Assert.
+        self.assertEqual((n_sent, n_failed), (1, 1))
+        self.assertEqual(
+            [msg.recipients for msg in outbox],
+            [["john.doe@protonmail.com"]],
+        )
+
+        # Only the message that wasn't sent is retried, and its attempt is counted once.
+        outbox_emails = OutboxEmail.query.all()
+        self.assertEqual(len(outbox_emails), 1)
+        self.assertEqual(outbox_emails[0].recipients, ["mary.smith@protonmail.com"])
+        self.assertEqual(outbox_emails[0].attempts, 1)
+        self.assertIn("connection unexpectedly closed", outbox_emails[0].last_error)
+
+
+class Test_03_OutboxDispatcher(TestBasePlusUtilities):
+    def setUp(self):
+        super().setUp()
+
+        self.app.config["OUTBOX_DISPATCH_ENABLED"] = True
+        self._dispatcher_state = self.app.extensions["outbox_dispatcher"]
+
+    def util_sample(self, name, **labels):
+        return REGISTRY.get_sample_value(name, labels) or 0.0
+
+    def test_1_send_committed_messages(self):
+        # Arrange.
+        n_sent_before = self.util_sample(
+            "outbox_dispatch_messages_total", outcome="sent"
+        )
+        n_durations_before = self.util_sample("outbox_send_duration_seconds_count")
+
+        # Act.
+        with mail.record_messages() as outbox:
+            self.util_create_user("jd", "john.doe@protonmail.com", "123")
+            self.util_create_user("ms", "mary.smith@protonmail.com", "456")
+            self._dispatcher_state.join()
+
+        # Assert.
+        self.assertEqual(
+            sorted(msg.recipients[0] for msg in outbox),
+            ["john.doe@protonmail.com", "mary.smith@protonmail.com"],
+        )
+        self.assertEqual(OutboxEmail.query.count(), 0)
+
+        metrics = outbox_dispatcher.metrics()
+        self.assertEqual(metrics["queue_depth"], 0)
+        self.assertEqual(metrics["submitted"], 2)
+        self.assertEqual(metrics["sent"], 2)
+        self.assertEqual(metrics["failed"], 0)
+        self.assertEqual(metrics["dropped"], 0)
+
+        self.assertEqual(
+            self.util_sample("outbox_dispatch_messages_total", outcome="sent"),
+            n_sent_before + 2,
+        )
+        self.assertEqual(
+            self.util_sample("outbox_send_duration_seconds_count"),
+            n_durations_before + 2,
+        )
+
+    def test_2_request_does_not_wait_for_mail_server(self):
+        # Arrange.
+        original_send = flask_mail.Connection.send
+        mail_server_may_respond = threading.Event()
+
+        def slow_send(connection, message, *args, **kwargs):
+            mail_server_may_respond.wait(timeout=10)
+            return original_send(connection, message, *args, **kwargs)
+
+        with patch("flask_mail.Connection.send", slow_send):
+            with mail.record_messages() as outbox:
+                # Act.
+                rv = self.client.post(
+                    "/api/users",
+                    json={
+                        "username": "jd",
+                        "email": "john.doe@protonmail.com",
+                        "password": "123",
+                    },
+                )
+
+                # Assert.
+                self.assertEqual(rv.status_code, 201)
+                self.assertEqual(outbox, [])
+
+                mail_server_may_respond.set()
+                self._dispatcher_state.join()
+
+        self.assertEqual(len(outbox), 1)
+
+    def test_3_failed_messages_remain_in_outbox(self):
+        # Act.
+        with patch(
+            "src.outbox.mail.connect",
+            side_effect=ConnectionRefusedError("no mail server"),
+        ):
+            self.util_create_user("jd", "john.doe@protonmail.com", "123")
+            self._dispatcher_state.join()
+
+        # Assert.
+        self.assertEqual(outbox_dispatcher.metrics()["failed"], 1)
+
+        outbox_emails = OutboxEmail.query.all()
+        self.assertEqual(len(outbox_emails), 1)
+        self.assertEqual(outbox_emails[0].attempts, 1)
+
+    def test_4_drop_when_queue_is_full(self):
+        # Arrange.
+        self.app.config["OUTBOX_DISPATCH_THREADS"] = 0
+        self.app.config["OUTBOX_DISPATCH_QUEUE_SIZE"] = 1
+        outbox_dispatcher.init_app(self.app)
+        queue_depth_before = self.util_sample("outbox_dispatch_queue_depth")
+        n_dropped_before = self.util_sample(
+            "outbox_dispatch_messages_total", outcome="dropped"
+        )
+
+        # Act.
+        self.util_create_user("jd", "john.doe@protonmail.com", "123")
+        self.util_create_user("ms", "mary.smith@protonmail.com", "456")
+
+        # Assert.
+        self.assertEqual(
+            self.util_sample("outbox_dispatch_queue_depth"), queue_depth_before + 1
+        )
+        self.assertEqual(
+            self.util_sample("outbox_dispatch_messages_total", outcome="dropped"),
+            n_dropped_before + 1,
+        )
+
+        metrics = outbox_dispatcher.metrics()
+        self.assertEqual(metrics["queue_depth"], 1)
+        self.assertEqual(metrics["queue_capacity"], 1)
+        self.assertEqual(metrics["submitted"], 1)
+        self.assertEqual(metrics["dropped"], 1)
+        # The dropped message is left for `flask mail-worker` to send.
+        self.assertEqual(OutboxEmail.query.count(), 2)
+
+    def test_5_rolled_back_messages_are_not_dispatched(self):
+        # Arrange.
+        self.app.config["OUTBOX_DISPATCH_THREADS"] = 0
+        outbox_dispatcher.init_app(self.app)
+
+        # Act.
+        enqueue_email(
+            self.app.config["ADMINS"][0],
+            ["john.doe@protonmail.com"],
+            "subject",
+            "body",
+        )
+        db.session.flush()
+        db.session.rollback()
+        db.session.commit()
+
+        # Assert.
+        self.assertEqual(outbox_dispatcher.metrics()["submitted"], 0)
+
+    def test_6_mail_worker_sends_what_the_dispatcher_left(self):
+        # Arrange.
+        # (The first message waits in the queue, which no thread is draining,
+        # and the second one is dropped because the queue is full.)
+        self.app.config["OUTBOX_DISPATCH_THREADS"] = 0
+        self.app.config["OUTBOX_DISPATCH_QUEUE_SIZE"] = 1
+        outbox_dispatcher.init_app(self.app)
+        self.util_create_user("jd", "john.doe@protonmail.com", "123")
+        self.util_create_user("ms", "mary.smith@protonmail.com", "456")
+        self.assertEqual(outbox_dispatcher.metrics()["dropped"], 1)
+
+        # (The first attempt to send the messages fails.)
+        with patch(
+            "src.outbox.mail.connect",
+            side_effect=ConnectionRefusedError("no mail server"),
+        ):
+            send_batch_from_outbox(10)
+        for outbox_email in OutboxEmail.query.all():
+            self.assertEqual(outbox_email.attempts, 1)
+            outbox_email.next_attempt_at = dt.datetime.utcnow()
+        db.session.commit()
+
+        # Act.
+        with mail.record_messages() as outbox:
+            result = self.app.test_cli_runner().invoke(
+                args=["mail-worker", "--once"],
+            )
+
+        # Assert.
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertEqual(result.output, "sent 2 message(s), failed to send 0\n")
+        self.assertEqual(
+            sorted(msg.recipients[0] for msg in outbox),
+            ["john.doe@protonmail.com", "mary.smith@protonmail.com"],
+        )
+        self.assertEqual(OutboxEmail.query.count(), 0)
@@ -0,0 +1,119 @@
+import datetime as dt
+
+from sqlalchemy import event
+
+from src import db, flsk_bcrpt, User, Example, EmailAddressChange
+from src.purging import (
+    PurgeReport,
+    count_expired_registrations,
+    purge_expired_registrations,
+)
+from tests import TestBase
+
+
+class Test_01_PurgeExpiredRegistrations(TestBase):
+    def setUp(self):
+        super().setUp()
+
+        self._days = self.app.config["DAYS_FOR_EMAIL_ADDRESS_CONFIRMATION"]
+        long_ago = dt.datetime.utcnow() - dt.timedelta(days=self._days + 1)
+        recently = dt.datetime.utcnow() - dt.timedelta(days=self._days - 1)
+
+        password_hash = flsk_bcrpt.generate_password_hash("123").decode("utf-8")
+        for username, is_confirmed, created, n_examples in (
+            ("expired-1", False, long_ago, 3),
+            ("confirmed", True, long_ago, 2),
+            ("expired-2", None, long_ago, 0),
+            ("recent", False, recently, 1),
+            ("expired-3", False, long_ago, 1),
+        ):
+            u = User(
+                username=username,
+                email=f"{username}@protonmail.com",
+                password_hash=password_hash,
+                is_confirmed=is_confirmed,
+                created=created,
+            )
+            db.session.add(u)
+            db.session.flush()
+            for x in range(n_examples):
+                db.session.add(Example(user_id=u.id, new_word=str(x), content="-"))
+            db.session.add(
+                EmailAddressChange(user_id=u.id, old=u.email, new=f"new-{u.email}")
+            )
+        db.session.commit()
+
+    def test_1_dry_run(self):
+        # Act.
+        report = count_expired_registrations(self._days)
+
+        # Assert.
+        self.assertEqual(
+            report,
+            PurgeReport(n_users=3, n_examples=4, n_email_address_changes=3),
+        )
+        self.assertEqual(User.query.count(), 5)
+        self.assertEqual(Example.query.count(), 7)
+
+    def test_2_purge(self):
+        # Arrange.
+        batches = []
+
+        # Act.
+        report = purge_expired_registrations(
+            self._days,
+            batch_size=2,
+            on_batch=batches.append,
+        )
+
+        # Assert.
+        self.assertEqual(
+            report,
+            PurgeReport(n_users=3, n_examples=4, n_email_address_changes=3),
+        )
+        self.assertEqual(
+            batches,
+            [
+                PurgeReport(n_users=2, n_examples=3, n_email_address_changes=2),
+                PurgeReport(n_users=1, n_examples=1, n_email_address_changes=1),
+            ],
+        )
+
+        self.assertEqual(
+            sorted(u.username for u in User.query),
+            ["confirmed", "recent"],
+        )
+        self.assertEqual(
+            sorted(e.user.username for e in Example.query),
+            ["confirmed", "confirmed", "recent"],
+        )
+        self.assertEqual(EmailAddressChange.query.count(), 2)
+        self.assertEqual(count_expired_registrations(self._days), PurgeReport())
+
+    def test_3_number_of_statements(self):
+        """
+        Ensure that the number of SQL statements
+        depends on the number of batches
+        but neither on the number of `User`s nor on the number of `Example`s.
+        """
+
+        # Arrange.
+        statements = []
+
+        def before_cursor_execute(
+            conn, cursor, statement, parameters, context, executemany
+        ):
+            statements.append(statement)
+
+        # Act.
+        event.listen(db.engine, "before_cursor_execute", before_cursor_execute)
+        try:
+            purge_expired_registrations(self._days, batch_size=100)
+        finally:
+            event.remove(db.engine, "before_cursor_execute", before_cursor_execute)
+
+        # Assert.
+        self.assertEqual(len(statements), 4)
+        self.assertTrue(statements[0].startswith("SELECT"))
+        for statement in statements[1:]:
+            self.assertTrue(statement.startswith("DELETE"))
@@ -0,0 +1,74 @@
+import dataclasses
+import datetime as dt
+import decimal
+import json
+import uuid
+from unittest.mock import patch
+
+from flask.json.provider import DefaultJSONProvider
+
+from src.json_provider import FastJSONProvider
+from tests import TestBase
+
+
+@dataclasses.dataclass
+class Point:
+    x: int
+    y: int
+
+
+class Test_01_FastJSONProvider(TestBase):
+    def setUp(self):
+        super().setUp()
+
+        self._obj = {
+            "b": [1, 2.5, None, True],
+            "a": "Mitä kieltä sinä puhut?",
+            "created": dt.datetime(2023, 3, 19, 15, 30, 0),
+            "id": uuid.UUID("12345678123456781234567812345678"),
+            "amount": decimal.Decimal("1.10"),
+            "point": Point(1, 2),
+        }
+
+    def test_1_is_registered(self):
+        self.assertIsInstance(self.app.json, FastJSONProvider)
+
+    def test_2_equivalent_to_default_provider(self):
+        # Act.
+        with self.app.test_request_context():
+            rv_fast = self.app.json.response(self._obj)
+            rv_default = DefaultJSONProvider(self.app).response(self._obj)
+
+        # Assert.
+        self.assertEqual(rv_fast.mimetype, "application/json")
+        body_fast = rv_fast.get_data(as_text=True)
+        body_default = rv_default.get_data(as_text=True)
+        self.assertEqual(json.loads(body_fast), json.loads(body_default))
+        # The keys are sorted, and the values are serialized in the same way.
+        self.assertEqual(
+            list(json.loads(body_fast).keys()),
+            list(json.loads(body_default).keys()),
+        )
+        self.assertIn('"created":"Sun, 19 Mar 2023 15:30:00 GMT"', body_fast)
+
+    def test_3_fall_back_to_standard_library(self):
+        # Act.
+        with patch("src.json_provider.orjson", None):
+            with self.app.test_request_context():
+                rv_fast = self.app.json.response(self._obj)
+                rv_default = DefaultJSONProvider(self.app).response(self._obj)
+            loaded = self.app.json.loads('{"a": [1, 2]}')
+
+        # Assert.
+        self.assertEqual(rv_fast.get_data(), rv_default.get_data())
+        self.assertEqual(loaded, {"a": [1, 2]})
+
+    def test_4_parse_request_bodies(self):
+        # Act.
+        with self.app.test_request_context(
+            json={"new_word": "kieli", "n": 1},
+        ) as ctx:
+            body = ctx.request.get_json()
+
+        # Assert.
+        self.assertEqual(body, {"new_word": "kieli", "n": 1})